@@ -0,0 +1,195 @@
+"""
+JSON serileştirme mikro benchmark'ı: gerçekçi büyüklükte yanıtlar.
+
+Her yük için iki FastAPI endpoint'i aynı veriyi döndürür ve doğrudan ASGI çağrılarıyla
+ölçülür (ağ yok):
+- before: stdlib json (JSONResponse), response_model doğrulaması + jsonable_encoder,
+  upstream gövdesi response.json() ile parse edilip yeniden yazılır
+- after: ORJSONResponse, doğrulama atlanır, dönüştürülmeyen upstream gövdesi ham bayt iletilir
+
+Yükler: TVMaze dizi + tüm bölümler, TMDB detay + tam crew listesi, 2000 filmlik my-list,
+TMDB arama sonucu (20 film). İki taraftaki JSON içeriğinin aynı olduğu da kontrol edilir.
+
+Kullanım (backend dizininden):
+    python benchmarks/json_serialization.py --iterations 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from schemas import FilmListItem, TMDBMovieSearch
+
+SUMMARY = "<p>" + "Walter White, a chemistry teacher, discovers that he has cancer. " * 4 + "</p>"
+
+
+def tvmaze_show(episodes: int = 1500) -> dict:
+    return {
+        "id": 169, "name": "Breaking Bad", "genres": ["Drama", "Crime", "Thriller"], "summary": SUMMARY,
+        "rating": {"average": 9.2}, "image": {"medium": "https://static.tvmaze.com/m.jpg", "original": "https://static.tvmaze.com/o.jpg"},
+        "_embedded": {
+            "cast": [{"person": {"id": i, "name": f"Actor {i}"}, "character": {"id": i, "name": f"Role {i}"}} for i in range(40)],
+            "episodes": [
+                {
+                    "id": 10000 + i, "name": f"Episode {i}", "season": i // 20 + 1, "number": i % 20 + 1,
+                    "airdate": "2010-01-01", "airstamp": "2010-01-01T02:00:00+00:00", "runtime": 47,
+                    "rating": {"average": 8.5}, "summary": SUMMARY,
+                    "image": {"medium": f"https://static.tvmaze.com/e{i}.jpg", "original": f"https://static.tvmaze.com/e{i}o.jpg"},
+                    "_links": {"self": {"href": f"https://api.tvmaze.com/episodes/{10000 + i}"}},
+                }
+                for i in range(episodes)
+            ],
+        },
+    }
+
+
+def tmdb_detail(crew: int = 600) -> dict:
+    return {
+        "id": 550, "title": "Fight Club", "overview": SUMMARY, "runtime": 139, "vote_average": 8.4,
+        "genres": [{"id": 18, "name": "Drama"}],
+        "cast": [{"id": i, "name": f"Actor {i}", "character": f"Role {i}", "profile_path": f"/p{i}.jpg"} for i in range(10)],
+        "crew": [
+            {"id": i, "name": f"Crew {i}", "job": "Director" if i == 0 else "Grip", "department": "Crew",
+             "credit_id": f"52fe4250c3a36847f80149f{i}", "profile_path": None, "popularity": 1.5}
+            for i in range(crew)
+        ],
+        "watch_providers": {"flatrate": [], "buy": [], "rent": []},
+    }
+
+
+def my_list(films: int = 2000) -> List[dict]:
+    started = datetime(2020, 1, 1)
+    return [
+        {
+            "id": i, "user_id": 1, "tmdb_id": 1000 + i, "title": f"Film {i}", "poster_path": f"/poster{i}.jpg",
+            "release_date": "2001-05-04", "overview": SUMMARY, "kisisel_puan": 7.5, "kisisel_yorum": None,
+            "izlendi": True, "is_favorite": False, "is_watchlist": False,
+            "izlenme_tarihi": started + timedelta(hours=i),
+        }
+        for i in range(films)
+    ]
+
+
+def tmdb_search() -> dict:
+    return {"page": 1, "results": [
+        {"id": i, "title": f"Film {i}", "original_title": f"Film {i}", "poster_path": f"/p{i}.jpg",
+         "backdrop_path": f"/b{i}.jpg", "release_date": "1999-10-15", "overview": SUMMARY,
+         "vote_average": 8.4, "vote_count": 25000, "genre_ids": [18, 53], "popularity": 60.1, "adult": False}
+        for i in range(20)
+    ]}
+
+
+class FakeUpstream:
+    """httpx.Response yerine: sadece content ve json() gerekiyor"""
+
+    def __init__(self, data):
+        self.content = json.dumps(data).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def build_apps():
+    show = FakeUpstream(tvmaze_show())
+    search = FakeUpstream(tmdb_search())
+    detail = tmdb_detail()
+    films = my_list()
+    search_fields = tuple(TMDBMovieSearch.model_fields)
+
+    before = FastAPI(default_response_class=JSONResponse)
+
+    @before.get("/tv")
+    async def tv_before():
+        return show.json()
+
+    @before.get("/tmdb")
+    async def tmdb_before():
+        return detail
+
+    @before.get("/my-list", response_model=List[FilmListItem], response_model_exclude_unset=True)
+    async def my_list_before():
+        return films
+
+    @before.get("/search", response_model=List[TMDBMovieSearch])
+    async def search_before():
+        return search.json().get("results", [])
+
+    after = FastAPI(default_response_class=ORJSONResponse)
+
+    @after.get("/tv")
+    async def tv_after():
+        return Response(content=show.content, media_type="application/json")
+
+    @after.get("/tmdb")
+    async def tmdb_after():
+        return ORJSONResponse(detail)
+
+    @after.get("/my-list", response_model=List[FilmListItem], response_model_exclude_unset=True)
+    async def my_list_after():
+        return ORJSONResponse(films)
+
+    @after.get("/search", response_model=List[TMDBMovieSearch])
+    async def search_after():
+        results = orjson.loads(search.content).get("results", [])
+        return ORJSONResponse([{field: item.get(field) for field in search_fields} for item in results])
+
+    return before, after
+
+
+async def _call(app, path: str) -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    chunks = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+async def bench(app, path: str, iterations: int) -> float:
+    await _call(app, path)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await _call(app, path)
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="JSON serileştirme karşılaştırması")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    before, after = build_apps()
+    print(f"{'yük':<10} {'boyut':>9} {'before':>10} {'after':>10} {'hızlanma':>9}")
+    for path in ("/tv", "/tmdb", "/my-list", "/search"):
+        before_body, after_body = await _call(before, path), await _call(after, path)
+        assert json.loads(before_body) == json.loads(after_body), f"{path}: içerik farklı"
+        before_ms = await bench(before, path, args.iterations)
+        after_ms = await bench(after, path, args.iterations)
+        print(f"{path:<10} {len(after_body) / 1024:7.0f}KB {before_ms:8.2f}ms {after_ms:8.2f}ms {before_ms / after_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+Middleware yükü mikro benchmark'ı: BaseHTTPMiddleware (önce) ve saf ASGI (sonra).
+
+Aynı küçük FastAPI uygulaması iki middleware yığınıyla kurulur (güvenlik header'ları +
+istek metrikleri + CORS) ve ağ/sunucu olmadan doğrudan ASGI çağrılarıyla sürülür;
+ölçülen fark yalnızca middleware katmanının maliyetidir.
+
+Kullanım (backend dizininden):
+    python benchmarks/middleware_overhead.py --requests 20000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from utils.middleware import RequestMetricsMiddleware, SecurityHeadersMiddleware
+from utils.query_stats import begin_request, finish_request, reset_request, server_timing_header
+
+
+# ---- Önceki BaseHTTPMiddleware sürümleri (main.py'deki eski hâlleri) ----
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["Cross-Origin-Opener-Policy"] = "unsafe-none"
+        response.headers["Cross-Origin-Embedder-Policy"] = "unsafe-none"
+        return response
+
+
+class LegacyQueryTimingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        stats, token, started = begin_request(request.scope)
+        try:
+            response = await call_next(request)
+        finally:
+            finish_request(request.scope, stats)
+            reset_request(token)
+        response.headers["Server-Timing"] = server_timing_header(stats, time.perf_counter() - started)
+        return response
+
+
+def build_app(*middlewares) -> FastAPI:
+    app = FastAPI()
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    if middlewares:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["http://localhost:5173"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    @app.get("/api/users/{user_id}")
+    async def user(user_id: int):
+        return {"id": user_id, "username": f"user{user_id}", "film_count": 42}
+
+    return app
+
+
+async def _call(app, path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"origin", b"http://localhost:5173")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def bench(app, requests: int, concurrency: int) -> float:
+    # Isınma (route/doğrulayıcı önbellekleri)
+    for index in range(200):
+        await _call(app, f"/api/users/{index}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        async with semaphore:
+            assert await _call(app, f"/api/users/{index}") == 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="BaseHTTPMiddleware ve saf ASGI middleware karşılaştırması")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    before = build_app(LegacySecurityHeadersMiddleware, LegacyQueryTimingMiddleware)
+    after = build_app(SecurityHeadersMiddleware, RequestMetricsMiddleware)
+    bare = build_app()
+
+    print(f"{args.requests} istek, eşzamanlılık {args.concurrency}")
+    for name, app in (("middleware yok", bare), ("before", before), ("after", after)):
+        print(f"{name:<15} {await bench(app, args.requests, args.concurrency):10.0f} istek/sn")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
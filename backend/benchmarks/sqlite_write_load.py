@@ -0,0 +1,178 @@
+"""
+SQLite eşzamanlı yazma yük testi: beğeni/yorum yazmalarında "database is locked" hataları.
+
+Aynı anda --concurrency kadar istek, her biri beğeni isteğindeki gibi önce okuyup
+(film var mı, zaten beğenilmiş mi) sonra yazar:
+- before: varsayılan SQLite (rollback journal, pragma yok), her istek kendi bağlantısında
+  okuyup yazmaya yükselir ve commit eder
+- after: WAL + pragmalar ve tek yazar kuyruğu (utils/write_queue.py), yazmalar partiler halinde
+
+Kullanım (backend dizininden):
+    python benchmarks/sqlite_write_load.py --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from database import SessionLocal, apply_sqlite_pragmas, database_url, init_db
+from models import ActivityComment, ActivityLike, Film, User
+from utils.write_queue import SQLiteWriteQueue
+
+
+def _seed(users: int) -> int:
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [{"username": f"load{i}", "email": f"load{i}@example.com"} for i in range(users)])
+        owner = db.scalar(select(User.id).limit(1))
+        film = Film(user_id=owner, tmdb_id=550, title="Fight Club", izlendi=True)
+        db.add(film)
+        db.commit()
+        return film.id
+    finally:
+        db.close()
+
+
+def _reset():
+    db = SessionLocal()
+    try:
+        db.query(ActivityLike).delete()
+        db.query(ActivityComment).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _user_ids():
+    db = SessionLocal()
+    try:
+        return db.scalars(select(User.id).order_by(User.id)).all()
+    finally:
+        db.close()
+
+
+def _insert_like_and_comment(db, user_id: int, film_id: int):
+    db.add(ActivityLike(user_id=user_id, film_id=film_id))
+    db.add(ActivityComment(user_id=user_id, film_id=film_id, content="yük testi"))
+    db.flush()
+
+
+async def _run(request, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = {"locked": 0, "other": 0}
+    latencies = []
+
+    async def one(index: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await request(index)
+            except OperationalError as e:
+                errors["locked" if "locked" in str(e) else "other"] += 1
+            except Exception:
+                errors["other"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "ok": requests - errors["locked"] - errors["other"],
+        "locked": errors["locked"],
+        "other": errors["other"],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def bench_before(film_id: int, user_ids, args) -> dict:
+    # Pragma yok: varsayılan rollback journal ve sürücünün 5 sn'lik kilit beklemesi
+    engine = create_async_engine(database_url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    SessionLocalAsync = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def request(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        async with SessionLocalAsync() as db:
+            await db.scalar(select(Film.id).where(Film.id == film_id))
+            await db.scalar(select(ActivityLike.id).where(
+                ActivityLike.user_id == user_id, ActivityLike.film_id == film_id
+            ))
+            await db.run_sync(_insert_like_and_comment, user_id, film_id)
+            await db.commit()
+
+    try:
+        return await _run(request, args.requests, args.concurrency)
+    finally:
+        await engine.dispose()
+
+
+async def bench_after(film_id: int, user_ids, args) -> dict:
+    engine = create_async_engine(database_url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    event.listen(engine.sync_engine, "connect", apply_sqlite_pragmas)
+    SessionLocalAsync = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    writer = SQLiteWriteQueue(database_url, batch_size=args.batch_size)
+
+    async def request(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        async with SessionLocalAsync() as db:
+            await db.scalar(select(Film.id).where(Film.id == film_id))
+            await db.scalar(select(ActivityLike.id).where(
+                ActivityLike.user_id == user_id, ActivityLike.film_id == film_id
+            ))
+        await writer.submit(_insert_like_and_comment, user_id, film_id)
+
+    try:
+        result = await _run(request, args.requests, args.concurrency)
+        result["batches"] = writer.batches
+        return result
+    finally:
+        writer.close()
+        await engine.dispose()
+
+
+def _print(name: str, result: dict):
+    extra = f"  ({result['batches']} commit)" if "batches" in result else ""
+    print(
+        f"{name:<7} {result['elapsed']:7.2f} s  başarılı {result['ok']:5d}  "
+        f"locked {result['locked']:5d}  diğer {result['other']:4d}  p95 {result['p95_ms']:8.1f} ms{extra}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SQLite eşzamanlı yazma yük testi")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    init_db()
+    # Her istek farklı kullanıcıdan: beğeni unique kısıtına takılmaz
+    film_id = _seed(args.requests)
+    user_ids = _user_ids()
+    print(f"{args.requests} yazma isteği, eşzamanlılık {args.concurrency}")
+
+    # "before" ölçümü için veritabanı WAL dışı (rollback journal) modda başlar
+    db = SessionLocal()
+    try:
+        db.connection().exec_driver_sql("PRAGMA journal_mode=DELETE")
+    finally:
+        db.close()
+
+    _print("before", await bench_before(film_id, user_ids, args))
+    _reset()
+    _print("after", await bench_after(film_id, user_ids, args))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,6 +16,41 @@ class Settings(BaseSettings):
             return self.database_url.replace("postgres://", "postgresql://", 1)
         return self.database_url
     
+    # Veritabanı bağlantı havuzu (PostgreSQL) - havuz boyutu, ek bağlantı sayısı, bağlantı bekleme süresi (saniye)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Sorgu zaman aşımı (milisaniye, PostgreSQL statement_timeout) - 0 = sınırsız
+    db_statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    
+    # Okuma replikası (opsiyonel) - boşsa tüm sorgular birincil veritabanına gider
+    read_replica_url: str = os.getenv("READ_REPLICA_URL", "")
+    # Yazma yapan kullanıcının okumaları bu süre boyunca birincil veritabanından yapılır (saniye)
+    read_your_writes_seconds: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+    
+    # Yavaş sorgu logu eşiği (milisaniye) - 0 = kapalı
+    slow_query_threshold_ms: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    
+    # /metrics erişimi - boşsa açık, doluysa "Authorization: Bearer <token>" gerekir
+    metrics_token: str = os.getenv("METRICS_TOKEN", "")
+    
+    # Yanıt sıkıştırma (gzip, brotli kuruluysa br) - bu boyutun altındaki gövdeler sıkıştırılmaz
+    compression_min_bytes: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    
+    # SQLite üretim profili - kilit bekleme süresi (ms), mmap ve sayfa önbelleği boyutu (MB)
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    sqlite_mmap_size_mb: int = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+    sqlite_cache_size_mb: int = int(os.getenv("SQLITE_CACHE_SIZE_MB", "64"))
+    # SQLite tek yazar kuyruğu - tek transaction'da birleştirilen en fazla yazma işi
+    sqlite_write_batch_size: int = int(os.getenv("SQLITE_WRITE_BATCH_SIZE", "64"))
+    
+    @property
+    def processed_read_replica_url(self) -> str:
+        """Replika URL'si için aynı PostgreSQL düzeltmesi"""
+        if self.read_replica_url.startswith("postgres://"):
+            return self.read_replica_url.replace("postgres://", "postgresql://", 1)
+        return self.read_replica_url
+    
     # JWT ayarları
     secret_key: str = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
     algorithm: str = "HS256"
@@ -30,6 +65,34 @@ class Settings(BaseSettings):
     tmdb_api_key: str = os.getenv("TMDB_API_KEY", "")
     tmdb_base_url: str = "https://api.themoviedb.org/3"
     
+    # Kullanıcı istatistikleri önbellek süresi (saniye)
+    stats_cache_ttl_seconds: int = int(os.getenv("STATS_CACHE_TTL_SECONDS", "300"))
+    
+    # Kütüphane indeksi - bellekte tutulacak en fazla kullanıcı sayısı (LRU)
+    library_index_max_users: int = int(os.getenv("LIBRARY_INDEX_MAX_USERS", "5000"))
+    
+    # Arkadaş önerileri - batch job aralığı (dakika) ve kullanıcı başına saklanan öneri sayısı
+    friend_suggestion_interval_minutes: int = int(os.getenv("FRIEND_SUGGESTION_INTERVAL_MINUTES", "60"))
+    friend_suggestion_top_k: int = 20
+    
+    # Süre önbelleği - eksik süreleri arka planda çekme aralığı (saniye)
+    runtime_backfill_interval_seconds: int = int(os.getenv("RUNTIME_BACKFILL_INTERVAL_SECONDS", "300"))
+    
+    # Kullanıcı adı otomatik tamamlama - bellekteki önek ağacının yenilenme aralığı (saniye)
+    # ve en fazla kullanıcı sayısı (kullanıcı başına ~2KB; üstünde ağaç kurulmaz, index'li önek sorgusu kullanılır)
+    user_autocomplete_refresh_seconds: int = int(os.getenv("USER_AUTOCOMPLETE_REFRESH_SECONDS", "600"))
+    user_autocomplete_max_users: int = int(os.getenv("USER_AUTOCOMPLETE_MAX_USERS", "50000"))
+    
+    # TMDB istemcisi - yanıt önbelleği süresi (saniye) ve saniyedeki en fazla istek
+    tmdb_cache_ttl_seconds: int = int(os.getenv("TMDB_CACHE_TTL_SECONDS", "3600"))
+    tmdb_rate_limit_per_second: float = float(os.getenv("TMDB_RATE_LIMIT_PER_SECOND", "35"))
+    
+    # TVMaze/Jikan detay önbelleği - ham yanıt gövdeleri için bellek bütçesi (MB)
+    external_details_cache_mb: int = int(os.getenv("EXTERNAL_DETAILS_CACHE_MB", "64"))
+    
+    # Toplu içe aktarma (Letterboxd/IMDb CSV) - en büyük dosya boyutu (MB)
+    import_max_upload_mb: int = int(os.getenv("IMPORT_MAX_UPLOAD_MB", "20"))
+    
     # CORS ayarları - Production ve Development
     cors_origins: list = [
         "http://localhost:5173",
@@ -1,24 +1,200 @@
-from sqlalchemy import create_engine
+import time
+from typing import Optional
+
+from fastapi import Header, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from config import get_settings
+from utils.cache import TTLCache
+from utils.query_stats import record_query
 
 settings = get_settings()
 
 # Production'da processed_database_url kullan (PostgreSQL URL düzeltmesi)
 database_url = settings.processed_database_url
+read_replica_url = settings.processed_read_replica_url
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _pool_options(url: str) -> dict:
+    """Bağlantı havuzu ayarları (SQLite'ta havuz boyutu ayarlanmaz)"""
+    options = {
+        "pool_pre_ping": True,  # PostgreSQL için connection check
+        "pool_recycle": 3600,   # PostgreSQL için connection recycle
+    }
+    if not _is_sqlite(url):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+
+def _sync_connect_args(url: str) -> dict:
+    if _is_sqlite(url):
+        return {"check_same_thread": False}
+    if settings.db_statement_timeout_ms:
+        return {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return {}
+
+
+def is_file_sqlite(url: str) -> bool:
+    """Dosya tabanlı SQLite mi (bellek içi veritabanında WAL ve yazar kuyruğu anlamsız)"""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """
+    SQLite üretim profili (her bağlantıda):
+    - WAL: okuyucular yazarı, yazar okuyucuları bloklamaz
+    - synchronous=NORMAL: WAL'da güvenli, her commit'te fsync yapılmaz
+    - busy_timeout: kilit varsa hemen "database is locked" yerine bekler
+    - mmap_size / cache_size: okumalar sayfa önbelleğinden ve bellek eşlemeden yapılır
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_mb * 1024}")  # negatif değer: KiB
+    cursor.close()
+
 
 # Veritabanı motoru oluştur
 engine = create_engine(
     database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in database_url else {},
-    pool_pre_ping=True,  # PostgreSQL için connection check
-    pool_recycle=3600,   # PostgreSQL için connection recycle
+    connect_args=_sync_connect_args(database_url),
+    **_pool_options(database_url)
 )
 
-# Session factory
+# Session factory (arka plan işleri ve betikler için senkron session)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str):
+    """
+    Senkron URL'yi async sürücüye çevirir (PostgreSQL: asyncpg, SQLite: aiosqlite).
+    asyncpg sslmode parametresini tanımaz; ssl bağlantı argümanına taşınır.
+    """
+    parsed = make_url(url)
+    connect_args = {}
+    if parsed.get_backend_name() == "postgresql":
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        if settings.db_statement_timeout_ms:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed, connect_args
+
+
+def _create_async_engine(url: str):
+    async_url, connect_args = _async_database_url(url)
+    return create_async_engine(async_url, connect_args=connect_args, **_pool_options(url))
+
+
+class PrimarySession(Session):
+    """Birincil veritabanı session'ı - commit edilen yazmalar read-your-writes için kaydedilir"""
+
+
+# Async veritabanı motoru - istek handler'ları event loop'u bloklamadan sorgu yapar
+async_engine = _create_async_engine(database_url)
+
+if is_file_sqlite(database_url):
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+# Okuma replikası tanımlıysa salt okunur endpoint'ler için ayrı motor
+async_read_engine = _create_async_engine(read_replica_url) if read_replica_url else async_engine
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_query(time.perf_counter() - context._query_started_at, statement)
+
+
+def instrument_engine(sync_engine):
+    """Sorgu sayısı/süresi ölçümü: her sorgu o anki isteğin sayacına yazılır (utils/query_stats.py)"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+if async_read_engine is not async_engine:
+    instrument_engine(async_read_engine.sync_engine)
+
+# Async session factory - commit sonrası nesneler expire edilmez (async'te lazy load yapılamaz)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, sync_session_class=PrimarySession,
+    autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+) if read_replica_url else AsyncSessionLocal
+
+# Yakın zamanda yazma yapan kullanıcılar (süreç içi; replika gecikmesini kapatan pencere)
+recent_writers = TTLCache(maxsize=100000, ttl=settings.read_your_writes_seconds, name="read_your_writes")
+
+
+def _authorized_user_id(authorization: Optional[str]) -> Optional[int]:
+    """Authorization header'daki token'dan kullanıcı ID'si (geçersizse None)"""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    from routers.auth import verify_token
+    return verify_token(authorization.replace("Bearer ", ""))
+
+
+def mark_writers(db, *user_ids: int):
+    """
+    Yazmadan etkilenen diğer kullanıcıları işaretler (ör. arkadaşlığın karşı tarafı).
+    Commit sonrası onların okumaları da birincil veritabanına gider; replikadaki eski
+    veri okunup önbelleğe (stats) yazılmaz.
+    """
+    db.info.setdefault("affected_users", set()).update(int(user_id) for user_id in user_ids)
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _track_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _track_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _mark_recent_writer(session):
+    affected_users = session.info.pop("affected_users", set())
+    if session.info.pop("has_writes", False):
+        user_id = _authorized_user_id(session.info.get("authorization"))
+        for writer_id in affected_users | {user_id}:
+            if writer_id is not None:
+                recent_writers.set(writer_id, True)
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _reset_writes(session):
+    session.info.pop("has_writes", None)
+    session.info.pop("affected_users", None)
+
+
 # Base class for models
 Base = declarative_base()
 
@@ -35,10 +211,40 @@ def get_db():
         db.close()
 
 
+async def get_async_db(authorization: Optional[str] = Header(None)):
+    """
+    Async veritabanı session'ı için dependency (birincil veritabanı).
+    Route handler'lar bu session'ı kullanır; sorgular event loop'u bloklamaz.
+    """
+    async with AsyncSessionLocal() as db:
+        db.info["authorization"] = authorization
+        yield db
+
+
+async def get_read_db(request: Request, authorization: Optional[str] = Header(None)):
+    """
+    Salt okunur endpoint'ler için async session.
+    Replika tanımlıysa okuma replikasına gider. Son read_your_writes_seconds içinde yazma
+    yapan kullanıcı kendi değişikliklerini görebilsin diye birincil veritabanına yönlendirilir;
+    o kullanıcının verisini okuyan istekler de (/{user_id}/...) aynı şekilde birincile gider,
+    böylece stats gibi önbelleklere replikadan eski veri yazılmaz.
+    """
+    factory = AsyncReadSessionLocal
+    if factory is not AsyncSessionLocal:
+        target_user_id = str(request.path_params.get("user_id", ""))
+        user_ids = {_authorized_user_id(authorization), int(target_user_id) if target_user_id.isdigit() else None}
+        if any(user_id is not None and recent_writers.get(user_id) for user_id in user_ids):
+            factory = AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
 def init_db():
     """
-    Veritabanı tablolarını oluşturur.
+    Veritabanı tablolarını oluşturur ve bekleyen şema migration'larını uygular.
     Uygulama başlangıcında çağrılmalıdır.
     """
-    from models import User, Film, Friendship, ActivityLike, ActivityComment  # Import burada circular import önlemek için
+    from models import User, Film, Friendship, ActivityLike, ActivityComment, FriendSuggestion, TitleRuntime, TitleGenre, ActivityRollup  # Import burada circular import önlemek için
+    from utils.migrations import run_migrations
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
@@ -1,8 +1,13 @@
-from fastapi import FastAPI, Request
+import asyncio
+import hmac
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from config import get_settings
 from database import init_db
+from utils.metrics import registry
+from utils.middleware import CompressionMiddleware, ConditionalCacheMiddleware, RequestMetricsMiddleware, SecurityHeadersMiddleware
 
 # Router'ları import et
 from routers import auth, movies, users, social, ai, external
@@ -14,20 +19,30 @@ settings = get_settings()
 app = FastAPI(
     title="CineLog API",
     description="Film takip ve sosyal paylaşım uygulaması",
-    version="1.0.0"
+    version="1.0.0",
+    # Yanıtlar stdlib json yerine orjson ile yazılır
+    default_response_class=ORJSONResponse
 )
 
-# Security Headers Middleware
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        # Google OAuth için COOP ayarlarını gevşet
-        response.headers["Cross-Origin-Opener-Policy"] = "unsafe-none"
-        response.headers["Cross-Origin-Embedder-Policy"] = "unsafe-none"
-        return response
-    
-# Middleware'leri ekle
+# Route bazında Cache-Control: bu GET endpoint'leri ETag alır, koşullu isteklere 304 döner
+CACHE_POLICIES = {
+    "/api/movies/popular": "public, max-age=600",
+    "/api/movies/trending": "public, max-age=600",
+    "/api/movies/tmdb/{tmdb_id}": "public, max-age=3600",
+    "/api/external/tv/search": "public, max-age=300",
+    "/api/external/tv/{show_id}": "public, max-age=3600",
+    "/api/external/anime/search": "public, max-age=300",
+    "/api/external/anime/{anime_id}": "public, max-age=3600",
+    "/api/external/anime/top": "public, max-age=3600",
+    # Kullanıcı listesi her an değişebilir: önbellekte tutulur ama her seferinde doğrulanır
+    "/api/users/{user_id}/films": "no-cache",
+}
+
+# Middleware'leri ekle (son eklenen en dışta çalışır)
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(ConditionalCacheMiddleware, policies=CACHE_POLICIES)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
+app.add_middleware(RequestMetricsMiddleware)
 
 # CORS ayarları
 app.add_middleware(
@@ -54,9 +69,35 @@ async def startup_event():
     init_db()
     print("✅ Veritabanı başlatıldı")
     
+    # Aktivite özetleri boşsa mevcut filmlerden bir kez kur
+    from utils.rollups import ensure_rollups
+    await asyncio.to_thread(ensure_rollups)
+    
     # AI Recommendation Model'i eğit
     from routers.ai import startup_train_model
     await startup_train_model()
+    
+    # Arkadaş önerilerini periyodik olarak arka planda hesapla
+    from utils.friend_suggestions import friend_suggestion_loop
+    asyncio.create_task(friend_suggestion_loop())
+    
+    # Film sürelerini arka planda partiler halinde çek (istatistik isteği sırasında değil)
+    from utils.runtimes import runtime_backfill_loop
+    asyncio.create_task(runtime_backfill_loop())
+    
+    # Kullanıcı adı otomatik tamamlama ağacını arka planda kur ve yenile
+    from utils.user_search import username_trie_loop
+    asyncio.create_task(username_trie_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """SQLite yazar kuyruğunu ve async veritabanı bağlantı havuzunu kapat"""
+    from database import async_engine
+    from utils.write_queue import write_queue
+    if write_queue is not None:
+        await asyncio.to_thread(write_queue.close)
+    await async_engine.dispose()
 
 
 @app.get("/")
@@ -75,6 +116,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus metrikleri (text format 0.0.4)"""
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        if not authorization or not hmac.compare_digest(authorization, expected):
+            raise HTTPException(status_code=401, detail="Metriklere erişim yetkisi yok")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
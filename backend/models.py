@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -58,6 +58,25 @@ class Film(Base):
     # Composite index - bir kullanıcı aynı filmi birden fazla ekleyemez
     __table_args__ = (
         UniqueConstraint('user_id', 'tmdb_id', name='uq_user_film'),
+        # "Bu filmi izleyen arkadaşlar" sorgusu: tmdb_id ile filtrele, user_id ile arkadaşlara daralt
+        Index('ix_films_tmdb_user', 'tmdb_id', 'user_id'),
+        # Film listesi cursor sayfalaması ve filtreleri: (user_id, id) sırasıyla okunur
+        Index('ix_films_user_id', 'user_id', 'id'),
+        Index('ix_films_user_izlendi', 'user_id', 'izlendi', 'id'),
+        Index('ix_films_user_rating', 'user_id', 'kisisel_puan'),
+        # Sosyal akış, incelemeler ve aktivite özetleri: kullanıcının filmleri izlenme tarihine göre
+        Index('ix_films_user_watched', 'user_id', 'izlenme_tarihi'),
+        # Favori ve izleme listesi az sayıda satır içerir: kısmi index yeterli
+        Index(
+            'ix_films_user_favorite', 'user_id', 'id',
+            postgresql_where=text('is_favorite = true'),
+            sqlite_where=text('is_favorite = 1')
+        ),
+        Index(
+            'ix_films_user_watchlist', 'user_id', 'id',
+            postgresql_where=text('is_watchlist = true'),
+            sqlite_where=text('is_watchlist = 1')
+        ),
         {'sqlite_autoincrement': True},
     )
 
@@ -78,6 +97,9 @@ class Friendship(Base):
     friend = relationship("User", foreign_keys=[friend_id], back_populates="friendships_received")
     
     __table_args__ = (
+        # Arkadaş listesi/istekleri her iki yönden durumla birlikte sorgulanır
+        Index('ix_friendships_user_status', 'user_id', 'status'),
+        Index('ix_friendships_friend_status', 'friend_id', 'status'),
         {'sqlite_autoincrement': True},
     )
 
@@ -97,6 +119,8 @@ class ActivityLike(Base):
     
     __table_args__ = (
         UniqueConstraint('user_id', 'film_id', name='uq_user_film_like'),
+        # Aktivitenin beğenileri: film_id ile filtrele, created_at ile sırala
+        Index('ix_activity_likes_film', 'film_id', 'created_at'),
         {'sqlite_autoincrement': True},
     )
 
@@ -116,5 +140,80 @@ class ActivityComment(Base):
     film = relationship("Film")
     
     __table_args__ = (
+        Index('ix_activity_comments_film_created', 'film_id', 'created_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class FriendSuggestion(Base):
+    """Arkadaş önerisi tablosu - Periyodik batch job ile önceden hesaplanan ikinci derece bağlantılar"""
+    __tablename__ = "friend_suggestions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Öneriyi görecek kullanıcı
+    suggested_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Önerilen kullanıcı
+    mutual_friends = Column(Integer, nullable=False, default=0)  # Ortak arkadaş sayısı
+    library_overlap = Column(Float, nullable=False, default=0.0)  # Kütüphane benzerliği (Jaccard, 0-1)
+    score = Column(Float, nullable=False, default=0.0)  # Sıralama skoru
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    
+    # İlişkiler
+    suggested_user = relationship("User", foreign_keys=[suggested_user_id])
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'suggested_user_id', name='uq_user_suggestion'),
+        # İstek yolu: WHERE user_id = ? ORDER BY score DESC
+        Index('ix_friend_suggestions_user_score', 'user_id', 'score'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class TitleRuntime(Base):
+    """Süre önbelleği - TMDB/TVMaze/Jikan'dan yapım başına bir kez çekilen toplam süreler"""
+    __tablename__ = "title_runtimes"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, nullable=False)  # tmdb, tvmaze, jikan
+    external_id = Column(Integer, nullable=False)  # Kaynaktaki ID (TMDB ID, TVMaze show ID, MAL ID)
+    runtime_minutes = Column(Integer, nullable=True)  # Toplam süre (dizi/anime için tüm bölümler); bilinmiyorsa NULL
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('source', 'external_id', name='uq_title_runtime'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class TitleGenre(Base):
+    """Tür önbelleği - Süre önbelleği ile aynı yanıttan gelen yapım türleri"""
+    __tablename__ = "title_genres"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, nullable=False)  # tmdb, tvmaze, jikan
+    external_id = Column(Integer, nullable=False)
+    genre = Column(String, nullable=False)  # Tür adı (TMDB için tr-TR)
+    
+    __table_args__ = (
+        UniqueConstraint('source', 'external_id', 'genre', name='uq_title_genre'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class ActivityRollup(Base):
+    """Aktivite özeti tablosu - Kullanıcı başına günlük/aylık izleme ve puan toplamları"""
+    __tablename__ = "activity_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    granularity = Column(String, nullable=False)  # day, month
+    period = Column(String, nullable=False)  # 2025-01-31 (day) veya 2025-01 (month)
+    genre = Column(String, nullable=False, default="")  # "" = tüm türler
+    watch_count = Column(Integer, nullable=False, default=0)  # İzlenen film sayısı
+    rating_sum = Column(Float, nullable=False, default=0.0)  # Puanların toplamı
+    rating_count = Column(Integer, nullable=False, default=0)  # Puan verilmiş film sayısı
+    
+    __table_args__ = (
+        # Zaman çizelgesi okuması: WHERE user_id = ? AND granularity = ? AND genre = ? ORDER BY period
+        UniqueConstraint('user_id', 'granularity', 'genre', 'period', name='uq_user_rollup'),
         {'sqlite_autoincrement': True},
     )
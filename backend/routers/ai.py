@@ -3,18 +3,20 @@ AI Recommendation Router
 Content-Based Filtering using TF-IDF and Cosine Similarity
 """
 from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import pandas as pd
 import numpy as np
+import time
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity, linear_kernel
 
-from database import get_db
+from database import get_async_db
 from models import Film, User
 from schemas import FilmResponse
-import httpx
 from config import get_settings
+from utils.upstream import upstream_client
 
 router = APIRouter()
 settings = get_settings()
@@ -24,9 +26,10 @@ tfidf_matrix = None
 tfidf_vectorizer = None
 movie_indices = {}
 movie_data = []
+model_trained_at: Optional[float] = None  # time.time(); /metrics model yaşını buradan hesaplar
 
 
-async def get_current_user_id(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> int:
+async def get_current_user_id(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)) -> int:
     """Authorization header'dan token'ı alır ve kullanıcı ID'sini döndürür"""
     from routers.auth import verify_token
     
@@ -50,7 +53,7 @@ async def fetch_tmdb_movies_for_training(limit: int = 100):
     """
     TMDB API'den popüler filmleri çeker ve training için hazırlar
     """
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         try:
             # Popüler filmleri al (5 sayfa = ~100 film)
             all_movies = []
@@ -73,7 +76,7 @@ def train_recommendation_model(movies_data: list):
     """
     TF-IDF ve Cosine Similarity kullanarak recommendation modelini eğitir
     """
-    global tfidf_matrix, tfidf_vectorizer, movie_indices, movie_data
+    global tfidf_matrix, tfidf_vectorizer, movie_indices, movie_data, model_trained_at
     
     if not movies_data:
         print("⚠️ No movie data for training")
@@ -122,6 +125,7 @@ def train_recommendation_model(movies_data: list):
     # Film indekslerini sakla (tmdb_id -> dataframe index mapping)
     movie_indices = {int(row['id']): idx for idx, row in df.iterrows()}
     movie_data = movies_data
+    model_trained_at = time.time()
     
     print(f"✅ AI Recommendation Model trained with {len(movies_data)} movies")
     print(f"   TF-IDF Matrix shape: {tfidf_matrix.shape}")
@@ -141,7 +145,7 @@ async def startup_train_model():
 async def get_movie_recommendations(
     movie_id: int,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -190,7 +194,7 @@ async def get_movie_recommendations(
 @router.get("/recommendations/user/personalized", response_model=List[dict])
 async def get_personalized_recommendations(
     limit: int = 20,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -206,11 +210,11 @@ async def get_personalized_recommendations(
         )
     
     # Kullanıcının izlediği ve beğendiği filmleri al (kisisel_puan >= 7)
-    user_films = db.query(Film).filter(
+    user_films = (await db.execute(select(Film.tmdb_id, Film.kisisel_puan).where(
         Film.user_id == user_id,
         Film.izlendi == True,
         Film.kisisel_puan >= 7.0
-    ).order_by(Film.kisisel_puan.desc()).limit(10).all()
+    ).order_by(Film.kisisel_puan.desc()).limit(10))).all()
     
     if not user_films:
         # Kullanıcının filmi yoksa, popüler filmleri öner
@@ -273,7 +277,7 @@ async def get_personalized_recommendations(
 
 @router.post("/retrain")
 async def retrain_model(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
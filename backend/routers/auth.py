@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from datetime import datetime, timedelta
@@ -8,7 +9,7 @@ from typing import Optional
 import httpx
 import re
 
-from database import get_db
+from database import get_async_db
 from models import User
 from schemas import (
     GoogleAuthRequest, 
@@ -21,6 +22,7 @@ from schemas import (
 )
 from config import get_settings
 from utils.security import hash_password, verify_password, validate_password_strength
+from utils.user_search import username_trie
 
 router = APIRouter()
 settings = get_settings()
@@ -43,16 +45,17 @@ def verify_token(token: str):
     """JWT token doğrular"""
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         if user_id is None:
             return None
-        return user_id
-    except JWTError:
+        # asyncpg parametre tiplerinde katıdır; "sub" string olarak saklanır
+        return int(user_id)
+    except (JWTError, ValueError):
         return None
 
 
 @router.post("/google", response_model=Token)
-async def google_login(auth_data: GoogleAuthRequest, db: Session = Depends(get_db)):
+async def google_login(auth_data: GoogleAuthRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Google OAuth ile giriş yapar.
     Google'dan gelen ID token'ı doğrular ve kullanıcıyı sisteme kaydeder/giriş yapar.
@@ -72,7 +75,7 @@ async def google_login(auth_data: GoogleAuthRequest, db: Session = Depends(get_d
         picture = idinfo.get('picture', None)
         
         # Kullanıcıyı veritabanında ara
-        user = db.query(User).filter(User.google_id == google_id).first()
+        user = await db.scalar(select(User).where(User.google_id == google_id))
         
         if not user:
             # Benzersiz username oluştur
@@ -83,7 +86,7 @@ async def google_login(auth_data: GoogleAuthRequest, db: Session = Depends(get_d
             # Eğer username zaten varsa sonuna sayı ekle
             username = base_username
             counter = 1
-            while db.query(User).filter(User.username == username).first():
+            while await db.scalar(select(User.id).where(User.username == username)):
                 username = f"{base_username}{counter}"
                 counter += 1
             
@@ -95,8 +98,8 @@ async def google_login(auth_data: GoogleAuthRequest, db: Session = Depends(get_d
                 picture=picture
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            username_trie.add(user.id, user.username, user.picture)
         
         # JWT token oluştur
         access_token = create_access_token(
@@ -127,7 +130,7 @@ async def google_login(auth_data: GoogleAuthRequest, db: Session = Depends(get_d
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mevcut kullanıcının bilgilerini döndürür.
@@ -154,7 +157,7 @@ async def get_current_user(
             detail="Geçersiz veya süresi dolmuş token"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -177,7 +180,7 @@ async def logout():
 @router.post("/register", response_model=AuthResponse)
 async def register(
     register_data: RegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Yeni kullanıcı kaydı oluşturur.
@@ -193,7 +196,7 @@ async def register(
         )
     
     # Username müsaitlik kontrolü
-    existing_username = db.query(User).filter(User.username == username).first()
+    existing_username = await db.scalar(select(User.id).where(User.username == username))
     if existing_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -201,7 +204,7 @@ async def register(
         )
     
     # Email müsaitlik kontrolü
-    existing_email = db.query(User).filter(User.email == register_data.email).first()
+    existing_email = await db.scalar(select(User.id).where(User.email == register_data.email))
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -228,8 +231,8 @@ async def register(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    username_trie.add(new_user.id, new_user.username, new_user.picture)
     
     # JWT token oluştur
     access_token = create_access_token(
@@ -246,16 +249,16 @@ async def register(
 @router.post("/login", response_model=AuthResponse)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Kullanıcı adı ve şifre ile giriş yapar.
     """
     # Kullanıcıyı bul (username veya email ile)
-    user = db.query(User).filter(
+    user = await db.scalar(select(User).where(
         (User.username == login_data.username.lower()) | 
         (User.email == login_data.username.lower())
-    ).first()
+    ))
     
     if not user:
         raise HTTPException(
@@ -291,7 +294,7 @@ async def login(
 @router.get("/check-username/{username}", response_model=UsernameCheckResponse)
 async def check_username(
     username: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Kullanıcı adı müsaitlik kontrolü (real-time).
@@ -320,7 +323,7 @@ async def check_username(
         }
     
     # Veritabanında kontrol
-    existing = db.query(User).filter(User.username == username).first()
+    existing = await db.scalar(select(User.id).where(User.username == username))
     
     if existing:
         return {
@@ -337,12 +340,12 @@ async def check_username(
 @router.get("/check-email/{email}")
 async def check_email(
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Email müsaitlik kontrolü.
     """
-    existing = db.query(User).filter(User.email == email.lower()).first()
+    existing = await db.scalar(select(User.id).where(User.email == email.lower()))
     
     if existing:
         return {
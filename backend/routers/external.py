@@ -3,11 +3,42 @@ External APIs Router
 Integration with TVMaze (TV Shows) and Jikan (Anime) public APIs
 """
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from typing import Optional
 import httpx
+import orjson
+
+from config import get_settings
+from utils.cache import TTLCache
+from utils.projection import parse_episode_selection, parse_field_paths, project_fields, select_episodes
+from utils.upstream import raw_json_response, upstream_client, upstream_json
 
 router = APIRouter()
 
+settings = get_settings()
+
+# Detail payloads are cached once as raw bytes under a memory budget;
+# projections parse them per request
+details_cache = TTLCache(
+    maxsize=256,
+    ttl=3600,
+    name="external_details",
+    maxbytes=settings.external_details_cache_mb * 1024 * 1024
+)
+
+
+def _projected_response(content: bytes, fields: Optional[str], episodes: Optional[str] = None):
+    """Returns the cached bytes untouched, or a new projected dict when fields/episodes are given"""
+    try:
+        paths = parse_field_paths(fields)
+        selection = parse_episode_selection(episodes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if paths is None and selection is None:
+        return raw_json_response(content)
+    return ORJSONResponse(project_fields(select_episodes(orjson.loads(content), selection), paths))
+
 
 @router.get("/tv/search")
 async def search_tv_shows(query: str = Query(..., min_length=1, description="TV show name to search")):
@@ -27,7 +58,7 @@ async def search_tv_shows(query: str = Query(..., min_length=1, description="TV
         raise HTTPException(status_code=400, detail="Query parameter cannot be empty")
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with upstream_client(timeout=10.0) as client:
             response = await client.get(
                 "https://api.tvmaze.com/search/shows",
                 params={"q": query}
@@ -42,7 +73,7 @@ async def search_tv_shows(query: str = Query(..., min_length=1, description="TV
                     detail=f"TVMaze API error: {response.text}"
                 )
             
-            return response.json()
+            return raw_json_response(response.content)
             
     except httpx.TimeoutException:
         raise HTTPException(
@@ -62,22 +93,40 @@ async def search_tv_shows(query: str = Query(..., min_length=1, description="TV
 
 
 @router.get("/tv/{show_id}")
-async def get_tv_show_details(show_id: int):
+async def get_tv_show_details(
+    show_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated field paths, e.g. id,name,image,_embedded.cast"),
+    episodes: Optional[str] = Query(None, description="Episode subset: season:N or latest:K")
+):
     """
     Get detailed information about a specific TV show from TVMaze
     Includes embedded cast and episodes information
     
+    The full upstream payload is cached; fields/episodes trim the response
+    server-side without touching the cached copy.
+    
     Args:
         show_id: TVMaze show ID
+        fields: Only return these (dotted) field paths
+        episodes: season:N for a single season, latest:K for the last K aired episodes
         
     Returns:
         Detailed TV show information with cast and episodes
         
     Example:
         GET /api/external/tv/169
+        GET /api/external/tv/169?fields=id,name,image,_embedded.episodes&episodes=latest:5
     """
+    content = details_cache.get(("tvmaze", show_id))
+    if content is None:
+        content = await _fetch_tv_show(show_id)
+        details_cache.set(("tvmaze", show_id), content)
+    return _projected_response(content, fields, episodes)
+
+
+async def _fetch_tv_show(show_id: int) -> bytes:
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with upstream_client(timeout=15.0) as client:
             # Request with embedded cast and episodes
             response = await client.get(
                 f"https://api.tvmaze.com/shows/{show_id}",
@@ -93,7 +142,7 @@ async def get_tv_show_details(show_id: int):
                     detail=f"TVMaze API error: {response.text}"
                 )
             
-            return response.json()
+            return response.content
             
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="TVMaze API request timeout")
@@ -127,7 +176,7 @@ async def search_anime(
         raise HTTPException(status_code=400, detail="Query parameter cannot be empty")
     
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with upstream_client(timeout=15.0) as client:
             response = await client.get(
                 "https://api.jikan.moe/v4/anime",
                 params={
@@ -152,10 +201,10 @@ async def search_anime(
                     detail=f"Jikan API error: {response.text}"
                 )
             
-            result = response.json()
+            result = upstream_json(response)
             
             # Return only the data field as specified
-            return result.get("data", [])
+            return ORJSONResponse(result.get("data", []))
             
     except httpx.TimeoutException:
         raise HTTPException(
@@ -177,21 +226,36 @@ async def search_anime(
 
 
 @router.get("/anime/{anime_id}")
-async def get_anime_details(anime_id: int):
+async def get_anime_details(
+    anime_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated field paths, e.g. mal_id,title,images.jpg")
+):
     """
     Get detailed information about a specific anime from Jikan/MyAnimeList
     
+    The upstream payload is cached; fields trims the response server-side.
+    
     Args:
         anime_id: MyAnimeList anime ID
+        fields: Only return these (dotted) field paths
         
     Returns:
         Detailed anime information
         
     Example:
         GET /api/external/anime/1
+        GET /api/external/anime/1?fields=mal_id,title,score,images.jpg
     """
+    content = details_cache.get(("jikan", anime_id))
+    if content is None:
+        content = await _fetch_anime(anime_id)
+        details_cache.set(("jikan", anime_id), content)
+    return _projected_response(content, fields)
+
+
+async def _fetch_anime(anime_id: int) -> bytes:
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with upstream_client(timeout=15.0) as client:
             response = await client.get(f"https://api.jikan.moe/v4/anime/{anime_id}")
             
             if response.status_code == 404:
@@ -209,10 +273,10 @@ async def get_anime_details(anime_id: int):
                     detail=f"Jikan API error: {response.text}"
                 )
             
-            result = response.json()
+            result = upstream_json(response)
             
-            # Return the data field
-            return result.get("data", {})
+            # Keep only the data field
+            return orjson.dumps(result.get("data", {}))
             
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Jikan API request timeout")
@@ -243,7 +307,7 @@ async def get_top_anime(
         GET /api/external/anime/top?limit=10&filter_type=tv
     """
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with upstream_client(timeout=15.0) as client:
             params = {"limit": limit}
             if filter_type:
                 params["filter"] = filter_type
@@ -265,8 +329,8 @@ async def get_top_anime(
                     detail=f"Jikan API error: {response.text}"
                 )
             
-            result = response.json()
-            return result.get("data", [])
+            result = upstream_json(response)
+            return ORJSONResponse(result.get("data", []))
             
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Jikan API request timeout")
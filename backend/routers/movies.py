@@ -1,19 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, status, Header, Query, UploadFile
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import delete, func, select, union
 from typing import List, Optional
 import httpx
 import random
+from datetime import datetime
 
-from database import get_db
-from models import User, Film
-from schemas import FilmCreate, FilmResponse, FilmUpdate, TMDBMovieSearch, MovieRecommendation
+from database import get_async_db, get_read_db
+from models import ActivityComment, ActivityLike, User, Film, Friendship
+from schemas import FilmCreate, FilmResponse, FilmUpdate, FilmListItem, FilmBatchRequest, FilmBatchResponse, ImportJobResponse, TMDBMovieSearch, MovieRecommendation, FriendsWatched
 from config import get_settings
+from utils.library_index import library_index
+from utils.stats import invalidate_user_stats
+from utils.runtimes import enqueue_runtime
+from utils.rollups import ROLLUP_FIELDS, refresh_rollup_buckets
+from utils.film_batch import apply_film_batch
+from utils.film_list import MAX_PAGE_SIZE, parse_fields, query_film_list
+from utils.upsert import dialect_insert
+from utils.tmdb import tmdb_get
+from utils.upstream import upstream_client, upstream_json
+from utils.library_import import create_job, discard_job, get_job, run_import_job, spool_upload
 
 router = APIRouter()
 settings = get_settings()
 
+TMDB_SEARCH_FIELDS = tuple(TMDBMovieSearch.model_fields)
 
-async def get_current_user_id(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> int:
+# Rastgele öneride denenecek en fazla kaynak film
+RECOMMENDATION_ATTEMPTS = 3
+
+
+async def get_current_user_id(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)) -> int:
     """Authorization header'dan token'ı alır ve kullanıcı ID'sini döndürür"""
     from routers.auth import verify_token
     
@@ -33,6 +52,24 @@ async def get_current_user_id(authorization: Optional[str] = Header(None), db: S
     return user_id
 
 
+async def _sync_rollups(db: AsyncSession, user_id: int, watched_at):
+    """Film değişikliğini aynı transaction içinde aktivite özetlerine yansıtır"""
+    await db.flush()
+    await db.run_sync(refresh_rollup_buckets, user_id, [watched_at])
+
+
+def _tmdb_search_results(response) -> ORJSONResponse:
+    """
+    TMDB liste yanıtındaki sonuçları TMDBMovieSearch alanlarına indirger.
+    Her öğe pydantic ile doğrulanmak yerine sözlük olarak seçilip doğrudan orjson ile yazılır.
+    """
+    results = upstream_json(response).get("results", [])
+    return ORJSONResponse([
+        {field: item.get(field) for field in TMDB_SEARCH_FIELDS}
+        for item in results
+    ])
+
+
 @router.get("/search", response_model=List[TMDBMovieSearch])
 async def search_movies(query: str, page: int = 1):
     """
@@ -44,7 +81,7 @@ async def search_movies(query: str, page: int = 1):
             detail="TMDB API anahtarı yapılandırılmamış"
         )
     
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         response = await client.get(
             f"{settings.tmdb_base_url}/search/movie",
             params={
@@ -61,8 +98,7 @@ async def search_movies(query: str, page: int = 1):
                 detail="TMDB API'den film aranamadı"
             )
         
-        data = response.json()
-        return data.get("results", [])
+        return _tmdb_search_results(response)
 
 
 @router.get("/popular", response_model=List[TMDBMovieSearch])
@@ -76,7 +112,7 @@ async def get_popular_movies(page: int = 1):
             detail="TMDB API anahtarı yapılandırılmamış"
         )
     
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         response = await client.get(
             f"{settings.tmdb_base_url}/movie/popular",
             params={
@@ -92,8 +128,7 @@ async def get_popular_movies(page: int = 1):
                 detail="TMDB API'den popüler filmler alınamadı"
             )
         
-        data = response.json()
-        return data.get("results", [])
+        return _tmdb_search_results(response)
 
 
 @router.get("/trending", response_model=List[TMDBMovieSearch])
@@ -107,7 +142,7 @@ async def get_trending_movies():
             detail="TMDB API anahtarı yapılandırılmamış"
         )
     
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         response = await client.get(
             f"{settings.tmdb_base_url}/trending/movie/week",
             params={
@@ -122,45 +157,105 @@ async def get_trending_movies():
                 detail="TMDB API'den trend filmler alınamadı"
             )
         
-        data = response.json()
-        return data.get("results", [])
+        return _tmdb_search_results(response)
 
 
 @router.get("/tmdb/{tmdb_id}/reviews")
-async def get_movie_reviews(tmdb_id: int, db: Session = Depends(get_db)):
+async def get_movie_reviews(
+    tmdb_id: int,
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Belirli bir film için tüm kullanıcı incelemelerini getirir.
     TMDB ID'sine göre filmleri bulur ve kisisel_yorum alanı dolu olanları döndürür.
+    Kullanıcı bilgileri aynı sorguda (joinedload) yüklenir, sonuçlar limit/offset ile sayfalanır.
     """
-    # Bu TMDB ID'sine sahip tüm kullanıcı filmlerini bul (yorum yazılmış olanlar)
-    films_with_reviews = db.query(Film).filter(
+    # Bu TMDB ID'sine sahip kullanıcı filmlerini bul (yorum yazılmış olanlar)
+    films_with_reviews = (await db.scalars(select(Film).options(
+        joinedload(Film.user)
+    ).where(
         Film.tmdb_id == tmdb_id,
         Film.kisisel_yorum.isnot(None),
         Film.kisisel_yorum != ""
-    ).order_by(Film.izlenme_tarihi.desc()).all()
-    
-    # Her film için kullanıcı bilgisini ekle
-    reviews = []
-    for film in films_with_reviews:
-        user = db.query(User).filter(User.id == film.user_id).first()
-        if user:
-            reviews.append({
-                "id": film.id,
-                "user_id": film.user_id,
-                "tmdb_id": film.tmdb_id,
-                "title": film.title,
-                "kisisel_puan": film.kisisel_puan,
-                "kisisel_yorum": film.kisisel_yorum,
-                "izlenme_tarihi": film.izlenme_tarihi,
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email,
-                    "picture": user.picture
-                }
-            })
-    
-    return reviews
+    ).order_by(Film.izlenme_tarihi.desc(), Film.id.desc()).offset(offset).limit(limit))).all()
+    
+    return [
+        {
+            "id": film.id,
+            "user_id": film.user_id,
+            "tmdb_id": film.tmdb_id,
+            "title": film.title,
+            "kisisel_puan": film.kisisel_puan,
+            "kisisel_yorum": film.kisisel_yorum,
+            "izlenme_tarihi": film.izlenme_tarihi,
+            "user": {
+                "id": film.user.id,
+                "username": film.user.username,
+                "email": film.user.email,
+                "picture": film.user.picture
+            }
+        }
+        for film in films_with_reviews
+        if film.user
+    ]
+
+
+@router.get("/tmdb/{tmdb_id}/friends", response_model=FriendsWatched)
+async def get_friends_who_watched(
+    tmdb_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Bu filmi izlemiş arkadaşları, puanlarını ve arkadaş ortalamasını döndürür.
+    Tek sorgu: (tmdb_id, user_id) index'i üzerinden kabul edilmiş arkadaşlıklara daraltılır.
+    """
+    friend_ids = union(
+        select(Friendship.friend_id).where(
+            Friendship.user_id == user_id,
+            Friendship.status == "accepted"
+        ),
+        select(Friendship.user_id).where(
+            Friendship.friend_id == user_id,
+            Friendship.status == "accepted"
+        )
+    )
+    
+    rows = (await db.execute(select(
+        Film.id,
+        Film.user_id,
+        User.username,
+        User.picture,
+        Film.kisisel_puan,
+        Film.izlenme_tarihi
+    ).join(User, User.id == Film.user_id).where(
+        Film.tmdb_id == tmdb_id,
+        Film.izlendi == True,
+        Film.user_id.in_(friend_ids)
+    ).order_by(Film.izlenme_tarihi.desc()))).all()
+    
+    ratings = [row.kisisel_puan for row in rows if row.kisisel_puan is not None]
+    average_rating = round(sum(ratings) / len(ratings), 2) if ratings else None
+    
+    return {
+        "tmdb_id": tmdb_id,
+        "friend_count": len(rows),
+        "rated_count": len(ratings),
+        "average_rating": average_rating,
+        "friends": [
+            {
+                "film_id": row.id,
+                "user_id": row.user_id,
+                "username": row.username,
+                "picture": row.picture,
+                "kisisel_puan": row.kisisel_puan,
+                "izlenme_tarihi": row.izlenme_tarihi
+            }
+            for row in rows
+        ]
+    }
 
 
 @router.get("/tmdb/{tmdb_id}")
@@ -175,7 +270,7 @@ async def get_movie_details(tmdb_id: int):
             detail="TMDB API anahtarı yapılandırılmamış"
         )
     
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         # Film detaylarını al
         movie_response = await client.get(
             f"{settings.tmdb_base_url}/movie/{tmdb_id}",
@@ -197,7 +292,7 @@ async def get_movie_details(tmdb_id: int):
                 detail="TMDB API'den film bilgisi alınamadı"
             )
         
-        movie_data = movie_response.json()
+        movie_data = upstream_json(movie_response)
         
         # Credits (oyuncular ve ekip) bilgisini al
         credits_response = await client.get(
@@ -218,7 +313,7 @@ async def get_movie_details(tmdb_id: int):
         
         # Credits verilerini ekle
         if credits_response.status_code == 200:
-            credits_data = credits_response.json()
+            credits_data = upstream_json(credits_response)
             movie_data["cast"] = credits_data.get("cast", [])[:10]  # İlk 10 oyuncu
             movie_data["crew"] = credits_data.get("crew", [])
             
@@ -228,7 +323,7 @@ async def get_movie_details(tmdb_id: int):
         
         # Watch providers verilerini ekle (Türkiye için)
         if providers_response.status_code == 200:
-            providers_data = providers_response.json()
+            providers_data = upstream_json(providers_response)
             tr_providers = providers_data.get("results", {}).get("TR", {})
             movie_data["watch_providers"] = {
                 "flatrate": tr_providers.get("flatrate", []),  # Netflix, Disney+ vb.
@@ -238,132 +333,225 @@ async def get_movie_details(tmdb_id: int):
         else:
             movie_data["watch_providers"] = {"flatrate": [], "buy": [], "rent": []}
         
-        return movie_data
+        # Büyük crew listesi jsonable_encoder'dan geçmeden doğrudan orjson ile yazılır
+        return ORJSONResponse(movie_data)
 
 
 @router.post("/add", response_model=FilmResponse)
 async def add_film_to_list(
     film_data: FilmCreate,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Kullanıcının listesine film ekler veya varsa günceller (upsert).
+    Tek bir INSERT ... ON CONFLICT DO UPDATE ... RETURNING ifadesiyle yapılır;
+    eşzamanlı eklemeler yarış durumuna (uq_user_film hatası) düşmez.
     """
-    # Kullanıcı bu filmi daha önce eklediyse güncelle
-    existing_film = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.tmdb_id == film_data.tmdb_id
-    ).first()
-    
-    if existing_film:
-        # Mevcut filmi güncelle
-        update_data = film_data.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            if value is not None:  # None değerleri atlama
-                setattr(existing_film, key, value)
-        db.commit()
-        db.refresh(existing_film)
-        return existing_film
-    
-    # Yeni film ekle
-    new_film = Film(
-        user_id=user_id,
-        tmdb_id=film_data.tmdb_id,
-        title=film_data.title,
-        poster_path=film_data.poster_path,
-        release_date=film_data.release_date,
-        overview=film_data.overview,
-        kisisel_puan=film_data.kisisel_puan,
-        kisisel_yorum=film_data.kisisel_yorum,
-        izlendi=film_data.izlendi,
-        is_favorite=film_data.is_favorite,
-        is_watchlist=film_data.is_watchlist
-    )
+    user_id = int(user_id)
+    insert_values = film_data.model_dump()
+    insert_values.update(user_id=user_id, izlenme_tarihi=datetime.utcnow())
+    
+    # Mevcut film için sadece gönderilen ve None olmayan alanlar güncellenir
+    sent_fields = set(film_data.model_dump(exclude_unset=True, exclude_none=True)) - {"tmdb_id"}
+    
+    statement = dialect_insert(db, Film).values(**insert_values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "tmdb_id"],
+        set_={key: statement.excluded[key] for key in sent_fields}
+    ).returning(Film)
+    film = (await db.scalars(statement)).one()
+    
+    # RETURNING satırı yanıt için yeterli; commit sonrası refresh sorgusu gerekmez
+    response = FilmResponse.model_validate(film)
+    
+    # İzlenmemiş filmler özetlerde yer almaz; izlendi kaldırıldıysa ay yine tazelenir.
+    # Özetler kullanıcı kilidi altında upsert edilir: aynı ayı yazan eşzamanlı eklemeler çakışmaz
+    if film.izlendi or "izlendi" in sent_fields:
+        await db.run_sync(refresh_rollup_buckets, user_id, [film.izlenme_tarihi])
+    await db.commit()
+    library_index.add(user_id, response.tmdb_id)
+    invalidate_user_stats(user_id)
+    enqueue_runtime("tmdb", response.tmdb_id)
+    
+    return response
+
+
+@router.post("/import", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_library(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    source: str = Query("auto", pattern="^(auto|letterboxd|imdb)$"),
+    watchlist: bool = Query(False, description="Dosya izleme listesi dışa aktarımı ise true"),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    Letterboxd veya IMDb CSV dışa aktarımını arka planda içe aktarır.
+    İlerleme GET /import/{job_id} ile takip edilir.
+    """
+    job = create_job(user_id, source, watchlist)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Devam eden bir içe aktarma işleminiz var"
+        )
     
-    db.add(new_film)
-    db.commit()
-    db.refresh(new_film)
+    try:
+        path = await spool_upload(file, settings.import_max_upload_mb * 1024 * 1024)
+    except ValueError:
+        discard_job(job.id)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Dosya en fazla {settings.import_max_upload_mb} MB olabilir"
+        )
     
-    return new_film
+    background_tasks.add_task(run_import_job, job, path)
+    return job.to_dict()
 
 
-@router.get("/my-list", response_model=List[FilmResponse])
+@router.get("/import/{job_id}", response_model=ImportJobResponse)
+async def get_import_status(
+    job_id: str,
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    İçe aktarma işinin ilerlemesini döndürür.
+    """
+    job = get_job(job_id)
+    if not job or job.user_id != int(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="İçe aktarma işi bulunamadı"
+        )
+    return job.to_dict()
+
+
+@router.get("/my-list", response_model=List[FilmListItem], response_model_exclude_unset=True)
 async def get_my_films(
+    cursor: Optional[int] = Query(None, description="Önceki sayfanın X-Next-Cursor değeri"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    izlendi: Optional[bool] = None,
+    is_favorite: Optional[bool] = None,
+    is_watchlist: Optional[bool] = None,
+    min_rating: Optional[float] = Query(None, ge=0, le=10),
+    max_rating: Optional[float] = Query(None, ge=0, le=10),
+    fields: Optional[str] = Query(None, description="Virgülle ayrılmış alanlar, örn: id,title,poster_path"),
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Kullanıcının film listesini getirir.
+    limit verilirse cursor ile sayfalanır; sonraki sayfa varsa X-Next-Cursor header'ı döner.
     """
-    films = db.query(Film).filter(Film.user_id == user_id).all()
-    return films
+    try:
+        selected_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    films, next_cursor = await db.run_sync(
+        query_film_list, user_id, selected_fields,
+        cursor, limit, izlendi, is_favorite, is_watchlist, min_rating, max_rating
+    )
+    # Satırlar zaten şemadaki tiplerde: response_model doğrulaması atlanıp orjson ile yazılır
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return ORJSONResponse(films, headers=headers)
 
 
 @router.get("/recommend/random", response_model=MovieRecommendation)
 async def get_random_recommendation(
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Kullanıcının listesinden rastgele bir film seçer ve TMDB'den benzer film önerir.
+    Kaynak film index'li rastgele OFFSET sorgusuyla seçilir (tüm liste yüklenmez);
+    kullanıcının listesinde zaten olan filmler önerilmez.
     """
-    # Kullanıcının filmlerini al
-    user_films = db.query(Film).filter(Film.user_id == user_id).all()
+    film_count = await db.scalar(select(func.count(Film.id)).where(Film.user_id == user_id))
     
-    if not user_films:
+    if not film_count:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Listenizde film yok. Önce film ekleyin."
         )
     
-    # Rastgele bir film seç
-    source_film = random.choice(user_films)
-    
-    # TMDB'den benzer filmleri al
     if not settings.tmdb_api_key:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="TMDB API anahtarı yapılandırılmamış"
         )
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{settings.tmdb_base_url}/movie/{source_film.tmdb_id}/similar",
-            params={
-                "api_key": settings.tmdb_api_key,
-                "language": "tr-TR",
-                "page": 1
-            }
-        )
+    owned = set(await db.run_sync(library_index.get, user_id))
+    
+    # Benzerlerinin hepsi listede olan bir kaynak filmde birkaç kez daha dene
+    for _ in range(min(RECOMMENDATION_ATTEMPTS, film_count)):
+        source_film = (await db.execute(select(
+            Film.tmdb_id, Film.title, Film.poster_path, Film.release_date, Film.overview
+        ).where(
+            Film.user_id == user_id
+        ).order_by(Film.id).offset(random.randrange(film_count)).limit(1))).first()
+        if source_film is None:
+            continue
         
-        if response.status_code != 200:
+        try:
+            # Benzer filmler sayfası TMDB önbelleğinde tutulur
+            data = await tmdb_get(f"/movie/{source_film.tmdb_id}/similar", {"page": 1})
+        except httpx.HTTPError:
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="TMDB API yanıt vermedi"
             )
-    
-    data = response.json()
-    results = data.get("results", [])
-    
-    if not results:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Benzer film bulunamadı"
+        
+        recommendation = next(
+            (movie for movie in (data or {}).get("results", []) if movie.get("id") not in owned),
+            None
         )
+        if recommendation:
+            return MovieRecommendation(
+                source_film=TMDBMovieSearch(
+                    id=source_film.tmdb_id,
+                    title=source_film.title,
+                    poster_path=source_film.poster_path,
+                    release_date=source_film.release_date,
+                    overview=source_film.overview
+                ),
+                recommended_film=TMDBMovieSearch(**recommendation)
+            )
     
-    # İlk sonucu öneri olarak döndür
-    recommendation = results[0]
-    
-    return MovieRecommendation(
-        source_film_id=source_film.id,
-        source_film_title=source_film.title,
-        recommended_tmdb_id=recommendation.get("id"),
-        recommended_title=recommendation.get("title"),
-        overview=recommendation.get("overview"),
-        poster_path=recommendation.get("poster_path"),
-        release_date=recommendation.get("release_date")
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Benzer film bulunamadı"
+    )
+
+
+@router.post("/batch", response_model=FilmBatchResponse)
+async def batch_update_films(
+    batch: FilmBatchRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Çoklu seçim işlemleri: birden fazla filmi tek istekte günceller ve/veya siler.
+    Tüm değişiklikler tek transaction'da uygulanır; her öğe için sonuç döner.
+    """
+    results, deleted_tmdb_ids = await db.run_sync(
+        apply_film_batch,
+        user_id,
+        [item.model_dump(exclude_unset=True) for item in batch.updates],
+        batch.deletes
     )
+    await db.commit()
+    
+    # Önbellekler işlem başına bir kez temizlenir
+    invalidate_user_stats(user_id)
+    if deleted_tmdb_ids:
+        library_index.invalidate(user_id)
+    
+    return {
+        "results": results,
+        "updated": sum(1 for result in results if result["action"] == "update" and result["status"] == "ok"),
+        "deleted": len(deleted_tmdb_ids)
+    }
 
 
 @router.put("/{film_id}", response_model=FilmResponse)
@@ -371,12 +559,12 @@ async def update_film(
     film_id: int,
     film_data: FilmUpdate,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Kullanıcının listesindeki bir filmi günceller.
     """
-    film = db.query(Film).filter(Film.id == film_id, Film.user_id == user_id).first()
+    film = await db.scalar(select(Film).where(Film.id == film_id, Film.user_id == user_id))
     
     if not film:
         raise HTTPException(
@@ -388,9 +576,11 @@ async def update_film(
     update_data = film_data.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(film, key, value)
+    if ROLLUP_FIELDS.intersection(update_data):
+        await _sync_rollups(db, user_id, film.izlenme_tarihi)
     
-    db.commit()
-    db.refresh(film)
+    await db.commit()
+    invalidate_user_stats(user_id)
     
     return film
 
@@ -399,12 +589,13 @@ async def update_film(
 async def delete_film(
     film_id: int,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Kullanıcının listesinden bir filmi siler.
+    Filme bağlı beğeni ve yorumlar önce silinir (PostgreSQL'de yabancı anahtar ihlali olmaz).
     """
-    film = db.query(Film).filter(Film.id == film_id, Film.user_id == user_id).first()
+    film = await db.scalar(select(Film).where(Film.id == film_id, Film.user_id == user_id))
     
     if not film:
         raise HTTPException(
@@ -412,8 +603,16 @@ async def delete_film(
             detail="Film bulunamadı"
         )
     
-    db.delete(film)
-    db.commit()
+    tmdb_id = film.tmdb_id
+    watched_at = film.izlenme_tarihi if film.izlendi else None
+    await db.execute(delete(ActivityLike).where(ActivityLike.film_id == film.id))
+    await db.execute(delete(ActivityComment).where(ActivityComment.film_id == film.id))
+    await db.delete(film)
+    if watched_at:
+        await _sync_rollups(db, user_id, watched_at)
+    await db.commit()
+    library_index.discard(user_id, tmdb_id)
+    invalidate_user_stats(user_id)
     
     return {"message": "Film başarıyla silindi"}
 
@@ -421,17 +620,17 @@ async def delete_film(
 @router.get("/my-genres")
 async def get_my_genre_stats(
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Kullanıcının izlediği filmlerin tür istatistiklerini döndürür.
     TMDB'den her filmin türünü çeker ve sayar.
     """
     # Kullanıcının izlediği filmleri al
-    user_films = db.query(Film).filter(
+    user_films = (await db.execute(select(Film.tmdb_id).where(
         Film.user_id == user_id,
         Film.izlendi == True
-    ).all()
+    ))).all()
     
     if not user_films:
         return {"genres": [], "total": 0}
@@ -445,7 +644,7 @@ async def get_my_genre_stats(
     # Tür sayacı
     genre_counts = {}
     
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         for film in user_films:
             try:
                 response = await client.get(
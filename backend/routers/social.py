@@ -1,16 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from typing import List, Optional, Union
-
-from database import get_db
-from models import User, Film, Friendship, ActivityLike, ActivityComment
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import or_, and_, delete, func, select, update
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+
+from database import get_async_db, get_read_db, mark_writers
+from models import User, Film, Friendship, ActivityLike, ActivityComment, FriendSuggestion
 from schemas import (
     FriendshipCreate, 
     FriendshipResponse, 
     FriendshipUpdate,
     FriendshipWithUser,
     CompatibilityScore,
+    FriendSuggestionResponse,
     FeedItem,
     UserResponse,
     FilmResponse,
@@ -22,12 +25,15 @@ from schemas import (
     ActivityLikesAndComments
 )
 from config import get_settings
+from utils.library_index import library_index, intersect_count
+from utils.stats import invalidate_user_stats
+from utils.write_queue import run_write
 
 router = APIRouter()
 settings = get_settings()
 
 
-async def get_current_user_id(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> int:
+async def get_current_user_id(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)) -> int:
     """Authorization header'dan token'ı alır ve kullanıcı ID'sini döndürür"""
     from routers.auth import verify_token
     
@@ -50,7 +56,7 @@ async def get_current_user_id(authorization: Optional[str] = Header(None), db: S
 @router.post("/friends/request", response_model=FriendshipResponse)
 async def send_friend_request(
     friend_data: FriendshipCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -66,7 +72,7 @@ async def send_friend_request(
         )
     
     # Hedef kullanıcı var mı kontrol et
-    friend = db.query(User).filter(User.id == friend_data.friend_id).first()
+    friend = await db.get(User, friend_data.friend_id)
     if not friend:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -74,7 +80,7 @@ async def send_friend_request(
         )
     
     # Daha önce aktif/bekleyen istek var mı kontrol et (rejected kayıtlar hariç)
-    existing = db.query(Friendship).filter(
+    existing = await db.scalar(select(Friendship).where(
         or_(
             and_(Friendship.user_id == user_id, Friendship.friend_id == friend_data.friend_id),
             and_(Friendship.user_id == friend_data.friend_id, Friendship.friend_id == user_id)
@@ -83,7 +89,7 @@ async def send_friend_request(
             Friendship.status == "pending",
             Friendship.status == "accepted"
         )
-    ).first()
+    ).limit(1))
     
     if existing:
         if existing.status == "pending":
@@ -103,50 +109,51 @@ async def send_friend_request(
     )
     
     db.add(friendship)
-    db.commit()
-    db.refresh(friendship)
+    mark_writers(db, friend_data.friend_id)
+    await db.commit()
     
     return friendship
 
 
 @router.get("/friends/requests", response_model=List[FriendshipWithUser])
 async def get_friend_requests(
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
     authorization: Optional[str] = Header(None)
 ):
     """
     Kullanıcıya gelen arkadaşlık isteklerini döndürür.
-    İsteği gönderen kullanıcı bilgileriyle birlikte.
+    İsteği gönderen kullanıcı bilgileriyle birlikte (tek sorguda, joinedload).
     """
     user_id = await get_current_user_id(authorization, db)
     
-    requests = db.query(Friendship).filter(
+    requests = (await db.scalars(select(Friendship).options(
+        joinedload(Friendship.user)
+    ).where(
         Friendship.friend_id == user_id,
         Friendship.status == "pending"
-    ).all()
-    
-    # Her istek için kullanıcı bilgisini ekle
-    result = []
-    for request in requests:
-        user = db.query(User).filter(User.id == request.user_id).first()
-        if user:
-            result.append({
-                "id": request.id,
-                "user_id": request.user_id,
-                "friend_id": request.friend_id,
-                "status": request.status,
-                "created_at": request.created_at,
-                "user": user
-            })
-    
-    return result
+    ).order_by(Friendship.created_at.desc(), Friendship.id.desc()).offset(offset).limit(limit))).all()
+    
+    return [
+        {
+            "id": request.id,
+            "user_id": request.user_id,
+            "friend_id": request.friend_id,
+            "status": request.status,
+            "created_at": request.created_at,
+            "user": request.user
+        }
+        for request in requests
+        if request.user
+    ]
 
 
 @router.put("/friends/requests/{friendship_id}")
 async def respond_to_friend_request(
     friendship_id: int,
     response: FriendshipUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -156,10 +163,10 @@ async def respond_to_friend_request(
     """
     user_id = await get_current_user_id(authorization, db)
     
-    friendship = db.query(Friendship).filter(
+    friendship = await db.scalar(select(Friendship).where(
         Friendship.id == friendship_id,
         Friendship.friend_id == user_id
-    ).first()
+    ))
     
     if not friendship:
         raise HTTPException(
@@ -167,20 +174,23 @@ async def respond_to_friend_request(
             detail="Arkadaşlık isteği bulunamadı"
         )
     
+    # İsteği gönderen taraf da yazmadan etkilenir (arkadaş sayıları, istek listesi)
+    mark_writers(db, friendship.user_id)
+    
     # Eğer istek reddedildiyse, kaydı sil (tekrar istek gönderilebilsin)
     if response.status == "rejected":
-        db.delete(friendship)
-        db.commit()
+        await db.delete(friendship)
+        await db.commit()
         return {"message": "Arkadaşlık isteği reddedildi"}
     
     # Eğer istek kabul edildiyse, çift yönlü arkadaşlık oluştur (MUTUAL)
     friendship.status = "accepted"
     
     # Ters yönde de bir Friendship kaydı oluştur (karşılıklı arkadaşlık için)
-    reverse_friendship = db.query(Friendship).filter(
+    reverse_friendship = await db.scalar(select(Friendship).where(
         Friendship.user_id == user_id,
         Friendship.friend_id == friendship.user_id
-    ).first()
+    ).limit(1))
     
     if not reverse_friendship:
         reverse_friendship = Friendship(
@@ -192,15 +202,16 @@ async def respond_to_friend_request(
     else:
         reverse_friendship.status = "accepted"
     
-    db.commit()
-    db.refresh(friendship)
+    await db.commit()
+    await db.refresh(friendship)
+    invalidate_user_stats(friendship.user_id, friendship.friend_id)
     
     return friendship
 
 
 @router.get("/friends", response_model=List[UserResponse])
 async def get_following(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -212,35 +223,62 @@ async def get_following(
     user_id = await get_current_user_id(authorization, db)
     
     # Benim takip ettiklerim
-    following_ids = db.query(Friendship.friend_id).filter(
+    following_ids = (await db.scalars(select(Friendship.friend_id).where(
         Friendship.user_id == user_id,
         Friendship.status == "accepted"
-    ).all()
-    following_ids = [f[0] for f in following_ids]
+    ))).all()
     
     # Beni takip edenler
-    follower_ids = db.query(Friendship.user_id).filter(
+    follower_ids = (await db.scalars(select(Friendship.user_id).where(
         Friendship.friend_id == user_id,
         Friendship.status == "accepted"
-    ).all()
-    follower_ids = [f[0] for f in follower_ids]
+    ))).all()
     
     # Her iki listeden unique ID'leri birleştir
-    friend_ids = list(set(following_ids + follower_ids))
+    friend_ids = list(set(following_ids) | set(follower_ids))
     
     if not friend_ids:
         return []
     
     # Kullanıcıları getir
-    friends = db.query(User).filter(User.id.in_(friend_ids)).all()
+    friends = (await db.scalars(select(User).where(User.id.in_(friend_ids)))).all()
     
     return friends
 
 
+@router.get("/friends/suggestions", response_model=List[FriendSuggestionResponse])
+async def get_friend_suggestions(
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Arkadaş önerilerini döndürür (arkadaşların arkadaşları).
+    Öneriler periyodik batch job ile önceden hesaplanır; burada tek index'li okuma yapılır.
+    """
+    user_id = await get_current_user_id(authorization, db)
+    
+    suggestions = (await db.scalars(select(FriendSuggestion).options(
+        joinedload(FriendSuggestion.suggested_user)
+    ).where(
+        FriendSuggestion.user_id == user_id
+    ).order_by(FriendSuggestion.score.desc()).limit(limit))).all()
+    
+    return [
+        {
+            "user": suggestion.suggested_user,
+            "mutual_friends": suggestion.mutual_friends,
+            "library_overlap": suggestion.library_overlap,
+            "score": suggestion.score
+        }
+        for suggestion in suggestions
+    ]
+
+
 @router.get("/friends/status/{target_user_id}")
 async def get_friendship_status(
     target_user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -250,16 +288,16 @@ async def get_friendship_status(
     user_id = await get_current_user_id(authorization, db)
     
     # Benim ona gönderdiğim istek
-    my_request = db.query(Friendship).filter(
+    my_request = await db.scalar(select(Friendship).where(
         Friendship.user_id == user_id,
         Friendship.friend_id == target_user_id
-    ).first()
+    ).limit(1))
     
     # Onun bana gönderdiği istek
-    their_request = db.query(Friendship).filter(
+    their_request = await db.scalar(select(Friendship).where(
         Friendship.user_id == target_user_id,
         Friendship.friend_id == user_id
-    ).first()
+    ).limit(1))
     
     is_following = my_request and my_request.status == "accepted"
     is_follower = their_request and their_request.status == "accepted"
@@ -279,7 +317,7 @@ async def get_friendship_status(
 @router.delete("/friends/{friend_id}")
 async def unfollow_user(
     friend_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -288,13 +326,13 @@ async def unfollow_user(
     user_id = await get_current_user_id(authorization, db)
     
     # Her iki yönden de friendship kayıtlarını bul ve sil
-    friendships = db.query(Friendship).filter(
+    friendships = (await db.scalars(select(Friendship).where(
         or_(
             and_(Friendship.user_id == user_id, Friendship.friend_id == friend_id),
             and_(Friendship.user_id == friend_id, Friendship.friend_id == user_id)
         ),
         Friendship.status == "accepted"
-    ).all()
+    ))).all()
     
     if not friendships:
         raise HTTPException(
@@ -304,68 +342,185 @@ async def unfollow_user(
     
     # Her iki kaydı da sil (mutual friendship kaldırma)
     for friendship in friendships:
-        db.delete(friendship)
+        await db.delete(friendship)
+    mark_writers(db, friend_id)
     
-    db.commit()
+    await db.commit()
+    invalidate_user_stats(user_id, friend_id)
     
     return {"message": "Arkadaşlıktan çıkıldı"}
 
 
+async def _get_friend_ids(db: AsyncSession, user_id: int) -> List[int]:
+    """Kabul edilmiş arkadaşlıkların (her iki yön) karşı taraf ID'lerini döndürür"""
+    rows = (await db.execute(select(Friendship.user_id, Friendship.friend_id).where(
+        or_(
+            Friendship.user_id == user_id,
+            Friendship.friend_id == user_id
+        ),
+        Friendship.status == "accepted"
+    ))).all()
+    
+    friend_ids = {friend if owner == user_id else owner for owner, friend in rows}
+    friend_ids.discard(user_id)
+    return sorted(friend_ids)
+
+
+def _rating_correlations(rows) -> Dict[int, Tuple[Optional[float], int]]:
+    """
+    Ortak puanlanan filmler üzerinden her arkadaş için Pearson korelasyonu hesaplar.
+    rows: (friend_id, benim_puanım, arkadaşın_puanı) satırları.
+    Tüm hesaplama NumPy ile vektörel yapılır (arkadaş başına döngü yok).
+    """
+    if not rows:
+        return {}
+    
+    data = np.asarray(rows, dtype=np.float64)
+    friend_ids, groups, counts = np.unique(data[:, 0], return_inverse=True, return_counts=True)
+    x, y = data[:, 1], data[:, 2]
+    
+    sum_x = np.bincount(groups, weights=x)
+    sum_y = np.bincount(groups, weights=y)
+    sum_xx = np.bincount(groups, weights=x * x)
+    sum_yy = np.bincount(groups, weights=y * y)
+    sum_xy = np.bincount(groups, weights=x * y)
+    
+    cov = sum_xy - sum_x * sum_y / counts
+    var_x = sum_xx - sum_x * sum_x / counts
+    var_y = sum_yy - sum_y * sum_y / counts
+    denom = np.sqrt(var_x * var_y)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlations = np.where((counts >= 2) & (denom > 0), cov / denom, np.nan)
+    
+    result = {}
+    for friend_id, correlation, count in zip(friend_ids, correlations, counts):
+        value = None if np.isnan(correlation) else round(float(correlation), 4)
+        result[int(friend_id)] = (value, int(count))
+    return result
+
+
+async def _co_rated_rows(db: AsyncSession, user_id: int, friend_ids: List[int]):
+    """Kullanıcının ve arkadaşlarının ortak puanladığı filmlerin puan çiftlerini getirir"""
+    mine = aliased(Film)
+    theirs = aliased(Film)
+    return (await db.execute(select(theirs.user_id, mine.kisisel_puan, theirs.kisisel_puan).join(
+        mine,
+        and_(mine.tmdb_id == theirs.tmdb_id, mine.user_id == user_id)
+    ).where(
+        theirs.user_id.in_(friend_ids),
+        mine.kisisel_puan.isnot(None),
+        theirs.kisisel_puan.isnot(None)
+    ))).all()
+
+
+def _compatibility_percentage(common: int, union: int) -> float:
+    """Jaccard benzerliğini yüzde olarak döndürür"""
+    if union == 0:
+        return 0.0
+    return round((common / union) * 100, 2)
+
+
+@router.get("/compatibility", response_model=List[CompatibilityScore])
+async def get_all_compatibility_scores(
+    include_correlation: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Kullanıcı ile tüm arkadaşları arasındaki uyum skorlarını tek seferde hesaplar.
+    include_correlation=true ile ortak puanlanan filmler üzerinden puan korelasyonu da eklenir.
+    """
+    user_id = int(await get_current_user_id(authorization, db))
+    
+    friend_ids = await _get_friend_ids(db, user_id)
+    if not friend_ids:
+        return []
+    
+    # Kütüphane indeksi: ORM nesnesi oluşturmadan sıralı ID dizileri üzerinde kesişim
+    libraries = await db.run_sync(library_index.get_many, [user_id, *friend_ids])
+    user_library = libraries[user_id]
+    user_total = len(user_library)
+    
+    correlations = {}
+    if include_correlation:
+        correlations = _rating_correlations(await _co_rated_rows(db, user_id, friend_ids))
+    
+    scores = []
+    for friend_id in friend_ids:
+        friend_library = libraries[friend_id]
+        friend_total = len(friend_library)
+        common = intersect_count(user_library, friend_library)
+        score = {
+            "user1_id": user_id,
+            "user2_id": friend_id,
+            "common_films": common,
+            "user1_total_films": user_total,
+            "user2_total_films": friend_total,
+            "compatibility_percentage": _compatibility_percentage(
+                common, user_total + friend_total - common
+            )
+        }
+        if include_correlation:
+            correlation, co_rated = correlations.get(friend_id, (None, 0))
+            score["rating_correlation"] = correlation
+            score["co_rated_films"] = co_rated
+        scores.append(score)
+    
+    return scores
+
+
 @router.get("/compatibility/{friend_id}", response_model=CompatibilityScore)
 async def get_compatibility_score(
     friend_id: int,
-    db: Session = Depends(get_db),
+    include_correlation: bool = False,
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
     İki kullanıcı arasındaki uyum skorunu hesaplar.
-    Ortak izlenen filmlerin yüzdesini döndürür.
+    Ortak izlenen filmlerin yüzdesini (Jaccard) döndürür.
     """
-    user_id = await get_current_user_id(authorization, db)
+    user_id = int(await get_current_user_id(authorization, db))
     
     # Arkadaş var mı kontrol et
-    friend = db.query(User).filter(User.id == friend_id).first()
+    friend = await db.scalar(select(User.id).where(User.id == friend_id))
     if not friend:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Kullanıcı bulunamadı"
         )
     
-    # Her iki kullanıcının filmlerini al
-    user_films = db.query(Film).filter(Film.user_id == user_id).all()
-    friend_films = db.query(Film).filter(Film.user_id == friend_id).all()
-    
-    # TMDB ID'lerini set olarak al
-    user_tmdb_ids = {film.tmdb_id for film in user_films}
-    friend_tmdb_ids = {film.tmdb_id for film in friend_films}
-    
-    # Ortak filmleri bul
-    common_films = user_tmdb_ids.intersection(friend_tmdb_ids)
+    libraries = await db.run_sync(library_index.get_many, [user_id, friend_id])
+    user_total = len(libraries[user_id])
+    friend_total = len(libraries[friend_id])
+    common_films = intersect_count(libraries[user_id], libraries[friend_id])
+    total_unique_films = user_total + friend_total - common_films
     
-    # Uyum skorunu hesapla
-    total_unique_films = len(user_tmdb_ids.union(friend_tmdb_ids))
-    
-    if total_unique_films == 0:
-        compatibility_percentage = 0.0
-    else:
-        compatibility_percentage = (len(common_films) / total_unique_films) * 100
-        compatibility_percentage = round(compatibility_percentage, 2)
-    
-    return {
+    score = {
         "user1_id": user_id,
         "user2_id": friend_id,
-        "common_films": len(common_films),
-        "user1_total_films": len(user_films),
-        "user2_total_films": len(friend_films),
-        "compatibility_percentage": compatibility_percentage
+        "common_films": common_films,
+        "user1_total_films": user_total,
+        "user2_total_films": friend_total,
+        "compatibility_percentage": _compatibility_percentage(common_films, total_unique_films)
     }
+    
+    if include_correlation:
+        correlation, co_rated = _rating_correlations(
+            await _co_rated_rows(db, user_id, [friend_id])
+        ).get(friend_id, (None, 0))
+        score["rating_correlation"] = correlation
+        score["co_rated_films"] = co_rated
+    
+    return score
 
 
 @router.get("/feed", response_model=List[FeedItem])
 async def get_social_feed(
     limit: int = 20,
     source: str = "all",  # all, friends, me
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -378,18 +533,18 @@ async def get_social_feed(
     # Kaynak türüne göre filmleri getir
     if source == "me":
         # Sadece kendi filmlerim
-        films = db.query(Film).filter(
+        films = (await db.scalars(select(Film).options(joinedload(Film.user)).where(
             Film.user_id == user_id
-        ).order_by(Film.izlenme_tarihi.desc()).limit(limit).all()
+        ).order_by(Film.izlenme_tarihi.desc()).limit(limit))).all()
     elif source == "friends":
         # Sadece arkadaşların filmleri
-        friendships = db.query(Friendship).filter(
+        friendships = (await db.scalars(select(Friendship).where(
             or_(
                 Friendship.user_id == user_id,
                 Friendship.friend_id == user_id
             ),
             Friendship.status == "accepted"
-        ).all()
+        ))).all()
         
         print(f"🔍 Found {len(friendships)} accepted friendships")
         
@@ -405,18 +560,18 @@ async def get_social_feed(
         if not friend_ids:
             return []
         
-        films = db.query(Film).filter(
+        films = (await db.scalars(select(Film).options(joinedload(Film.user)).where(
             Film.user_id.in_(friend_ids)
-        ).order_by(Film.izlenme_tarihi.desc()).limit(limit).all()
+        ).order_by(Film.izlenme_tarihi.desc()).limit(limit))).all()
     else:
         # Hepsi - arkadaşlar + ben
-        friendships = db.query(Friendship).filter(
+        friendships = (await db.scalars(select(Friendship).where(
             or_(
                 Friendship.user_id == user_id,
                 Friendship.friend_id == user_id
             ),
             Friendship.status == "accepted"
-        ).all()
+        ))).all()
         
         friend_ids = [user_id]  # Kendimi de ekle
         for friendship in friendships:
@@ -425,36 +580,49 @@ async def get_social_feed(
             else:
                 friend_ids.append(friendship.user_id)
         
-        films = db.query(Film).filter(
+        films = (await db.scalars(select(Film).options(joinedload(Film.user)).where(
             Film.user_id.in_(friend_ids)
-        ).order_by(Film.izlenme_tarihi.desc()).limit(limit).all()
+        ).order_by(Film.izlenme_tarihi.desc()).limit(limit))).all()
     
-    # Feed item'ları oluştur
-    feed_items = []
-    for film in films:
-        user = db.query(User).filter(User.id == film.user_id).first()
-        if user:
-            feed_items.append({
-                "user": user,
-                "film": film
-            })
-    
-    return feed_items
+    # Feed item'ları oluştur (kullanıcılar filmlerle birlikte yüklendi)
+    return [
+        {
+            "user": film.user,
+            "film": film
+        }
+        for film in films
+        if film.user
+    ]
 
 
 # ==================== LIKE ENDPOINTS ====================
+# Beğeni/yorum yazmaları run_write ile yapılır (SQLite'ta tek yazar kuyruğu)
+
+def _insert_like(db: Session, user_id: int, film_id: int) -> int:
+    like = ActivityLike(user_id=user_id, film_id=film_id)
+    db.add(like)
+    db.flush()
+    return like.id
+
+
+def _delete_like(db: Session, user_id: int, film_id: int) -> int:
+    return db.execute(delete(ActivityLike).where(
+        ActivityLike.user_id == user_id,
+        ActivityLike.film_id == film_id
+    )).rowcount
+
 
 @router.post("/activity/{film_id}/like")
 async def like_activity(
     film_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """Bir aktiviteyi beğen"""
     user_id = await get_current_user_id(authorization, db)
     
     # Film var mı kontrol et
-    film = db.query(Film).filter(Film.id == film_id).first()
+    film = await db.scalar(select(Film.id).where(Film.id == film_id))
     if not film:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -462,10 +630,10 @@ async def like_activity(
         )
     
     # Zaten beğenilmiş mi kontrol et
-    existing_like = db.query(ActivityLike).filter(
+    existing_like = await db.scalar(select(ActivityLike.id).where(
         ActivityLike.user_id == user_id,
         ActivityLike.film_id == film_id
-    ).first()
+    ).limit(1))
     
     if existing_like:
         raise HTTPException(
@@ -474,95 +642,103 @@ async def like_activity(
         )
     
     # Beğeni oluştur
-    new_like = ActivityLike(
-        user_id=user_id,
-        film_id=film_id
-    )
-    db.add(new_like)
-    db.commit()
-    db.refresh(new_like)
+    like_id = await run_write(db, _insert_like, user_id, film_id)
     
-    return {"message": "Aktivite beğenildi", "like_id": new_like.id}
+    return {"message": "Aktivite beğenildi", "like_id": like_id}
 
 
 @router.delete("/activity/{film_id}/like")
 async def unlike_activity(
     film_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """Aktivite beğenisini kaldır"""
     user_id = await get_current_user_id(authorization, db)
     
-    # Beğeni var mı kontrol et
-    like = db.query(ActivityLike).filter(
-        ActivityLike.user_id == user_id,
-        ActivityLike.film_id == film_id
-    ).first()
+    # Beğeniyi sil (yoksa 404)
+    deleted = await run_write(db, _delete_like, user_id, film_id)
     
-    if not like:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Beğeni bulunamadı"
         )
     
-    db.delete(like)
-    db.commit()
-    
     return {"message": "Beğeni kaldırıldı"}
 
 
 @router.get("/activity/{film_id}/interactions")
 async def get_activity_interactions(
     film_id: int,
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
     authorization: Optional[str] = Header(None)
 ):
-    """Bir aktivitenin beğeni ve yorumlarını getir"""
+    """
+    Bir aktivitenin beğeni ve yorumlarını getir.
+    Beğeni ve yorum listeleri limit/offset ile sayfalanır; sayılar toplamı gösterir.
+    """
     user_id = await get_current_user_id(authorization, db)
     
-    # Beğenileri getir
-    likes = db.query(ActivityLike).filter(ActivityLike.film_id == film_id).all()
-    
-    # Yorumları getir
-    comments = db.query(ActivityComment).filter(ActivityComment.film_id == film_id).order_by(ActivityComment.created_at.desc()).all()
-    
-    # Benim beğenim var mı kontrol et
-    is_liked_by_me = db.query(ActivityLike).filter(
-        ActivityLike.user_id == user_id,
+    # Beğenileri getir (kullanıcılarla birlikte)
+    likes = (await db.scalars(select(ActivityLike).options(
+        joinedload(ActivityLike.user)
+    ).where(
         ActivityLike.film_id == film_id
-    ).first() is not None
-    
-    # Kullanıcı bilgilerini ekle
-    likes_with_user = []
-    for like in likes:
-        user = db.query(User).filter(User.id == like.user_id).first()
-        if user:
-            likes_with_user.append({
-                "id": like.id,
-                "user_id": like.user_id,
-                "film_id": like.film_id,
-                "created_at": like.created_at,
-                "user": user
-            })
-    
-    comments_with_user = []
-    for comment in comments:
-        user = db.query(User).filter(User.id == comment.user_id).first()
-        if user:
-            comments_with_user.append({
-                "id": comment.id,
-                "user_id": comment.user_id,
-                "film_id": comment.film_id,
-                "content": comment.content,
-                "created_at": comment.created_at,
-                "user": user
-            })
+    ).order_by(ActivityLike.created_at.desc(), ActivityLike.id.desc()).offset(offset).limit(limit))).all()
+    
+    # Yorumları getir (kullanıcılarla birlikte)
+    comments = (await db.scalars(select(ActivityComment).options(
+        joinedload(ActivityComment.user)
+    ).where(
+        ActivityComment.film_id == film_id
+    ).order_by(ActivityComment.created_at.desc(), ActivityComment.id.desc()).offset(offset).limit(limit))).all()
+    
+    # Toplam sayılar ve benim beğenim tek sorguda
+    like_count, comment_count, my_like_count = (await db.execute(select(
+        select(func.count(ActivityLike.id)).where(
+            ActivityLike.film_id == film_id
+        ).scalar_subquery(),
+        select(func.count(ActivityComment.id)).where(
+            ActivityComment.film_id == film_id
+        ).scalar_subquery(),
+        select(func.count(ActivityLike.id)).where(
+            ActivityLike.film_id == film_id,
+            ActivityLike.user_id == user_id
+        ).scalar_subquery()
+    ))).one()
+    
+    likes_with_user = [
+        {
+            "id": like.id,
+            "user_id": like.user_id,
+            "film_id": like.film_id,
+            "created_at": like.created_at,
+            "user": like.user
+        }
+        for like in likes
+        if like.user
+    ]
+    
+    comments_with_user = [
+        {
+            "id": comment.id,
+            "user_id": comment.user_id,
+            "film_id": comment.film_id,
+            "content": comment.content,
+            "created_at": comment.created_at,
+            "user": comment.user
+        }
+        for comment in comments
+        if comment.user
+    ]
     
     return {
-        "like_count": len(likes),
-        "comment_count": len(comments),
-        "is_liked_by_me": is_liked_by_me,
+        "like_count": like_count,
+        "comment_count": comment_count,
+        "is_liked_by_me": my_like_count > 0,
         "likes": likes_with_user,
         "comments": comments_with_user
     }
@@ -570,18 +746,39 @@ async def get_activity_interactions(
 
 # ==================== COMMENT ENDPOINTS ====================
 
+def _insert_comment(db: Session, user_id: int, film_id: int, content: str) -> dict:
+    comment = ActivityComment(user_id=user_id, film_id=film_id, content=content)
+    db.add(comment)
+    db.flush()
+    return {
+        "id": comment.id,
+        "user_id": comment.user_id,
+        "film_id": comment.film_id,
+        "content": comment.content,
+        "created_at": comment.created_at
+    }
+
+
+def _update_comment(db: Session, comment_id: int, content: str):
+    db.execute(update(ActivityComment).where(ActivityComment.id == comment_id).values(content=content))
+
+
+def _delete_comment(db: Session, comment_id: int):
+    db.execute(delete(ActivityComment).where(ActivityComment.id == comment_id))
+
+
 @router.post("/activity/{film_id}/comment")
 async def add_comment(
     film_id: int,
     comment_data: ActivityCommentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """Bir aktiviteye yorum ekle"""
     user_id = await get_current_user_id(authorization, db)
     
     # Film var mı kontrol et
-    film = db.query(Film).filter(Film.id == film_id).first()
+    film = await db.scalar(select(Film.id).where(Film.id == film_id))
     if not film:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -589,39 +786,25 @@ async def add_comment(
         )
     
     # Yorum oluştur
-    new_comment = ActivityComment(
-        user_id=user_id,
-        film_id=film_id,
-        content=comment_data.content
-    )
-    db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
+    new_comment = await run_write(db, _insert_comment, user_id, film_id, comment_data.content)
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
-    return {
-        "id": new_comment.id,
-        "user_id": new_comment.user_id,
-        "film_id": new_comment.film_id,
-        "content": new_comment.content,
-        "created_at": new_comment.created_at,
-        "user": user
-    }
+    return {**new_comment, "user": user}
 
 
 @router.put("/activity/comment/{comment_id}")
 async def update_comment(
     comment_id: int,
     comment_data: ActivityCommentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """Yorumu güncelle (sadece kendi yorumunu)"""
     user_id = await get_current_user_id(authorization, db)
     
     # Yorum var mı kontrol et
-    comment = db.query(ActivityComment).filter(ActivityComment.id == comment_id).first()
+    comment = await db.get(ActivityComment, comment_id)
     
     if not comment:
         raise HTTPException(
@@ -637,17 +820,15 @@ async def update_comment(
         )
     
     # Yorumu güncelle
-    comment.content = comment_data.content
-    db.commit()
-    db.refresh(comment)
+    await run_write(db, _update_comment, comment_id, comment_data.content)
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     return {
         "id": comment.id,
         "user_id": comment.user_id,
         "film_id": comment.film_id,
-        "content": comment.content,
+        "content": comment_data.content,
         "created_at": comment.created_at,
         "user": user
     }
@@ -656,7 +837,7 @@ async def update_comment(
 @router.delete("/activity/comment/{comment_id}")
 async def delete_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """Yorumu sil (sadece kendi yorumunu)"""
@@ -664,7 +845,7 @@ async def delete_comment(
     print(f"🗑️ Delete comment request - user_id: {user_id}, comment_id: {comment_id}")
     
     # Yorum var mı kontrol et
-    comment = db.query(ActivityComment).filter(ActivityComment.id == comment_id).first()
+    comment = await db.get(ActivityComment, comment_id)
     
     if not comment:
         print(f"❌ Comment not found: {comment_id}")
@@ -684,8 +865,7 @@ async def delete_comment(
         )
     
     print(f"✅ Deleting comment {comment_id}")
-    db.delete(comment)
-    db.commit()
+    await run_write(db, _delete_comment, comment_id)
     
     print(f"✅ Comment {comment_id} deleted successfully")
     return {"message": "Yorum silindi"}
@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from database import get_db
+from database import get_async_db, get_read_db
 from models import User, Film
-from schemas import UserResponse, UserStats, FilmResponse, UserUpdate
+from schemas import UserResponse, UserStats, FilmListItem, UserUpdate, TimelinePoint, UserSuggestion
 from config import get_settings
+from utils.stats import get_user_stats as get_user_stats_snapshot
+from utils.rollups import get_timeline
+from utils.library_export import EXPORT_FORMATS, export_filename, iter_library_export
+from utils.film_list import MAX_PAGE_SIZE, parse_fields, query_film_list
+from utils.user_search import AUTOCOMPLETE_PER_NODE, prefix_suggestions, search_users as search_usernames, username_trie
 
 router = APIRouter()
 settings = get_settings()
 
 
-async def get_current_user_id(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> int:
+async def get_current_user_id(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)) -> int:
     """Authorization header'dan token'ı alır ve kullanıcı ID'sini döndürür"""
     from routers.auth import verify_token
     
@@ -33,14 +40,14 @@ async def get_current_user_id(authorization: Optional[str] = Header(None), db: S
 
 @router.get("/me", response_model=UserResponse)
 async def get_my_profile(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
     Kullanıcının kendi profil bilgilerini döndürür.
     """
     user_id = await get_current_user_id(authorization, db)
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, int(user_id))
     
     if not user:
         raise HTTPException(
@@ -54,14 +61,14 @@ async def get_my_profile(
 @router.put("/me", response_model=UserResponse)
 async def update_my_profile(
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
     Kullanıcının kendi profil bilgilerini günceller.
     """
     user_id = await get_current_user_id(authorization, db)
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, int(user_id))
     
     if not user:
         raise HTTPException(
@@ -94,10 +101,10 @@ async def update_my_profile(
             )
         
         # Username unique kontrolü
-        existing_user = db.query(User).filter(
+        existing_user = (await db.execute(select(User.id).where(
             User.username == username,
             User.id != user_id
-        ).first()
+        ))).first()
         
         if existing_user:
             raise HTTPException(
@@ -107,18 +114,62 @@ async def update_my_profile(
         
         user.username = username
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    username_trie.invalidate()
     
     return user
 
 
+@router.get("/me/export")
+async def export_my_library(
+    format: str = Query("csv", pattern="^(csv|ndjson|json)$"),
+    db: AsyncSession = Depends(get_async_db),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Kullanıcının kütüphanesini dosya olarak indirir (csv, ndjson veya json).
+    Satırlar veritabanından partiler halinde okunup akış olarak gönderilir.
+    """
+    user_id = await get_current_user_id(authorization, db)
+    user = (await db.execute(select(User.username).where(User.id == user_id))).first()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Kullanıcı bulunamadı"
+        )
+    
+    media_type, _ = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        iter_library_export(int(user_id), format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(user.username, format)}"'}
+    )
+
+
+@router.get("/autocomplete", response_model=List[UserSuggestion])
+async def autocomplete_users(
+    q: str = Query(..., min_length=1, max_length=30),
+    limit: int = Query(8, ge=1, le=AUTOCOMPLETE_PER_NODE),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Kullanıcı adı otomatik tamamlama (arama kutusu için).
+    Önekle başlayan en kısa kullanıcı adlarını bellekteki önek ağacından döndürür.
+    Ağaç henüz kurulmadıysa veya kullanıcı sayısı sınırın üstündeyse index'li önek sorgusu kullanılır.
+    """
+    suggestions = username_trie.complete(q, limit)
+    if suggestions is None:
+        suggestions = await db.run_sync(prefix_suggestions, q, limit)
+    return suggestions
+
+
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+async def get_user_profile(user_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Belirtilen kullanıcının profil bilgilerini döndürür.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -131,227 +182,80 @@ async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
 
 @router.get("/me/stats", response_model=UserStats)
 async def get_my_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     authorization: Optional[str] = Header(None)
 ):
     """
     Kullanıcının detaylı istatistiklerini döndürür.
     """
-    from models import Friendship
-    from datetime import datetime, timedelta
-    from sqlalchemy import func, extract
-    
     user_id = await get_current_user_id(authorization, db)
     
-    # Toplam film sayısı
-    total_movies = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.izlendi == True
-    ).count()
-    
-    # Ortalama puan hesapla (sadece puan verilmiş filmler)
-    films_with_rating = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.kisisel_puan.isnot(None)
-    ).all()
-    
-    if films_with_rating:
-        average_rating = sum(f.kisisel_puan for f in films_with_rating) / len(films_with_rating)
-        average_rating = round(average_rating, 2)
-    else:
-        average_rating = 0.0
-    
-    # Yorum sayısı
-    total_reviews = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.kisisel_yorum.isnot(None),
-        Film.kisisel_yorum != ""
-    ).count()
-    
-    # Arkadaş sayıları (Instagram mantığı)
-    # Takipçiler: Bana arkadaşlık isteği gönderenler ve kabul ettiklerim
-    total_followers = db.query(Friendship).filter(
-        Friendship.friend_id == user_id,
-        Friendship.status == "accepted"
-    ).count()
-    
-    # Takip edilenler: Benim arkadaşlık isteği gönderdiğim ve kabul edilenler
-    total_following = db.query(Friendship).filter(
-        Friendship.user_id == user_id,
-        Friendship.status == "accepted"
-    ).count()
-    
-    # Bu ay izlenen filmler
-    now = datetime.utcnow()
-    start_of_month = datetime(now.year, now.month, 1)
-    movies_this_month = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.izlenme_tarihi >= start_of_month,
-        Film.izlendi == True
-    ).count()
-    
-    # Bu yıl izlenen filmler
-    start_of_year = datetime(now.year, 1, 1)
-    movies_this_year = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.izlenme_tarihi >= start_of_year,
-        Film.izlendi == True
-    ).count()
-    
-    # Rozetler (basit rozet sistemi)
-    badges = []
-    if total_movies >= 100:
-        badges.append({"name": "🎬 Sinema Gurmesi", "rarity": "legendary"})
-    elif total_movies >= 50:
-        badges.append({"name": "🎬 Film Tutkunları", "rarity": "rare"})
-    elif total_movies >= 10:
-        badges.append({"name": "🎬 İlk Adım", "rarity": "common"})
-    
-    if total_reviews >= 50:
-        badges.append({"name": "✍️ Eleştirmen", "rarity": "legendary"})
-    elif total_reviews >= 20:
-        badges.append({"name": "✍️ Yorum Yazarı", "rarity": "rare"})
-    
-    if average_rating and average_rating >= 8.5:
-        badges.append({"name": "⭐ İyi Gözlü", "rarity": "rare"})
-    
-    # Tahmini izleme süresi (ortalama film 120 dakika)
-    total_watch_time = total_movies * 120  # Dakika
-    total_watch_hours = total_watch_time // 60  # Saat
+    stats = await db.run_sync(get_user_stats_snapshot, user_id)
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Kullanıcı bulunamadı"
+        )
     
-    return {
-        "total_movies": total_movies,
-        "total_series": 0,  # Şimdilik sadece filmler var
-        "average_rating": average_rating,
-        "total_watch_time": total_watch_time,
-        "total_reviews": total_reviews,
-        "total_followers": total_followers,
-        "total_following": total_following,
-        "movies_this_month": movies_this_month,
-        "movies_this_year": movies_this_year,
-        "series_watching": 0,  # Şimdilik sadece filmler var
-        "series_completed": 0,  # Şimdilik sadece filmler var
-        "total_watch_hours": total_watch_hours,
-        "badges": badges
-    }
+    return stats
 
 
 @router.get("/{user_id}/stats", response_model=UserStats)
-async def get_user_stats(user_id: int, db: Session = Depends(get_db)):
+async def get_user_stats(user_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Belirtilen kullanıcının detaylı istatistiklerini döndürür.
     """
-    from models import Friendship
-    from datetime import datetime, timedelta
-    from sqlalchemy import func, extract
+    stats = await db.run_sync(get_user_stats_snapshot, user_id)
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Kullanıcı bulunamadı"
+        )
     
-    # Kullanıcı var mı kontrol et
-    user = db.query(User).filter(User.id == user_id).first()
+    return stats
+
+
+@router.get("/{user_id}/stats/timeline", response_model=List[TimelinePoint])
+async def get_user_stats_timeline(
+    user_id: int,
+    granularity: str = Query("month", pattern="^(day|month|year)$"),
+    genre: str = Query("", description="Boş bırakılırsa tüm türler"),
+    start: Optional[str] = Query(None, description="Başlangıç dönemi, örn. 2025 veya 2025-01"),
+    end: Optional[str] = Query(None, description="Bitiş dönemi, örn. 2025 veya 2025-12"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Kullanıcının dönem bazlı izleme sayıları ve puan ortalamaları.
+    Önceden toplanmış aktivite özetlerinden okunur (film sayısından bağımsız).
+    """
+    user = (await db.execute(select(User.id).where(User.id == user_id))).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Kullanıcı bulunamadı"
         )
     
-    # Toplam film sayısı
-    total_movies = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.izlendi == True
-    ).count()
-    
-    # Ortalama puan hesapla (sadece puan verilmiş filmler)
-    films_with_rating = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.kisisel_puan.isnot(None)
-    ).all()
-    
-    if films_with_rating:
-        average_rating = sum(f.kisisel_puan for f in films_with_rating) / len(films_with_rating)
-        average_rating = round(average_rating, 2)
-    else:
-        average_rating = 0.0
-    
-    # Yorum sayısı
-    total_reviews = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.kisisel_yorum.isnot(None),
-        Film.kisisel_yorum != ""
-    ).count()
-    
-    # Arkadaş sayıları (Instagram mantığı)
-    # Takipçiler: Bu kullanıcıya arkadaşlık isteği gönderenler ve kabul ettikleri
-    total_followers = db.query(Friendship).filter(
-        Friendship.friend_id == user_id,
-        Friendship.status == "accepted"
-    ).count()
-    
-    # Takip edilenler: Bu kullanıcının arkadaşlık isteği gönderdiği ve kabul edilenler
-    total_following = db.query(Friendship).filter(
-        Friendship.user_id == user_id,
-        Friendship.status == "accepted"
-    ).count()
-    
-    # Bu ay izlenen filmler
-    now = datetime.utcnow()
-    start_of_month = datetime(now.year, now.month, 1)
-    movies_this_month = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.izlenme_tarihi >= start_of_month,
-        Film.izlendi == True
-    ).count()
-    
-    # Bu yıl izlenen filmler
-    start_of_year = datetime(now.year, 1, 1)
-    movies_this_year = db.query(Film).filter(
-        Film.user_id == user_id,
-        Film.izlenme_tarihi >= start_of_year,
-        Film.izlendi == True
-    ).count()
-    
-    # Rozetler (basit rozet sistemi)
-    badges = []
-    if total_movies >= 100:
-        badges.append({"name": "🎬 Sinema Gurmesi", "rarity": "legendary"})
-    elif total_movies >= 50:
-        badges.append({"name": "🎬 Film Tutkunları", "rarity": "rare"})
-    elif total_movies >= 10:
-        badges.append({"name": "🎬 İlk Adım", "rarity": "common"})
-    
-    if total_reviews >= 50:
-        badges.append({"name": "✍️ Eleştirmen", "rarity": "legendary"})
-    elif total_reviews >= 20:
-        badges.append({"name": "✍️ Yorum Yazarı", "rarity": "rare"})
-    
-    if average_rating and average_rating >= 8.5:
-        badges.append({"name": "⭐ İyi Gözlü", "rarity": "rare"})
-    
-    # Tahmini izleme süresi (ortalama film 120 dakika)
-    total_watch_time = total_movies * 120  # Dakika
-    total_watch_hours = total_watch_time // 60  # Saat
-    
-    return {
-        "total_movies": total_movies,
-        "total_series": 0,  # Şimdilik sadece filmler var
-        "average_rating": average_rating,
-        "total_watch_time": total_watch_time,
-        "total_reviews": total_reviews,
-        "total_followers": total_followers,
-        "total_following": total_following,
-        "movies_this_month": movies_this_month,
-        "movies_this_year": movies_this_year,
-        "series_watching": 0,  # Şimdilik sadece filmler var
-        "series_completed": 0,  # Şimdilik sadece filmler var
-        "total_watch_hours": total_watch_hours,
-        "badges": badges
-    }
+    return await db.run_sync(get_timeline, user_id, granularity, genre, start, end)
 
 
-@router.get("/{user_id}/films", response_model=List[FilmResponse])
-async def get_user_films(user_id: int, db: Session = Depends(get_db)):
+@router.get("/{user_id}/films", response_model=List[FilmListItem], response_model_exclude_unset=True)
+async def get_user_films(
+    user_id: int,
+    cursor: Optional[int] = Query(None, description="Önceki sayfanın X-Next-Cursor değeri"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    izlendi: Optional[bool] = None,
+    is_favorite: Optional[bool] = None,
+    is_watchlist: Optional[bool] = None,
+    min_rating: Optional[float] = Query(None, ge=0, le=10),
+    max_rating: Optional[float] = Query(None, ge=0, le=10),
+    fields: Optional[str] = Query(None, description="Virgülle ayrılmış alanlar, örn: id,title,poster_path"),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Belirtilen kullanıcının film listesini döndürür.
+    limit verilirse cursor ile sayfalanır; sonraki sayfa varsa X-Next-Cursor header'ı döner.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(select(User.id).where(User.id == user_id))).first()
     
     if not user:
         raise HTTPException(
@@ -359,17 +263,32 @@ async def get_user_films(user_id: int, db: Session = Depends(get_db)):
             detail="Kullanıcı bulunamadı"
         )
     
-    films = db.query(Film).filter(Film.user_id == user_id).all()
-    return films
+    try:
+        selected_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    films, next_cursor = await db.run_sync(
+        query_film_list, user_id, selected_fields,
+        cursor, limit, izlendi, is_favorite, is_watchlist, min_rating, max_rating
+    )
+    # Satırlar zaten şemadaki tiplerde: response_model doğrulaması atlanıp orjson ile yazılır
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return ORJSONResponse(films, headers=headers)
 
 
 @router.get("/{user_id}/reviews")
-async def get_user_reviews(user_id: int, db: Session = Depends(get_db)):
+async def get_user_reviews(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Belirtilen kullanıcının incelemeli filmlerini döndürür.
-    kisisel_yorum alanı dolu olan filmler.
+    kisisel_yorum alanı dolu olan filmler, limit/offset ile sayfalanır.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(select(User.id).where(User.id == user_id))).first()
     
     if not user:
         raise HTTPException(
@@ -378,11 +297,11 @@ async def get_user_reviews(user_id: int, db: Session = Depends(get_db)):
         )
     
     # Yorum yazılmış filmleri getir
-    films_with_reviews = db.query(Film).filter(
+    films_with_reviews = (await db.scalars(select(Film).where(
         Film.user_id == user_id,
         Film.kisisel_yorum.isnot(None),
         Film.kisisel_yorum != ""
-    ).order_by(Film.izlenme_tarihi.desc()).all()
+    ).order_by(Film.izlenme_tarihi.desc(), Film.id.desc()).offset(offset).limit(limit))).all()
     
     # Her film için detaylı bilgi döndür
     reviews = []
@@ -402,12 +321,9 @@ async def get_user_reviews(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/search/{username}", response_model=List[UserResponse])
-async def search_users(username: str, db: Session = Depends(get_db)):
+async def search_users(username: str, db: AsyncSession = Depends(get_read_db)):
     """
     Kullanıcı adına göre arama yapar.
+    Önek eşleşmeleri önce gelir; alt dizi araması trigram index'i ile yapılır.
     """
-    users = db.query(User).filter(
-        User.username.ilike(f"%{username}%")
-    ).limit(20).all()
-    
-    return users
+    return await db.run_sync(search_usernames, username, 20)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -27,6 +27,13 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserSuggestion(BaseModel):
+    """Otomatik tamamlama için küçük kullanıcı kaydı"""
+    id: int
+    username: str
+    picture: Optional[str] = None
+
+
 class UserUpdate(BaseModel):
     """Kullanıcı güncelleme için schema"""
     username: Optional[str] = None
@@ -52,6 +59,14 @@ class UserStats(BaseModel):
     badges: list = []
 
 
+class TimelinePoint(BaseModel):
+    """Zaman çizelgesinde tek bir dönem (gün, ay veya yıl)"""
+    period: str  # 2025-01-31, 2025-01 veya 2025
+    watch_count: int
+    rating_count: int
+    average_rating: Optional[float] = None
+
+
 # ==================== FILM SCHEMAS ====================
 
 class FilmBase(BaseModel):
@@ -81,6 +96,31 @@ class FilmUpdate(BaseModel):
     is_watchlist: Optional[bool] = None
 
 
+class FilmBatchUpdate(FilmUpdate):
+    """Toplu işlemde tek bir filmin güncellemesi"""
+    film_id: int
+
+
+class FilmBatchRequest(BaseModel):
+    """Toplu film güncelleme/silme isteği"""
+    updates: List[FilmBatchUpdate] = Field(default_factory=list, max_length=500)
+    deletes: List[int] = Field(default_factory=list, max_length=500)
+
+
+class FilmBatchItemResult(BaseModel):
+    """Toplu işlemde tek öğenin sonucu"""
+    film_id: int
+    action: str  # update, delete
+    status: str  # ok, not_found, conflict
+
+
+class FilmBatchResponse(BaseModel):
+    """Toplu film işlemi sonucu"""
+    results: List[FilmBatchItemResult]
+    updated: int
+    deleted: int
+
+
 class FilmResponse(FilmBase):
     """Film response schema"""
     id: int
@@ -96,6 +136,39 @@ class FilmResponse(FilmBase):
         from_attributes = True
 
 
+class FilmListItem(BaseModel):
+    """Film listesi öğesi - seyrek alan seçiminde (fields) sadece istenen alanlar döner"""
+    id: Optional[int] = None
+    user_id: Optional[int] = None
+    tmdb_id: Optional[int] = None
+    title: Optional[str] = None
+    poster_path: Optional[str] = None
+    release_date: Optional[str] = None
+    overview: Optional[str] = None
+    kisisel_puan: Optional[float] = None
+    kisisel_yorum: Optional[str] = None
+    izlendi: Optional[bool] = None
+    is_favorite: Optional[bool] = None
+    is_watchlist: Optional[bool] = None
+    izlenme_tarihi: Optional[datetime] = None
+
+
+class ImportJobResponse(BaseModel):
+    """Toplu içe aktarma işinin durumu"""
+    id: str
+    status: str  # queued, running, completed, failed
+    source: str  # auto, letterboxd, imdb
+    watchlist: bool
+    processed_rows: int
+    imported: int
+    skipped: int
+    unresolved: int
+    unresolved_titles: List[str] = []
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
 # ==================== FRIENDSHIP SCHEMAS ====================
 
 class FriendshipCreate(BaseModel):
@@ -189,6 +262,38 @@ class CompatibilityScore(BaseModel):
     user1_total_films: int
     user2_total_films: int
     compatibility_percentage: float
+    rating_correlation: Optional[float] = None  # Ortak puanlanan filmlerde Pearson korelasyonu (-1..1)
+    co_rated_films: Optional[int] = None
+
+
+class FriendSuggestionResponse(BaseModel):
+    """Arkadaş önerisi (ikinci derece bağlantı)"""
+    user: UserResponse
+    mutual_friends: int
+    library_overlap: float  # Kütüphane benzerliği (Jaccard, 0-1)
+    score: float
+    
+    class Config:
+        from_attributes = True
+
+
+class FriendRating(BaseModel):
+    """Bir filmi izleyen arkadaş ve verdiği puan"""
+    film_id: int
+    user_id: int
+    username: str
+    picture: Optional[str] = None
+    kisisel_puan: Optional[float] = None
+    izlenme_tarihi: datetime
+
+
+class FriendsWatched(BaseModel):
+    """Bir filmi izleyen arkadaşların özeti"""
+    tmdb_id: int
+    friend_count: int
+    rated_count: int
+    average_rating: Optional[float] = None
+    friends: List[FriendRating] = []
 
 
 class FeedItem(BaseModel):
@@ -0,0 +1,54 @@
+"""
+Test ortamı: geçici SQLite veritabanı üzerinde uygulama.
+
+DATABASE_URL, uygulama modülleri import edilmeden önce ayarlanmalı; bu yüzden
+burada en başta yapılır. TEST_DATABASE_URL verilirse (ör. boş bir PostgreSQL veritabanı)
+testler onun üzerinde çalışır; eşzamanlılık testleri gerçek satır kilitlerini orada sınar.
+Startup olayları (model eğitimi, arka plan döngüleri) çalıştırılmaz, şema doğrudan
+init_db ile kurulur.
+"""
+import os
+import re
+import sys
+import tempfile
+
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ.setdefault("TMDB_API_KEY", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+_QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    from database import init_db
+
+    init_db()
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def db(client):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def auth_headers(user_id: int) -> dict:
+    from routers.auth import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def query_count(response) -> int:
+    """İsteğin çalıştırdığı SQL sayısı (RequestMetricsMiddleware'in Server-Timing değeri)"""
+    return int(_QUERY_COUNT.search(response.headers["server-timing"]).group(1))
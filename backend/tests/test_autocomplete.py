@@ -0,0 +1,51 @@
+"""
+Kullanıcı adı otomatik tamamlama: önek ağacı istek yolunda kurulmaz, kurulmamışsa veya
+kullanıcı sayısı sınırın üstündeyse index'li önek sorgusuna düşülür.
+"""
+import pytest
+
+from models import User
+from utils.user_search import UsernameTrie, username_trie
+
+
+@pytest.fixture(scope="module")
+def users(client):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    session.add_all([
+        User(username=name, email=f"{name}@example.com")
+        for name in ("zeynep", "zeynepk", "zeytin", "zebra_fan")
+    ])
+    session.commit()
+    session.close()
+
+
+def test_endpoint_falls_back_to_prefix_query_without_trie(client, users):
+    assert username_trie.complete("zey") is None
+
+    response = client.get("/api/users/autocomplete", params={"q": "zey"})
+
+    assert response.status_code == 200
+    assert [user["username"] for user in response.json()] == ["zeynep", "zeynepk", "zeytin"]
+
+
+def test_trie_serves_shortest_names_and_keeps_serving_while_stale(users):
+    trie = UsernameTrie()
+    assert trie.needs_rebuild()
+    assert trie.build() >= 4
+
+    assert [user["username"] for user in trie.complete("zey")] == ["zeynep", "zeytin", "zeynepk"]
+
+    trie.invalidate()
+    trie.add(10**6, "zeyd")
+    assert trie.needs_rebuild()
+    assert [user["username"] for user in trie.complete("zey", 2)] == ["zeyd", "zeynep"]
+
+
+def test_trie_is_not_kept_above_user_limit(users):
+    trie = UsernameTrie(max_users=2)
+
+    assert trie.build() is None
+    assert trie.complete("zey") is None
+    assert not trie.needs_rebuild()
@@ -0,0 +1,36 @@
+"""
+TTLCache: kayıt sayısı (LRU) ve bayt bütçesi sınırları.
+"""
+from utils.cache import TTLCache
+
+
+def test_byte_budget_evicts_oldest_entries():
+    cache = TTLCache(maxsize=100, ttl=60, maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache.nbytes == 8
+
+
+def test_byte_budget_tracks_replacements_and_skips_oversized_values():
+    cache = TTLCache(maxsize=100, ttl=60, maxbytes=10)
+    cache.set("a", b"12345678")
+    cache.set("a", b"12")
+    cache.set("huge", b"x" * 11)
+
+    assert cache.get("huge") is None
+    assert cache.nbytes == 2
+    cache.delete("a")
+    assert cache.nbytes == 0 and len(cache) == 0
+
+
+def test_expired_entries_release_their_bytes():
+    cache = TTLCache(maxsize=100, ttl=60, maxbytes=10)
+    cache.set("a", b"123", ttl=-1)
+
+    assert cache.get("a") is None
+    assert cache.nbytes == 0
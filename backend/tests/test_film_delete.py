@@ -0,0 +1,27 @@
+"""
+DELETE /api/movies/{film_id}: filme bağlı beğeni ve yorumlar filmle birlikte silinir.
+"""
+from conftest import auth_headers
+from models import ActivityComment, ActivityLike, Film, User
+
+
+def test_delete_film_removes_likes_and_comments(client, db):
+    owner = User(username="delete_owner", email="delete_owner@example.com")
+    friend = User(username="delete_friend", email="delete_friend@example.com")
+    db.add_all([owner, friend])
+    db.flush()
+    film = Film(user_id=owner.id, tmdb_id=720000, title="Silinecek", izlendi=True)
+    db.add(film)
+    db.flush()
+    db.add(ActivityLike(user_id=friend.id, film_id=film.id))
+    db.add(ActivityComment(user_id=friend.id, film_id=film.id, content="güzel film"))
+    db.commit()
+    film_id = film.id
+
+    response = client.delete(f"/api/movies/{film_id}", headers=auth_headers(owner.id))
+
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.get(Film, film_id) is None
+    assert db.query(ActivityLike).filter(ActivityLike.film_id == film_id).count() == 0
+    assert db.query(ActivityComment).filter(ActivityComment.film_id == film_id).count() == 0
@@ -0,0 +1,58 @@
+"""
+RequestMetricsMiddleware: BackgroundTasks yanıt gönderildikten sonra çalışır; süresi,
+aktif istek sayısı ve SQL sorguları isteğe sayılmamalı.
+"""
+import time
+
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from utils.metrics import http_request_duration, http_requests_in_flight
+from utils.middleware import RequestMetricsMiddleware
+from utils.query_stats import route_query_metrics
+
+BACKGROUND_SECONDS = 0.3
+
+
+def _metric_value(metric, suffix: str, route: str) -> float:
+    for line in metric.collect():
+        if line.startswith(f"{metric.name}{suffix}") and f'route="{route}"' in line:
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def _in_flight() -> float:
+    lines = [line for line in http_requests_in_flight.collect() if not line.startswith("#")]
+    return float(lines[0].rsplit(" ", 1)[1]) if lines else 0.0
+
+
+def test_background_tasks_are_not_counted_as_request_time(client):
+    from database import engine
+
+    observed = {}
+
+    def slow_job():
+        observed["in_flight"] = _in_flight()
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        time.sleep(BACKGROUND_SECONDS)
+
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.post("/metrics-test/background")
+    async def start_job(background_tasks: BackgroundTasks):
+        background_tasks.add_task(slow_job)
+        return {"status": "accepted"}
+
+    in_flight_before = _in_flight()
+    response = TestClient(app).post("/metrics-test/background")
+
+    assert response.status_code == 200
+    route = "/metrics-test/background"
+    assert _metric_value(http_request_duration, "_count", route) == 1
+    assert _metric_value(http_request_duration, "_sum", route) < BACKGROUND_SECONDS
+    assert observed["in_flight"] == in_flight_before
+    assert _in_flight() == in_flight_before
+    assert route_query_metrics.snapshot()[("POST", route)]["queries"] == 0
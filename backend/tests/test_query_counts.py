@@ -0,0 +1,81 @@
+"""
+N+1 kontrolü: liste endpoint'lerinin SQL sayısı kayıt sayısıyla (N) büyümemeli.
+Aynı veri şekli N=1 ve N=20 için ayrı kullanıcılarla kurulur, sorgu sayıları karşılaştırılır.
+"""
+import pytest
+
+from conftest import auth_headers, query_count
+from models import ActivityComment, ActivityLike, Film, Friendship, User
+
+
+def seed_social(db, n: int) -> dict:
+    """
+    Hedef kullanıcı için n bekleyen arkadaşlık isteği, n inceleme (kendi filmleri),
+    tek bir filmde n inceleme (n farklı kullanıcıdan) ve n beğeni + n yorum kurar.
+    """
+    tmdb_id = 900000 + n
+    target = User(username=f"nplus_target_{n}", email=f"nplus_target_{n}@example.com")
+    db.add(target)
+    db.flush()
+
+    activity_film = Film(user_id=target.id, tmdb_id=tmdb_id + 1000, title="Aktivite", izlendi=True)
+    db.add(activity_film)
+    db.flush()
+
+    for i in range(n):
+        other = User(username=f"nplus_{n}_{i}", email=f"nplus_{n}_{i}@example.com")
+        db.add(other)
+        db.flush()
+        db.add(Friendship(user_id=other.id, friend_id=target.id, status="pending"))
+        db.add(Film(user_id=other.id, tmdb_id=tmdb_id, title="Ortak", izlendi=True, kisisel_yorum=f"yorum {i}"))
+        db.add(Film(user_id=target.id, tmdb_id=tmdb_id + 2000 + i, title=f"Film {i}", izlendi=True, kisisel_yorum="güzel"))
+        db.add(ActivityLike(user_id=other.id, film_id=activity_film.id))
+        db.add(ActivityComment(user_id=other.id, film_id=activity_film.id, content=f"yorum {i}"))
+
+    db.commit()
+    return {"user_id": target.id, "tmdb_id": tmdb_id, "film_id": activity_film.id}
+
+
+ENDPOINTS = {
+    "friend_requests": lambda seed: ("/api/social/friends/requests", True),
+    "movie_reviews": lambda seed: (f"/api/movies/tmdb/{seed['tmdb_id']}/reviews", False),
+    "user_reviews": lambda seed: (f"/api/users/{seed['user_id']}/reviews", False),
+    "interactions": lambda seed: (f"/api/social/activity/{seed['film_id']}/interactions", True),
+}
+
+
+@pytest.fixture(scope="module")
+def seeds(client):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        return {n: seed_social(session, n) for n in (1, 20)}
+    finally:
+        session.close()
+
+
+def _get(client, seed, endpoint):
+    path, needs_auth = ENDPOINTS[endpoint](seed)
+    response = client.get(path, headers=auth_headers(seed["user_id"]) if needs_auth else None)
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_query_count_does_not_grow_with_n(client, seeds, endpoint):
+    small = _get(client, seeds[1], endpoint)
+    large = _get(client, seeds[20], endpoint)
+
+    assert query_count(small) == query_count(large), (
+        f"{endpoint}: N=1 -> {query_count(small)} sorgu, N=20 -> {query_count(large)} sorgu"
+    )
+
+
+def test_seeded_rows_are_returned(client, seeds):
+    seed = seeds[20]
+    assert len(_get(client, seed, "friend_requests").json()) == 20
+    assert len(_get(client, seed, "movie_reviews").json()) == 20
+    assert len(_get(client, seed, "user_reviews").json()) == 20
+    interactions = _get(client, seed, "interactions").json()
+    assert interactions["like_count"] == 20 and len(interactions["comments"]) == 20
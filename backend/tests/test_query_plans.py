@@ -0,0 +1,17 @@
+"""
+Sıcak sorgular index kullanmalı: benchmarks/explain_hot_queries.py'deki sorgu listesi
+EXPLAIN (SQLite: EXPLAIN QUERY PLAN) ile planlanır, tam tablo taraması olmamalı.
+"""
+import pytest
+
+from benchmarks.explain_hot_queries import full_scans, hot_queries
+
+
+@pytest.mark.parametrize("name", list(hot_queries()))
+def test_hot_query_uses_index(client, name):
+    from database import engine
+
+    with engine.connect() as connection:
+        scans, plan = full_scans(connection, hot_queries()[name])
+
+    assert scans == [], f"{name}: {plan}"
@@ -0,0 +1,28 @@
+"""
+Read-your-writes: arkadaşlık değişikliği iki tarafı da etkiler; ikisi de yakın zamanda
+yazmış sayılmalı (okumaları ve stats önbelleği replikadan beslenmemeli).
+"""
+from conftest import auth_headers
+from models import Friendship, User
+
+
+def test_accepting_a_request_marks_both_participants(client, db):
+    from database import recent_writers
+
+    sender = User(username="ryw_sender", email="ryw_sender@example.com")
+    recipient = User(username="ryw_recipient", email="ryw_recipient@example.com")
+    db.add_all([sender, recipient])
+    db.flush()
+    request = Friendship(user_id=sender.id, friend_id=recipient.id, status="pending")
+    db.add(request)
+    db.commit()
+
+    response = client.put(
+        f"/api/social/friends/requests/{request.id}",
+        json={"status": "accepted"},
+        headers=auth_headers(recipient.id)
+    )
+
+    assert response.status_code == 200
+    assert recent_writers.get(recipient.id) is True
+    assert recent_writers.get(sender.id) is True
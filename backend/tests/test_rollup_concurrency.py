@@ -0,0 +1,144 @@
+"""
+Aynı kullanıcı ve ay için eşzamanlı film yazmaları: aktivite özetleri hiçbir yazmayı
+kaybetmemeli ve unique kısıtına (uq_user_rollup) takılmamalı.
+"""
+import asyncio
+import threading
+from datetime import datetime
+
+import httpx
+
+from conftest import auth_headers
+from models import ActivityRollup, Film, User
+from utils.rollups import DAY, MONTH, rebuild_rollups, refresh_rollup_buckets
+
+WRITERS = 8
+
+
+def _add_and_refresh(user_id: int, tmdb_id: int, watched_at: datetime, barrier: threading.Barrier, errors: list):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        barrier.wait()
+        session.add(Film(user_id=user_id, tmdb_id=tmdb_id, title=f"Film {tmdb_id}", izlendi=True,
+                         kisisel_puan=8.0, izlenme_tarihi=watched_at))
+        session.flush()
+        refresh_rollup_buckets(session, user_id, [watched_at])
+        session.commit()
+    except Exception as e:  # testte raporlanır
+        session.rollback()
+        errors.append(e)
+    finally:
+        session.close()
+
+
+def test_concurrent_same_month_writes_are_all_counted(db):
+    user = User(username="rollup_race", email="rollup_race@example.com")
+    db.add(user)
+    db.commit()
+
+    barrier = threading.Barrier(WRITERS)
+    errors: list = []
+    threads = [
+        threading.Thread(
+            target=_add_and_refresh,
+            args=(user.id, 700000 + i, datetime(2024, 3, 1 + i % 2, 20, 0), barrier, errors)
+        )
+        for i in range(WRITERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db.expire_all()
+    rows = db.query(ActivityRollup).filter(ActivityRollup.user_id == user.id, ActivityRollup.genre == "").all()
+    by_period = {(row.granularity, row.period): row for row in rows}
+
+    assert len(by_period) == len(rows)
+    month = by_period[(MONTH, "2024-03")]
+    assert month.watch_count == WRITERS
+    assert month.rating_count == WRITERS
+    assert by_period[(DAY, "2024-03-01")].watch_count + by_period[(DAY, "2024-03-02")].watch_count == WRITERS
+    assert db.query(Film).filter(Film.user_id == user.id).count() == WRITERS
+
+
+def _rebuild(user_id: int, barrier: threading.Barrier, errors: list):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        barrier.wait()
+        for _ in range(3):
+            rebuild_rollups(session, user_id)
+    except Exception as e:  # testte raporlanır
+        session.rollback()
+        errors.append(e)
+    finally:
+        session.close()
+
+
+def test_rebuild_racing_with_adds_keeps_every_film(db):
+    """İçe aktarma sonrası rebuild_rollups, eşzamanlı film eklemeleriyle aynı kullanıcıda"""
+    user = User(username="rebuild_race", email="rebuild_race@example.com")
+    db.add(user)
+    db.flush()
+    db.add_all([
+        Film(user_id=user.id, tmdb_id=730000 + i, title=f"Eski {i}", izlendi=True, izlenme_tarihi=datetime(2024, 5, 2))
+        for i in range(3)
+    ])
+    db.commit()
+
+    barrier = threading.Barrier(WRITERS + 1)
+    errors: list = []
+    threads = [threading.Thread(target=_rebuild, args=(user.id, barrier, errors))] + [
+        threading.Thread(
+            target=_add_and_refresh,
+            args=(user.id, 731000 + i, datetime(2024, 5, 3, 12, 0), barrier, errors)
+        )
+        for i in range(WRITERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db.expire_all()
+    month = db.query(ActivityRollup).filter(
+        ActivityRollup.user_id == user.id,
+        ActivityRollup.granularity == MONTH,
+        ActivityRollup.period == "2024-05",
+        ActivityRollup.genre == ""
+    ).one()
+    assert month.watch_count == WRITERS + 3
+
+
+def test_concurrent_add_film_requests(client, db):
+    """POST /api/movies/add aynı anda: aynı film tek satır olur, farklı filmlerin hepsi sayılır"""
+    user = User(username="add_race", email="add_race@example.com")
+    db.add(user)
+    db.commit()
+    headers = auth_headers(user.id)
+
+    async def post_all():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            bodies = [{"tmdb_id": 710000 + i, "title": f"Film {i}", "izlendi": True} for i in range(WRITERS)]
+            bodies += [{"tmdb_id": 719999, "title": "Aynı film", "izlendi": True}] * WRITERS
+            return await asyncio.gather(*(http.post("/api/movies/add", json=body, headers=headers) for body in bodies))
+
+    responses = asyncio.run(post_all())
+
+    assert [response.status_code for response in responses] == [200] * (2 * WRITERS)
+    assert db.query(Film).filter(Film.user_id == user.id).count() == WRITERS + 1
+    month_key = datetime.utcnow().strftime("%Y-%m")
+    month = db.query(ActivityRollup).filter(
+        ActivityRollup.user_id == user.id,
+        ActivityRollup.granularity == MONTH,
+        ActivityRollup.period == month_key,
+        ActivityRollup.genre == ""
+    ).one()
+    assert month.watch_count == WRITERS + 1
@@ -0,0 +1,23 @@
+"""
+Süre önbelleği: yeni süre saklanınca, varsayılan süreyle önbelleğe alınmış istatistikler
+temizlenmeli.
+"""
+from models import Film, User
+from utils.runtimes import _store_runtimes
+from utils.stats import AVERAGE_MOVIE_MINUTES
+
+
+def test_storing_runtime_invalidates_cached_stats(client, db):
+    user = User(username="runtime_owner", email="runtime_owner@example.com")
+    db.add(user)
+    db.flush()
+    db.add(Film(user_id=user.id, tmdb_id=740000, title="Süresiz", izlendi=True))
+    db.commit()
+
+    before = client.get(f"/api/users/{user.id}/stats").json()
+    assert before["total_watch_time"] == AVERAGE_MOVIE_MINUTES
+
+    _store_runtimes({("tmdb", 740000): (95, [])})
+
+    after = client.get(f"/api/users/{user.id}/stats").json()
+    assert after["total_watch_time"] == 95
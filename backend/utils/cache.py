@@ -0,0 +1,92 @@
+"""
+Süreç içi (in-process) TTL + LRU önbellek.
+İstatistik snapshot'ları ve harici API yanıtları gibi kısa ömürlü veriler için kullanılır.
+"""
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Hashable, List, Optional
+from weakref import WeakSet
+
+
+class TTLCache:
+    """
+    Süre sınırlı (TTL) ve boyut sınırlı (LRU) basit önbellek.
+    maxbytes verilirse değerler bayt dizisi olmalıdır; toplam boyut bu bütçeyi aşınca en
+    eski kayıtlar atılır, bütçeden büyük tek bir değer hiç saklanmaz.
+    """
+
+    # İsimli önbellekler /metrics için izlenir
+    _named: "WeakSet[TTLCache]" = WeakSet()
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, name: Optional[str] = None, maxbytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = RLock()
+        if name:
+            TTLCache._named.add(self)
+
+    @classmethod
+    def instances(cls) -> List["TTLCache"]:
+        """İsim verilmiş, hâlâ kullanılan önbellekler"""
+        return sorted(cls._named, key=lambda cache: cache.name)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _size(self, value: Any) -> int:
+        return len(value) if self.maxbytes is not None else 0
+
+    def _pop(self, key: Hashable):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.nbytes -= self._size(entry[1])
+
+    def _evict_oldest(self):
+        _, (_, value) = self._data.popitem(last=False)
+        self.nbytes -= self._size(value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Geçerli kayıt varsa döndürür, süresi dolmuşsa siler"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._pop(key)
+            size = self._size(value)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self.nbytes += size
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes):
+                self._evict_oldest()
+
+    def delete(self, *keys: Hashable):
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
@@ -0,0 +1,100 @@
+"""
+Toplu film güncelleme/silme (çoklu seçim işlemleri).
+
+Tüm işlemler tek transaction'da, küme tabanlı ifadelerle yapılır:
+- Sahiplik tek bir SELECT ile doğrulanır
+- Aynı değişikliği alan filmler tek bir UPDATE ... WHERE id IN (...) ile güncellenir
+- Silinen filmlerin beğeni/yorumları ve kendileri birer DELETE ile silinir
+- Etkilenen ayların aktivite özetleri bir kez tazelenir
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from models import ActivityComment, ActivityLike, Film
+from utils.rollups import ROLLUP_FIELDS, refresh_rollup_buckets
+
+
+def apply_film_batch(db: Session, user_id: int, updates: List[dict], deletes: List[int]) -> Tuple[List[dict], List[int]]:
+    """
+    Güncellemeleri ve silmeleri uygular (commit etmez).
+    updates: {"film_id": ..., <FilmUpdate alanları>} sözlükleri
+    Returns: (öğe bazlı sonuçlar, silinen filmlerin tmdb_id'leri)
+    """
+    user_id = int(user_id)
+    delete_ids = list(dict.fromkeys(deletes))
+    delete_set = set(delete_ids)
+
+    # Aynı filme gelen birden fazla güncelleme sırayla birleştirilir
+    merged: Dict[int, dict] = {}
+    for item in updates:
+        changes = {key: value for key, value in item.items() if key != "film_id"}
+        merged.setdefault(item["film_id"], {}).update(changes)
+
+    requested_ids = set(merged) | delete_set
+    owned = {
+        row.id: row
+        for row in db.query(Film.id, Film.tmdb_id, Film.izlendi, Film.izlenme_tarihi).filter(
+            Film.user_id == user_id,
+            Film.id.in_(requested_ids)
+        ).all()
+    } if requested_ids else {}
+
+    results = []
+    rollup_dates = []
+
+    # Güncellemeler: aynı değişiklik kümesine sahip filmler gruplanır
+    groups: Dict[tuple, List[int]] = defaultdict(list)
+    for film_id, changes in merged.items():
+        if film_id not in owned:
+            results.append({"film_id": film_id, "action": "update", "status": "not_found"})
+        elif film_id in delete_set:
+            # Aynı istekte silinen film güncellenmez
+            results.append({"film_id": film_id, "action": "update", "status": "conflict"})
+        else:
+            groups[tuple(sorted(changes.items()))].append(film_id)
+            results.append({"film_id": film_id, "action": "update", "status": "ok"})
+            film = owned[film_id]
+            if ROLLUP_FIELDS.intersection(changes) and (film.izlendi or changes.get("izlendi")):
+                rollup_dates.append(film.izlenme_tarihi)
+
+    for changes, film_ids in groups.items():
+        if not changes:
+            continue
+        db.execute(
+            update(Film)
+            .where(Film.user_id == user_id, Film.id.in_(film_ids))
+            .values(**dict(changes))
+            .execution_options(synchronize_session=False)
+        )
+
+    # Silmeler: önce bağımlı beğeni/yorumlar, sonra filmler
+    deleted_ids = [film_id for film_id in delete_ids if film_id in owned]
+    for film_id in delete_ids:
+        results.append({
+            "film_id": film_id,
+            "action": "delete",
+            "status": "ok" if film_id in owned else "not_found"
+        })
+
+    deleted_tmdb_ids = []
+    if deleted_ids:
+        db.execute(delete(ActivityLike).where(ActivityLike.film_id.in_(deleted_ids)))
+        db.execute(delete(ActivityComment).where(ActivityComment.film_id.in_(deleted_ids)))
+        db.execute(
+            delete(Film)
+            .where(Film.user_id == user_id, Film.id.in_(deleted_ids))
+            .execution_options(synchronize_session=False)
+        )
+        for film_id in deleted_ids:
+            film = owned[film_id]
+            deleted_tmdb_ids.append(film.tmdb_id)
+            if film.izlendi:
+                rollup_dates.append(film.izlenme_tarihi)
+
+    if rollup_dates:
+        refresh_rollup_buckets(db, user_id, rollup_dates)
+
+    return results, deleted_tmdb_ids
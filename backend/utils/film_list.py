@@ -0,0 +1,81 @@
+"""
+Kullanıcı film listesi sorgusu (my-list ve /users/{id}/films ortak mantığı).
+
+- Cursor (keyset) sayfalama: film id'sine göre artan sırada, OFFSET kullanılmaz;
+  sonraki sayfa `id > cursor` ile (user_id, id) index'inden okunur.
+- Sunucu tarafı filtreler: izlendi, is_favorite, is_watchlist ve puan aralığı.
+  Modeldeki kısmi/bileşik index'ler bu filtrelere karşılık gelir.
+- Seyrek alan seçimi (fields): sadece istenen kolonlar SELECT edilir, böylece liste
+  görünümleri overview gibi uzun metinleri hiç okumaz.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import Film
+from schemas import FilmResponse
+
+FILM_LIST_FIELDS = tuple(FilmResponse.model_fields)
+MAX_PAGE_SIZE = 500
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Virgülle ayrılmış alan listesini doğrular. Boşsa tüm alanlar döner.
+    Cursor için id her zaman dahil edilir. Geçersiz alanda ValueError fırlatır.
+    """
+    if not fields:
+        return list(FILM_LIST_FIELDS)
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in FILM_LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Geçersiz alan(lar): {', '.join(unknown)}")
+
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def query_film_list(
+    db: Session,
+    user_id: int,
+    fields: List[str],
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+    izlendi: Optional[bool] = None,
+    is_favorite: Optional[bool] = None,
+    is_watchlist: Optional[bool] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None
+) -> Tuple[List[dict], Optional[int]]:
+    """
+    Filtrelenmiş film listesini döndürür.
+    Returns: (filmler, sonraki cursor) - son sayfada cursor None'dur
+    """
+    query = db.query(*(getattr(Film, field) for field in fields)).filter(Film.user_id == user_id)
+
+    if izlendi is not None:
+        query = query.filter(Film.izlendi == izlendi)
+    if is_favorite is not None:
+        query = query.filter(Film.is_favorite == is_favorite)
+    if is_watchlist is not None:
+        query = query.filter(Film.is_watchlist == is_watchlist)
+    if min_rating is not None:
+        query = query.filter(Film.kisisel_puan >= min_rating)
+    if max_rating is not None:
+        query = query.filter(Film.kisisel_puan <= max_rating)
+    if cursor is not None:
+        query = query.filter(Film.id > cursor)
+
+    query = query.order_by(Film.id)
+    if limit is not None:
+        # Bir fazla satır okuyarak sonraki sayfanın varlığını anla
+        query = query.limit(limit + 1)
+
+    films = [row._asdict() for row in query.all()]
+
+    next_cursor = None
+    if limit is not None and len(films) > limit:
+        films = films[:limit]
+        next_cursor = films[-1]["id"]
+
+    return films, next_cursor
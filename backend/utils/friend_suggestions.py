@@ -0,0 +1,206 @@
+"""
+Arkadaş önerisi motoru (friend-of-friend).
+
+Kabul edilmiş arkadaşlık grafiği seyrek bir komşuluk matrisi (A) olarak kurulur.
+A @ A çarpımı her kullanıcı çifti için ortak arkadaş sayısını verir. Zaten arkadaş
+olanlar, bekleyen istekler ve kullanıcının kendisi elenir. Kalan adaylar ortak arkadaş
+sayısı ve kütüphane benzerliği (Jaccard) ile puanlanır.
+
+Hesaplama satır blokları halinde yapılır, böylece 1M kenarlı grafiklerde bile bellek
+kullanımı sınırlı kalır. Sonuçlar friend_suggestions tablosuna yazılır ve istek
+yolunda tek bir index'li okuma yeterli olur.
+"""
+import asyncio
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, insert, select, union
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal
+from models import Film, Friendship, FriendSuggestion
+
+settings = get_settings()
+
+# Kütüphane benzerliğinin (0-1) skora katkısı; ortak arkadaş sayısı önceliklidir
+LIBRARY_OVERLAP_WEIGHT = 2.0
+# Kütüphane benzerliği hesaplanacak aday havuzu (top_k'nın katı)
+CANDIDATE_POOL_FACTOR = 3
+BLOCK_SIZE = 2048
+INSERT_CHUNK_SIZE = 5000
+
+
+def _symmetric_matrix(rows: np.ndarray, cols: np.ndarray, size: int) -> sparse.csr_matrix:
+    """Kenar listesinden simetrik, ikili (0/1) CSR matrisi oluşturur"""
+    data = np.ones(len(rows) * 2, dtype=np.float32)
+    matrix = sparse.csr_matrix(
+        (data, (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+        shape=(size, size)
+    )
+    matrix.data[:] = 1.0  # Çift yönlü kayıtlar toplanmış olabilir
+    return matrix
+
+
+def _top_k_per_row(rows: np.ndarray, values: np.ndarray, k: int) -> np.ndarray:
+    """Her satırın en yüksek k değerini seçen maskeyi döndürür (vektörel)"""
+    if not len(rows):
+        return np.zeros(0, dtype=bool)
+    order = np.lexsort((-values, rows))
+    sorted_rows = rows[order]
+    row_starts = np.searchsorted(sorted_rows, sorted_rows, side="left")
+    rank = np.arange(len(sorted_rows)) - row_starts
+    mask = np.zeros(len(rows), dtype=bool)
+    mask[order[rank < k]] = True
+    return mask
+
+
+def compute_friend_suggestions(db: Session, top_k: int = 20):
+    """
+    Tüm kullanıcılar için öneri adaylarını hesaplar.
+    Returns: (user_id, suggested_user_id, mutual_friends, library_overlap, score) satırları
+    """
+    accepted = np.array(
+        db.query(Friendship.user_id, Friendship.friend_id).filter(
+            Friendship.status == "accepted"
+        ).all(),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    if not len(accepted):
+        return []
+
+    # Bekleyen istekler de aday olarak gösterilmemeli
+    pending = np.array(
+        db.query(Friendship.user_id, Friendship.friend_id).filter(
+            Friendship.status == "pending"
+        ).all(),
+        dtype=np.int64
+    ).reshape(-1, 2)
+
+    # Kullanıcı ID'lerini 0..n-1 aralığına sıkıştır
+    user_ids = np.unique(np.concatenate([accepted.ravel(), pending.ravel()]))
+    size = len(user_ids)
+    accepted_idx = np.searchsorted(user_ids, accepted)
+    pending_idx = np.searchsorted(user_ids, pending)
+
+    adjacency = _symmetric_matrix(accepted_idx[:, 0], accepted_idx[:, 1], size)
+    excluded = (
+        adjacency
+        + _symmetric_matrix(pending_idx[:, 0], pending_idx[:, 1], size)
+        + sparse.identity(size, dtype=np.float32, format="csr")
+    ).tocsr()
+    excluded.data[:] = 1.0
+
+    # Kullanıcı x film ikili matrisi (sadece grafikteki kullanıcılar). Grafikteki kullanıcılar
+    # SQL'de alt sorguyla seçilir: kullanıcı başına bir bind parametresi oluşmaz
+    graph_statuses = ("accepted", "pending")
+    graph_users = union(
+        select(Friendship.user_id).where(Friendship.status.in_(graph_statuses)),
+        select(Friendship.friend_id).where(Friendship.status.in_(graph_statuses))
+    )
+    film_rows = np.array(
+        db.query(Film.user_id, Film.tmdb_id).filter(
+            Film.user_id.in_(graph_users)
+        ).all(),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    film_ids, film_cols = np.unique(film_rows[:, 1], return_inverse=True)
+    libraries = sparse.csr_matrix(
+        (
+            np.ones(len(film_rows), dtype=np.float32),
+            (np.searchsorted(user_ids, film_rows[:, 0]), film_cols.ravel())
+        ),
+        shape=(size, max(len(film_ids), 1))
+    )
+    library_sizes = libraries.getnnz(axis=1)
+
+    pool_size = top_k * CANDIDATE_POOL_FACTOR
+    suggestions = []
+
+    for start in range(0, size, BLOCK_SIZE):
+        end = min(start + BLOCK_SIZE, size)
+
+        # Ortak arkadaş sayıları: (A @ A) bloğu, elenenler çıkarılır
+        mutual = adjacency[start:end] @ adjacency
+        mutual = (mutual - mutual.multiply(excluded[start:end])).tocoo()
+        mutual.eliminate_zeros()
+        if not mutual.nnz:
+            continue
+
+        rows = mutual.row.astype(np.int64) + start
+        cols = mutual.col.astype(np.int64)
+        counts = mutual.data
+
+        # Önce ortak arkadaşa göre aday havuzunu daralt
+        pool = _top_k_per_row(rows, counts, pool_size)
+        rows, cols, counts = rows[pool], cols[pool], counts[pool]
+
+        # Havuzdaki çiftler için kütüphane kesişimi ve Jaccard benzerliği
+        common = np.asarray(libraries[rows].multiply(libraries[cols]).sum(axis=1)).ravel()
+        union_sizes = library_sizes[rows] + library_sizes[cols] - common
+        with np.errstate(divide="ignore", invalid="ignore"):
+            overlap = np.where(union_sizes > 0, common / union_sizes, 0.0)
+
+        scores = counts + LIBRARY_OVERLAP_WEIGHT * overlap
+        best = _top_k_per_row(rows, scores, top_k)
+
+        for row, col, count, jaccard, score in zip(
+            rows[best], cols[best], counts[best], overlap[best], scores[best]
+        ):
+            suggestions.append((
+                int(user_ids[row]),
+                int(user_ids[col]),
+                int(count),
+                round(float(jaccard), 4),
+                round(float(score), 4)
+            ))
+
+    return suggestions
+
+
+def refresh_friend_suggestions() -> int:
+    """
+    Önerileri yeniden hesaplar ve friend_suggestions tablosunu tek transaction'da yeniler.
+    Returns: yazılan öneri sayısı
+    """
+    db = SessionLocal()
+    try:
+        suggestions = compute_friend_suggestions(db, top_k=settings.friend_suggestion_top_k)
+        computed_at = datetime.utcnow()
+
+        db.execute(delete(FriendSuggestion))
+        for start in range(0, len(suggestions), INSERT_CHUNK_SIZE):
+            chunk = suggestions[start:start + INSERT_CHUNK_SIZE]
+            db.execute(
+                insert(FriendSuggestion),
+                [
+                    {
+                        "user_id": user_id,
+                        "suggested_user_id": suggested_user_id,
+                        "mutual_friends": mutual_friends,
+                        "library_overlap": library_overlap,
+                        "score": score,
+                        "computed_at": computed_at
+                    }
+                    for user_id, suggested_user_id, mutual_friends, library_overlap, score in chunk
+                ]
+            )
+        db.commit()
+        return len(suggestions)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def friend_suggestion_loop():
+    """Önerileri periyodik olarak arka planda (thread'de) yeniden hesaplar"""
+    while True:
+        try:
+            count = await asyncio.to_thread(refresh_friend_suggestions)
+            print(f"✅ Arkadaş önerileri güncellendi ({count} öneri)")
+        except Exception as e:
+            print(f"⚠️ Arkadaş önerileri hesaplanamadı: {e}")
+        await asyncio.sleep(settings.friend_suggestion_interval_minutes * 60)
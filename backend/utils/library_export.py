@@ -0,0 +1,111 @@
+"""
+Kullanıcı kütüphanesi dışa aktarma (CSV / NDJSON / JSON).
+
+Satırlar sunucu tarafı cursor ile (yield_per) partiler halinde okunur ve
+StreamingResponse'a parça parça yazılır; kütüphane ne kadar büyük olursa olsun
+bellekte sadece bir parti tutulur. Generator kendi session'ını açar, çünkü istek
+dependency'sindeki session yanıt akışı başlamadan kapanır.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+
+from database import SessionLocal
+from models import Film
+
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FIELDS = (
+    "tmdb_id",
+    "title",
+    "release_date",
+    "poster_path",
+    "overview",
+    "kisisel_puan",
+    "kisisel_yorum",
+    "izlendi",
+    "is_favorite",
+    "is_watchlist",
+    "izlenme_tarihi",
+)
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "json": ("application/json", "json"),
+}
+
+
+def _iter_rows(user_id: int) -> Iterator[dict]:
+    db = SessionLocal()
+    try:
+        query = db.query(*(getattr(Film, field) for field in EXPORT_FIELDS)).filter(
+            Film.user_id == user_id
+        ).order_by(Film.id).yield_per(EXPORT_BATCH_SIZE)
+
+        for row in query:
+            film = row._asdict()
+            if film["izlenme_tarihi"] is not None:
+                film["izlenme_tarihi"] = film["izlenme_tarihi"].isoformat()
+            yield film
+    finally:
+        db.close()
+
+
+def _batched(rows: Iterator[str]) -> Iterator[str]:
+    """Satırları EXPORT_BATCH_SIZE'lık parçalar halinde birleştirir (az sayıda yazma)"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def _csv_lines(user_id: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield "\ufeff" + line(EXPORT_FIELDS)  # Excel'in UTF-8 algılaması için BOM
+    for film in _iter_rows(user_id):
+        yield line("" if film[field] is None else film[field] for field in EXPORT_FIELDS)
+
+
+def _ndjson_lines(user_id: int) -> Iterator[str]:
+    for film in _iter_rows(user_id):
+        yield json.dumps(film, ensure_ascii=False) + "\n"
+
+
+def _json_lines(user_id: int) -> Iterator[str]:
+    yield "["
+    separator = ""
+    for film in _iter_rows(user_id):
+        yield separator + json.dumps(film, ensure_ascii=False)
+        separator = ","
+    yield "]"
+
+
+_WRITERS = {
+    "csv": _csv_lines,
+    "ndjson": _ndjson_lines,
+    "json": _json_lines,
+}
+
+
+def iter_library_export(user_id: int, export_format: str) -> Iterator[str]:
+    """Kullanıcının kütüphanesini istenen formatta parça parça üretir"""
+    return _batched(_WRITERS[export_format](user_id))
+
+
+def export_filename(username: str, export_format: str) -> str:
+    return f"cinelog-{username}-{datetime.utcnow():%Y%m%d}.{EXPORT_FORMATS[export_format][1]}"
@@ -0,0 +1,330 @@
+"""
+Toplu kütüphane içe aktarma (Letterboxd / IMDb CSV).
+
+Yüklenen dosya önce geçici bir dosyaya yazılır, ardından arka plan işi dosyayı
+satır satır (akış olarak) okur. Satırlar parçalar halinde işlenir:
+1. Başlıklar (veya IMDb ID'leri) önbellekli ve hız sınırlı TMDB aramasıyla tmdb_id'ye çevrilir
+2. Parça tek bir INSERT ... ON CONFLICT (user_id, tmdb_id) DO UPDATE ile yazılır
+İlerleme süreç içi iş kaydında tutulur ve ilerleme endpoint'inden okunur.
+İş bitince kullanıcının aktivite özetleri yeniden kurulur ve önbellekleri temizlenir.
+"""
+import asyncio
+import csv
+import os
+import tempfile
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import case, func, or_
+
+from database import SessionLocal
+from models import Film
+from utils.library_index import library_index
+from utils.rollups import rebuild_rollups
+from utils.runtimes import enqueue_runtime
+from utils.stats import invalidate_user_stats
+from utils.tmdb import find_by_imdb_id, search_movie
+from utils.upsert import dialect_insert
+from utils.upstream import upstream_client
+
+IMPORT_CHUNK_SIZE = 200
+RESOLVE_CONCURRENCY = 8
+UPLOAD_READ_SIZE = 1024 * 1024
+# İlerleme yanıtında gösterilecek en fazla eşleşmeyen başlık
+UNRESOLVED_SAMPLE_SIZE = 20
+# Biten işlerin kayıtta tutulma süresi
+FINISHED_JOB_RETENTION = timedelta(hours=1)
+
+
+class ImportJob:
+    """Bir içe aktarma işinin durumu ve ilerlemesi"""
+
+    def __init__(self, user_id: int, source: str, watchlist: bool):
+        self.id = uuid4().hex
+        self.user_id = user_id
+        self.source = source
+        self.watchlist = watchlist
+        self.status = "queued"  # queued, running, completed, failed
+        self.processed_rows = 0
+        self.imported = 0
+        self.skipped = 0
+        self.unresolved = 0
+        self.unresolved_titles: List[str] = []
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.tmdb_ids: set = set()
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "source": self.source,
+            "watchlist": self.watchlist,
+            "processed_rows": self.processed_rows,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "unresolved": self.unresolved,
+            "unresolved_titles": self.unresolved_titles,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+_jobs: Dict[str, ImportJob] = {}
+_jobs_lock = Lock()
+
+
+def create_job(user_id: int, source: str, watchlist: bool) -> Optional[ImportJob]:
+    """Yeni iş oluşturur; kullanıcının devam eden bir işi varsa None döndürür"""
+    user_id = int(user_id)
+    now = datetime.utcnow()
+    with _jobs_lock:
+        for job_id, job in list(_jobs.items()):
+            if job.finished_at and now - job.finished_at > FINISHED_JOB_RETENTION:
+                del _jobs[job_id]
+        if any(job.user_id == user_id and job.is_active for job in _jobs.values()):
+            return None
+        job = ImportJob(user_id, source, watchlist)
+        _jobs[job.id] = job
+        return job
+
+
+def get_job(job_id: str) -> Optional[ImportJob]:
+    return _jobs.get(job_id)
+
+
+def discard_job(job_id: str):
+    with _jobs_lock:
+        _jobs.pop(job_id, None)
+
+
+async def spool_upload(upload, max_bytes: int) -> str:
+    """
+    Yüklenen dosyayı parça parça geçici dosyaya yazar (istek bittikten sonra da okunabilsin).
+    Boyut sınırı aşılırsa ValueError fırlatır.
+    """
+    handle = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
+    written = 0
+    try:
+        with handle:
+            while chunk := await upload.read(UPLOAD_READ_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise ValueError("Dosya boyutu sınırı aşıldı")
+                handle.write(chunk)
+    except Exception:
+        os.remove(handle.name)
+        raise
+    return handle.name
+
+
+def detect_source(headers: List[str]) -> str:
+    if "Const" in headers:
+        return "imdb"
+    if "Letterboxd URI" in headers or "Name" in headers:
+        return "letterboxd"
+    raise ValueError("CSV formatı tanınamadı (Letterboxd veya IMDb dışa aktarımı bekleniyor)")
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip()[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _parse_number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def normalize_row(source: str, row: dict) -> Optional[dict]:
+    """CSV satırını ortak biçime çevirir; film dışı veya başlıksız satırlar için None"""
+    if source == "letterboxd":
+        title = (row.get("Name") or "").strip()
+        stars = _parse_number(row.get("Rating"))
+        item = {
+            "title": title,
+            "year": _parse_number(row.get("Year")),
+            "imdb_id": None,
+            "rating": stars * 2 if stars is not None else None,  # 0.5-5 yıldız -> 0-10
+            "review": (row.get("Review") or "").strip() or None,
+            "watched_at": _parse_date(row.get("Watched Date") or row.get("Date")),
+        }
+    else:
+        title_type = (row.get("Title Type") or "").lower()
+        if "series" in title_type or "episode" in title_type:
+            return None
+        title = (row.get("Title") or "").strip()
+        item = {
+            "title": title,
+            "year": _parse_number(row.get("Year")),
+            "imdb_id": (row.get("Const") or "").strip() or None,
+            "rating": _parse_number(row.get("Your Rating")),
+            "review": None,
+            "watched_at": _parse_date(row.get("Date Rated") or row.get("Created")),
+        }
+
+    if not item["title"] and not item["imdb_id"]:
+        return None
+    if item["rating"] is not None:
+        item["rating"] = min(max(item["rating"], 0.0), 10.0)
+    return item
+
+
+async def _resolve(item: dict, client: httpx.AsyncClient, semaphore: asyncio.Semaphore) -> Optional[dict]:
+    """Satırı TMDB filmine çevirir; bulunamazsa veya hata olursa None"""
+    async with semaphore:
+        try:
+            if item["imdb_id"]:
+                movie = await find_by_imdb_id(item["imdb_id"], client)
+                if movie:
+                    return movie
+            if item["title"]:
+                year = int(item["year"]) if item["year"] else None
+                return await search_movie(item["title"], year, client)
+        except httpx.HTTPError as e:
+            print(f"⚠️ TMDB eşleştirmesi başarısız ({item['title']}): {e}")
+    return None
+
+
+def _film_values(user_id: int, item: dict, movie: dict, watchlist: bool) -> dict:
+    return {
+        "user_id": user_id,
+        "tmdb_id": movie["id"],
+        "title": movie.get("title") or item["title"],
+        "poster_path": movie.get("poster_path"),
+        "release_date": movie.get("release_date") or None,
+        "overview": movie.get("overview") or None,
+        "kisisel_puan": item["rating"],
+        "kisisel_yorum": item["review"],
+        "izlendi": not watchlist,
+        "is_favorite": False,
+        "is_watchlist": watchlist,
+        "izlenme_tarihi": item["watched_at"] or datetime.utcnow()
+    }
+
+
+def _merge_duplicates(rows: List[dict]) -> List[dict]:
+    """
+    Aynı parçada aynı film birden fazla kez olabilir (ör. Letterboxd diary tekrar izlemeleri).
+    ON CONFLICT bir satırı tek ifadede iki kez güncelleyemez; son kayıt esas alınır.
+    """
+    merged: Dict[int, dict] = {}
+    for values in rows:
+        previous = merged.get(values["tmdb_id"])
+        if previous:
+            for field in ("kisisel_puan", "kisisel_yorum"):
+                if values[field] is None:
+                    values[field] = previous[field]
+        merged[values["tmdb_id"]] = values
+    return list(merged.values())
+
+
+def _write_chunk(rows: List[dict]):
+    """Parçayı tek upsert ifadesiyle yazar; mevcut puan/yorum boş değerle ezilmez"""
+    db = SessionLocal()
+    try:
+        statement = dialect_insert(db, Film)
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "tmdb_id"],
+            set_={
+                "kisisel_puan": func.coalesce(excluded.kisisel_puan, Film.kisisel_puan),
+                "kisisel_yorum": func.coalesce(excluded.kisisel_yorum, Film.kisisel_yorum),
+                "izlendi": or_(Film.izlendi, excluded.izlendi),
+                "is_watchlist": or_(Film.is_watchlist, excluded.is_watchlist),
+                "izlenme_tarihi": case(
+                    (excluded.izlendi == True, excluded.izlenme_tarihi),
+                    else_=Film.izlenme_tarihi
+                )
+            }
+        )
+        db.execute(statement, rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _finalize(user_id: int):
+    """İçe aktarma sonrası türetilmiş verileri tazeler"""
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, user_id)
+    finally:
+        db.close()
+    invalidate_user_stats(user_id)
+    library_index.invalidate(user_id)
+
+
+async def _process_chunk(job: ImportJob, source: str, rows: List[dict], client: httpx.AsyncClient, semaphore: asyncio.Semaphore):
+    items = [normalize_row(source, row) for row in rows]
+    valid_items = [item for item in items if item]
+    job.skipped += len(items) - len(valid_items)
+
+    movies = await asyncio.gather(*(_resolve(item, client, semaphore) for item in valid_items))
+
+    values = []
+    for item, movie in zip(valid_items, movies):
+        if movie is None or not movie.get("id"):
+            job.unresolved += 1
+            if len(job.unresolved_titles) < UNRESOLVED_SAMPLE_SIZE:
+                job.unresolved_titles.append(item["title"] or item["imdb_id"])
+            continue
+        values.append(_film_values(job.user_id, item, movie, job.watchlist))
+
+    values = _merge_duplicates(values)
+    if values:
+        await asyncio.to_thread(_write_chunk, values)
+        job.imported += len(values)
+        job.tmdb_ids.update(row["tmdb_id"] for row in values)
+
+    job.processed_rows += len(rows)
+
+
+async def run_import_job(job: ImportJob, path: str):
+    """Arka plan işi: dosyayı akış olarak okuyup parçalar halinde içe aktarır"""
+    job.status = "running"
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            reader = csv.DictReader(handle)
+            source = detect_source(reader.fieldnames or []) if job.source == "auto" else job.source
+            job.source = source
+
+            semaphore = asyncio.Semaphore(RESOLVE_CONCURRENCY)
+            async with upstream_client(timeout=10.0) as client:
+                chunk = []
+                for row in reader:
+                    chunk.append(row)
+                    if len(chunk) >= IMPORT_CHUNK_SIZE:
+                        await _process_chunk(job, source, chunk, client, semaphore)
+                        chunk = []
+                if chunk:
+                    await _process_chunk(job, source, chunk, client, semaphore)
+    except Exception as e:
+        job.error = str(e)
+        print(f"⚠️ İçe aktarma başarısız ({job.id}): {e}")
+    finally:
+        try:
+            # Yarıda kalan işte de yazılmış parçalar için türetilmiş veriler tazelenir
+            if job.imported:
+                await asyncio.to_thread(_finalize, job.user_id)
+                for tmdb_id in job.tmdb_ids:
+                    enqueue_runtime("tmdb", tmdb_id)
+        finally:
+            job.status = "failed" if job.error else "completed"
+            job.finished_at = datetime.utcnow()
+            os.remove(path)
@@ -0,0 +1,208 @@
+"""
+Kullanıcı kütüphaneleri için bellek içi indeks.
+
+Her kullanıcının listesindeki TMDB ID'leri sıralı bir array('i') olarak tutulur.
+Uyum skoru, arkadaş önerileri ve "bu filmi izleyen arkadaşlar" gibi özellikler
+ORM nesnesi oluşturmadan küme işlemleri (kesişim, birleşim, sayım) ile hesaplanır.
+
+- Kullanıcılar ilk ihtiyaç duyulduğunda veritabanından yüklenir (lazy).
+- Film ekleme/silme endpoint'leri indeksi delta olarak günceller.
+- Bellek, en az kullanılan kullanıcıların atılmasıyla (LRU) sınırlandırılır.
+"""
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from threading import RLock
+from typing import Dict, Iterable, List, Set
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import Film
+
+settings = get_settings()
+
+
+def _as_numpy(ids: array) -> np.ndarray:
+    """array('i') verisini kopyalamadan NumPy görünümüne çevirir"""
+    return np.frombuffer(ids, dtype=np.intc)
+
+
+def intersect(a: array, b: array) -> np.ndarray:
+    """İki sıralı ID dizisinin kesişimini döndürür"""
+    return np.intersect1d(_as_numpy(a), _as_numpy(b), assume_unique=True)
+
+
+def intersect_count(a: array, b: array) -> int:
+    """
+    İki sıralı ID dizisinin kesişim boyutunu döndürür.
+    Küçük dizi büyük dizide ikili arama ile aranır: O(k log n).
+    """
+    small, large = (a, b) if len(a) <= len(b) else (b, a)
+    if not small or not large:
+        return 0
+
+    small_np = _as_numpy(small)
+    large_np = _as_numpy(large)
+    positions = np.searchsorted(large_np, small_np)
+    positions[positions == len(large_np)] = 0
+    return int(np.count_nonzero(large_np[positions] == small_np))
+
+
+def union_count(a: array, b: array) -> int:
+    """İki sıralı ID dizisinin birleşim boyutunu döndürür"""
+    return len(a) + len(b) - intersect_count(a, b)
+
+
+class LibraryIndex:
+    """Kullanıcı ID -> sıralı TMDB ID dizisi eşlemesi (LRU sınırlı)"""
+
+    def __init__(self, max_users: int = 5000):
+        self.max_users = max_users
+        self._libraries: "OrderedDict[int, array]" = OrderedDict()
+        self._lock = RLock()
+        # Yüklemesi süren kullanıcılar (eşzamanlı yükleme sayısı) ve yükleme sırasında delta alanlar:
+        # bu kullanıcıların yüklenen anlık görüntüsü eskimiş olabilir, belleğe yazılmaz
+        self._loading: Dict[int, int] = {}
+        self._stale: Set[int] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._libraries)
+
+    def _store(self, user_id: int, ids: array):
+        self._libraries[user_id] = ids
+        self._libraries.move_to_end(user_id)
+        while len(self._libraries) > self.max_users:
+            self._libraries.popitem(last=False)
+
+    def _mark_stale(self, user_id: int):
+        if user_id in self._loading:
+            self._stale.add(user_id)
+
+    def get(self, db: Session, user_id: int) -> array:
+        """Kullanıcının kütüphanesini döndürür, bellekte yoksa yükler"""
+        return self.get_many(db, [user_id])[int(user_id)]
+
+    def get_many(self, db: Session, user_ids: Iterable[int]) -> Dict[int, array]:
+        """
+        Birden fazla kullanıcının kütüphanesini döndürür.
+        Bellekte olmayanlar tek bir sorgu ile birlikte yüklenir.
+        """
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+        result = {}
+        missing = []
+
+        with self._lock:
+            for user_id in user_ids:
+                ids = self._libraries.get(user_id)
+                if ids is None:
+                    missing.append(user_id)
+                else:
+                    self._libraries.move_to_end(user_id)
+                    result[user_id] = ids
+            self.hits += len(result)
+            self.misses += len(missing)
+            for user_id in missing:
+                self._loading[user_id] = self._loading.get(user_id, 0) + 1
+
+        if missing:
+            try:
+                loaded = {user_id: [] for user_id in missing}
+                rows = db.query(Film.user_id, Film.tmdb_id).filter(
+                    Film.user_id.in_(missing)
+                ).order_by(Film.user_id, Film.tmdb_id).all()
+                for user_id, tmdb_id in rows:
+                    loaded[user_id].append(tmdb_id)
+
+                with self._lock:
+                    for user_id, tmdb_ids in loaded.items():
+                        ids = array("i", tmdb_ids)
+                        # Yükleme sürerken add/discard geldiyse anlık görüntü bu istekte kullanılır
+                        # ama saklanmaz; bir sonraki erişim güncel hâli yükler
+                        if user_id not in self._stale:
+                            self._store(user_id, ids)
+                        result[user_id] = ids
+            finally:
+                with self._lock:
+                    for user_id in missing:
+                        remaining = self._loading.pop(user_id) - 1
+                        if remaining:
+                            self._loading[user_id] = remaining
+                        else:
+                            self._stale.discard(user_id)
+
+        return result
+
+    def add(self, user_id: int, tmdb_id: int):
+        """Film ekleme deltası (kullanıcı bellekte değilse bir sonraki yüklemede görülür)"""
+        with self._lock:
+            self._mark_stale(int(user_id))
+            ids = self._libraries.get(int(user_id))
+            if ids is None:
+                return
+            position = bisect_left(ids, tmdb_id)
+            if position == len(ids) or ids[position] != tmdb_id:
+                # Copy-on-write: okuyucuların elindeki NumPy görünümleri geçerli kalır
+                updated = array("i", ids)
+                updated.insert(position, tmdb_id)
+                self._libraries[int(user_id)] = updated
+
+    def discard(self, user_id: int, tmdb_id: int):
+        """Film silme deltası"""
+        with self._lock:
+            self._mark_stale(int(user_id))
+            ids = self._libraries.get(int(user_id))
+            if ids is None:
+                return
+            position = bisect_left(ids, tmdb_id)
+            if position < len(ids) and ids[position] == tmdb_id:
+                updated = array("i", ids)
+                del updated[position]
+                self._libraries[int(user_id)] = updated
+
+    def invalidate(self, user_id: int):
+        """Kullanıcıyı bellekten atar, bir sonraki erişimde yeniden yüklenir"""
+        with self._lock:
+            self._mark_stale(int(user_id))
+            self._libraries.pop(int(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._libraries.clear()
+
+    def intersect_counts(self, db: Session, user_id: int, other_ids: List[int]) -> Dict[int, int]:
+        """Bir kullanıcının diğer kullanıcıların her biriyle ortak film sayısı"""
+        libraries = self.get_many(db, [user_id, *other_ids])
+        base = libraries[int(user_id)]
+        return {
+            int(other_id): intersect_count(base, libraries[int(other_id)])
+            for other_id in other_ids
+        }
+
+    def intersect_all(self, db: Session, user_ids: List[int]) -> np.ndarray:
+        """Tüm kullanıcıların ortak olarak listesinde olan TMDB ID'leri"""
+        libraries = self.get_many(db, user_ids)
+        if not libraries:
+            return np.empty(0, dtype=np.intc)
+
+        ordered = sorted(libraries.values(), key=len)
+        common = _as_numpy(ordered[0])
+        for ids in ordered[1:]:
+            if not len(common):
+                break
+            common = np.intersect1d(common, _as_numpy(ids), assume_unique=True)
+        return common
+
+    def union_all(self, db: Session, user_ids: List[int]) -> np.ndarray:
+        """Kullanıcılardan en az birinin listesinde olan TMDB ID'leri"""
+        libraries = self.get_many(db, user_ids)
+        if not libraries:
+            return np.empty(0, dtype=np.intc)
+        return np.unique(np.concatenate([_as_numpy(ids) for ids in libraries.values()]))
+
+
+# Uygulama genelinde tek indeks
+library_index = LibraryIndex(max_users=settings.library_index_max_users)
@@ -0,0 +1,259 @@
+"""
+Süreç içi Prometheus metrikleri.
+
+Harici kütüphane/servis yok: sayaçlar, gauge'lar ve sabit kovalı histogramlar bellekte
+tutulur, /metrics isteğinde Prometheus text formatında (0.0.4) yazılır. Kayıt işlemleri
+sözlük erişimi + kilit kadar ucuzdur. Anlık değerler (önbellekler, bağlantı havuzu,
+öneri modeli) kayıt anında değil, /metrics okunurken toplayıcı fonksiyonlarla hesaplanır.
+"""
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Varsayılan gecikme kovaları (saniye)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROCESS_STARTED_AT = time.time()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = Lock()
+        registry.register(self)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items
+        ]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    collect = Counter.collect
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [kova sayıları (kümülatif değil), toplam, adet]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items()]
+        lines = self._header()
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Metrikler ve /metrics anında çalışan toplayıcılar"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def collector(self, fn: Callable[[], Iterable[str]]):
+        """Anlık değerleri Prometheus satırları olarak üreten fonksiyon kaydeder (dekoratör)"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collect in self._collectors:
+            try:
+                lines.extend(collect())
+            except Exception as e:
+                lines.append(f"# collector {collect.__name__} başarısız: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def gauge_lines(name: str, documentation: str, samples: Iterable[Tuple[Dict[str, object], float]], type: str = "gauge") -> List[str]:
+    """Toplayıcılar için: (etiketler, değer) çiftlerinden metrik satırları"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+    return lines
+
+
+# ==================== HTTP ====================
+
+http_requests_in_flight = Gauge("cinelog_http_requests_in_flight", "İşlenmekte olan HTTP istekleri")
+http_request_duration = Histogram(
+    "cinelog_http_request_duration_seconds", "HTTP istek süresi (route şablonu bazında)", ("method", "route")
+)
+http_requests_total = Counter(
+    "cinelog_http_requests_total", "HTTP istekleri (durum kodu bazında)", ("method", "route", "status")
+)
+
+# ==================== UPSTREAM (TMDB / TVMaze / Jikan) ====================
+
+upstream_requests_total = Counter(
+    "cinelog_upstream_requests_total", "Harici API çağrıları (durum kodu veya hata türü bazında)", ("service", "status")
+)
+upstream_request_duration = Histogram(
+    "cinelog_upstream_request_duration_seconds", "Harici API çağrı süresi", ("service",)
+)
+upstream_errors_total = Counter(
+    "cinelog_upstream_errors_total", "Başarısız harici API çağrıları (bağlantı/zaman aşımı veya 5xx/429)", ("service",)
+)
+
+
+# ==================== ANLIK DEĞERLER ====================
+
+@registry.collector
+def _process_metrics():
+    return gauge_lines(
+        "cinelog_process_uptime_seconds", "Süreç çalışma süresi", [({}, time.time() - PROCESS_STARTED_AT)]
+    )
+
+
+@registry.collector
+def _sql_metrics():
+    from utils.query_stats import route_query_metrics
+
+    snapshot = route_query_metrics.snapshot()
+    samples = [({"method": method, "route": route}, values) for (method, route), values in snapshot.items()]
+    return (
+        gauge_lines("cinelog_db_queries_total", "Route bazında çalıştırılan SQL sorguları",
+                    [(labels, values["queries"]) for labels, values in samples], type="counter")
+        + gauge_lines("cinelog_db_query_seconds_total", "Route bazında toplam SQL süresi",
+                      [(labels, values["db_seconds"]) for labels, values in samples], type="counter")
+        + gauge_lines("cinelog_db_slowest_query_seconds", "Route bazında en yavaş SQL sorgusu",
+                      [(labels, values["slowest_seconds"]) for labels, values in samples])
+    )
+
+
+@registry.collector
+def _cache_metrics():
+    from utils.cache import TTLCache
+    from utils.library_index import library_index
+
+    caches = [(cache.name, cache.hits, cache.misses, len(cache)) for cache in TTLCache.instances()]
+    caches.append(("library_index", library_index.hits, library_index.misses, len(library_index)))
+    return (
+        gauge_lines("cinelog_cache_hits_total", "Önbellek isabetleri",
+                    [({"cache": name}, hits) for name, hits, _, _ in caches], type="counter")
+        + gauge_lines("cinelog_cache_misses_total", "Önbellek ıskaları",
+                      [({"cache": name}, misses) for name, _, misses, _ in caches], type="counter")
+        + gauge_lines("cinelog_cache_hit_ratio", "Önbellek isabet oranı (süreç başından beri)",
+                      [({"cache": name}, hits / (hits + misses) if hits + misses else 0.0)
+                       for name, hits, misses, _ in caches])
+        + gauge_lines("cinelog_cache_entries", "Önbellekteki kayıt sayısı",
+                      [({"cache": name}, size) for name, _, _, size in caches])
+    )
+
+
+@registry.collector
+def _db_pool_metrics():
+    from database import async_engine, async_read_engine, engine
+
+    engines = [("sync", engine), ("async", async_engine.sync_engine)]
+    if async_read_engine is not async_engine:
+        engines.append(("async_replica", async_read_engine.sync_engine))
+
+    samples = {"size": [], "checked_out": [], "overflow": []}
+    for name, pool_engine in engines:
+        pool = pool_engine.pool
+        # NullPool/StaticPool (SQLite) bu sayaçları sağlamaz
+        if not hasattr(pool, "checkedout"):
+            continue
+        labels = {"engine": name}
+        samples["size"].append((labels, pool.size()))
+        samples["checked_out"].append((labels, pool.checkedout()))
+        samples["overflow"].append((labels, max(pool.overflow(), 0)))
+
+    return (
+        gauge_lines("cinelog_db_pool_size", "Bağlantı havuzu boyutu", samples["size"])
+        + gauge_lines("cinelog_db_pool_checked_out", "Kullanımdaki bağlantılar", samples["checked_out"])
+        + gauge_lines("cinelog_db_pool_overflow", "Havuz boyutunu aşan ek bağlantılar", samples["overflow"])
+    )
+
+
+@registry.collector
+def _recommendation_model_metrics():
+    from routers import ai
+
+    trained_at = ai.model_trained_at
+    rows, features = ai.tfidf_matrix.shape if ai.tfidf_matrix is not None else (0, 0)
+    return (
+        gauge_lines("cinelog_recommendation_model_movies", "Öneri modelindeki film sayısı", [({}, rows)])
+        + gauge_lines("cinelog_recommendation_model_features", "TF-IDF öznitelik sayısı", [({}, features)])
+        + gauge_lines("cinelog_recommendation_model_age_seconds", "Modelin son eğitiminden beri geçen süre",
+                      [({}, time.time() - trained_at)] if trained_at else [])
+    )
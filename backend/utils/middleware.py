@@ -0,0 +1,295 @@
+"""
+Saf ASGI middleware'leri.
+
+BaseHTTPMiddleware her istekte ek bir task ve yanıt gövdesi için bir stream köprüsü
+kurar; hem yavaştır hem de streaming yanıtları bozar. Buradaki middleware'ler uygulamayı
+doğrudan çağırır ve header'ları yalnızca "http.response.start" mesajında değiştirir.
+Gövdeye dokunanlar (ETag, sıkıştırma) yalnızca gereken yanıtları tamponlar.
+"""
+import hashlib
+import time
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.metrics import http_request_duration, http_requests_in_flight, http_requests_total
+from utils.query_stats import begin_request, finish_request, reset_request, route_template, server_timing_header
+
+try:
+    import brotli
+except ImportError:  # isteğe bağlı bağımlılık: kurulu değilse yalnızca gzip
+    brotli = None
+
+# Sıkıştırmaya değer içerik türleri (görseller vb. zaten sıkıştırılmış)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/")
+
+
+class SecurityHeadersMiddleware:
+    """Google OAuth için COOP/COEP ayarlarını gevşetir"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["Cross-Origin-Opener-Policy"] = "unsafe-none"
+                headers["Cross-Origin-Embedder-Policy"] = "unsafe-none"
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class RequestMetricsMiddleware:
+    """
+    İstek metrikleri: süre histogramı, aktif istek sayısı ve SQL ölçümü.
+    Server-Timing yanıt başlarken eklenir (streaming yanıtlarda o ana kadarki sorgular);
+    süre, durum kodu ve route toplamları yanıt gövdesi bittiğinde kaydedilir. Starlette
+    BackgroundTasks'ı gövde gönderildikten sonra aynı çağrı içinde çalıştırır; bu işler
+    isteğin süresine ve sorgularına sayılmaz.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        http_requests_in_flight.inc()
+        stats, token, started = begin_request(scope)
+        status_code = 500
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            finish_request(scope, stats)
+            http_requests_in_flight.dec()
+            method, route = scope["method"], route_template(scope)
+            http_request_duration.observe(time.perf_counter() - started, method, route)
+            http_requests_total.inc(method, route, str(status_code))
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["Server-Timing"] = server_timing_header(stats, time.perf_counter() - started)
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request(token)
+            # Gövde hiç gönderilmediyse (hata, bağlantı kopması) burada kaydedilir
+            finish()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    If-None-Match'te etag ile eşleşen değeri döndürür (RFC 9110 zayıf karşılaştırma).
+    Sıkıştırılmış gösterimlerin son eki (-gzip, -br) karşılaştırmada yok sayılır.
+    """
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if _strip_coding(candidate.removeprefix("W/")) == etag:
+            return candidate
+    return None
+
+
+def _strip_coding(etag: str) -> str:
+    for coding in ("gzip", "br"):
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+class ConditionalCacheMiddleware:
+    """
+    Önbelleğe alınabilir GET endpoint'leri için güçlü ETag, 304 ve Cache-Control.
+    policies: route şablonu -> Cache-Control değeri. ETag sıkıştırılmamış gövdenin özetidir;
+    If-None-Match eşleşirse gövde gönderilmeden 304 döner.
+    """
+
+    def __init__(self, app: ASGIApp, policies: Dict[str, str]):
+        self.app = app
+        self.policies = policies
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        policy: Optional[str] = None
+        chunks = []
+
+        async def send_wrapper(message: Message):
+            nonlocal start, policy
+            if message["type"] == "http.response.start":
+                # Route eşleşmesi bu noktada scope'a yazılmış olur
+                policy = self.policies.get(route_template(scope))
+                if policy is None or message["status"] != 200:
+                    policy = None
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if policy is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._respond(scope, start, b"".join(chunks), policy, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    async def _respond(scope: Scope, start: Message, body: bytes, policy: str, send: Send):
+        headers = MutableHeaders(scope=start)
+        etag = headers.get("etag") or f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        headers["ETag"] = etag
+        headers["Cache-Control"] = policy
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        matched = _etag_matches(if_none_match, etag) if if_none_match else None
+        if matched:
+            # İstemcinin elindeki gösterimin ETag'i (ör. "...-gzip") aynen geri döner
+            headers["ETag"] = matched
+            for name in ("content-length", "content-type"):
+                del headers[name]
+            await send({"type": "http.response.start", "status": 304, "headers": start["headers"]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
+
+
+class _Compressor:
+    """gzip (zlib, mtime'sız başlık: aynı girdi aynı çıktı) veya brotli akış sıkıştırıcı"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Accept-Encoding'den br (brotli kuruluysa) veya gzip seçer; q=0 reddedilmiş sayılır"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            weights[coding] = quality
+
+    wildcard = weights.get("*", 0.0)
+    for coding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if weights.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encoding'e göre br veya gzip sıkıştırma.
+    Eşik altındaki, zaten kodlanmış veya sıkıştırılamaz türdeki gövdeler aynen geçer;
+    streaming yanıtlar (ör. kütüphane dışa aktarma) parça parça sıkıştırılır.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                compressible = (
+                    start["status"] not in (204, 304)
+                    and "content-encoding" not in headers
+                    and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                    and (more_body or len(body) >= self.minimum_size)
+                )
+                if compressible:
+                    # Aynı URL istemciye göre farklı kodlanabilir: ara önbellekler ayırt etmeli
+                    headers.add_vary_header("Accept-Encoding")
+                if not compressible or encoding is None:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers:
+                    # Güçlü ETag gösterime özgüdür: sıkıştırılmış gövde farklı bir ETag taşır
+                    etag = headers["etag"]
+                    headers["ETag"] = f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+                data = compressor.compress(body, final=not more_body)
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    headers["Content-Length"] = str(len(data))
+                await send(start)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            await send({"type": "http.response.body", "body": compressor.compress(body, final=not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
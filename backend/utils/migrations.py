@@ -0,0 +1,187 @@
+"""
+Şema migration'ları.
+
+create_all sadece eksik tabloları oluşturur; mevcut tablolara sonradan eklenen index'ler
+ve veritabanına özgü nesneler (trigram index'leri, FTS tabloları) burada sürümlenir.
+Uygulanan sürümler schema_migrations tablosunda tutulur, her migration bir kez çalışır.
+
+PostgreSQL'de index'ler CREATE INDEX CONCURRENTLY ile (tabloyu yazmaya kilitlemeden)
+oluşturulur; bu komut transaction içinde çalışamadığı için autocommit bağlantı kullanılır.
+Yarıda kalan CONCURRENTLY işlemi geçersiz (INVALID) index bırakır; tekrar denemede silinip
+yeniden oluşturulur. Aynı anda başlayan birden fazla süreç advisory lock ile sıraya girer.
+"""
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+# Migration kayıt tablosu, modellerin metadata'sından ayrı tutulur
+_migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("version", String, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# pg_advisory_lock anahtarı (rastgele sabit)
+MIGRATION_LOCK_KEY = 72815304
+
+
+class Migration(NamedTuple):
+    version: str
+    description: str
+    upgrade: Callable[[Engine], None]
+    # Opsiyonel migration başarısız olursa uygulama açılır, sonraki başlangıçta tekrar denenir
+    optional: bool = False
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: str, description: str, optional: bool = False):
+    """Migration fonksiyonunu sürüm sırasına göre kaydeder"""
+    def register(upgrade: Callable[[Engine], None]):
+        MIGRATIONS.append(Migration(version, description, upgrade, optional))
+        MIGRATIONS.sort(key=lambda item: item.version)
+        return upgrade
+    return register
+
+
+class IndexSpec(NamedTuple):
+    name: str
+    table: str
+    columns: Sequence[str]
+    using: Optional[str] = None
+    where: Optional[str] = None
+
+
+def _drop_invalid_index(connection: Connection, name: str):
+    """Yarıda kalmış CONCURRENTLY işleminden kalan geçersiz index'i siler"""
+    invalid = connection.execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
+def create_indexes(engine: Engine, indexes: Sequence[IndexSpec]):
+    """Index'leri oluşturur (varsa atlanır); PostgreSQL'de eşzamanlı (CONCURRENTLY)"""
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for index in indexes:
+                _drop_invalid_index(connection, index.name)
+                connection.execute(text(_index_ddl(index, concurrently=True)))
+    else:
+        with engine.begin() as connection:
+            for index in indexes:
+                connection.execute(text(_index_ddl(index)))
+
+
+def _index_ddl(index: IndexSpec, concurrently: bool = False) -> str:
+    statement = "CREATE INDEX CONCURRENTLY IF NOT EXISTS" if concurrently else "CREATE INDEX IF NOT EXISTS"
+    using = f" USING {index.using}" if index.using else ""
+    where = f" WHERE {index.where}" if index.where else ""
+    return f"{statement} {index.name} ON {index.table}{using} ({', '.join(index.columns)}){where}"
+
+
+# ==================== MIGRATIONS ====================
+
+@migration("0001", "Model index'lerini mevcut tablolarda oluştur")
+def _model_indexes(engine: Engine):
+    # Önceden init_db içindeki _ensure_indexes; 0001'den önce modellere eklenmiş index'ler.
+    # Liste sabittir: sonradan eklenen index'ler kendi migration'larında oluşturulur.
+    true = "true" if engine.dialect.name == "postgresql" else "1"
+    create_indexes(engine, [
+        IndexSpec("ix_films_tmdb_user", "films", ["tmdb_id", "user_id"]),
+        IndexSpec("ix_films_user_id", "films", ["user_id", "id"]),
+        IndexSpec("ix_films_user_izlendi", "films", ["user_id", "izlendi", "id"]),
+        IndexSpec("ix_films_user_rating", "films", ["user_id", "kisisel_puan"]),
+        IndexSpec("ix_films_user_favorite", "films", ["user_id", "id"], where=f"is_favorite = {true}"),
+        IndexSpec("ix_films_user_watchlist", "films", ["user_id", "id"], where=f"is_watchlist = {true}"),
+        IndexSpec("ix_friend_suggestions_user_score", "friend_suggestions", ["user_id", "score"]),
+    ])
+
+
+@migration("0002", "Kullanıcı adı arama index'leri (pg_trgm / FTS5)", optional=True)
+def _user_search_indexes(engine: Engine):
+    from sqlalchemy import inspect
+    from utils.user_search import SQLITE_FTS_DDL, SQLITE_FTS_TABLE
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        create_indexes(engine, [
+            IndexSpec("ix_users_username_trgm", "users", ["username gin_trgm_ops"], using="gin"),
+            IndexSpec("ix_users_username_pattern", "users", ["username text_pattern_ops"]),
+        ])
+    elif engine.dialect.name == "sqlite":
+        if SQLITE_FTS_TABLE not in inspect(engine).get_table_names():
+            with engine.begin() as connection:
+                for statement in SQLITE_FTS_DDL:
+                    connection.execute(text(statement))
+
+
+@migration("0003", "Sosyal akış, arkadaşlık ve etkileşim sorguları için index'ler")
+def _social_indexes(engine: Engine):
+    create_indexes(engine, [
+        IndexSpec("ix_films_user_watched", "films", ["user_id", "izlenme_tarihi"]),
+        IndexSpec("ix_friendships_user_status", "friendships", ["user_id", "status"]),
+        IndexSpec("ix_friendships_friend_status", "friendships", ["friend_id", "status"]),
+        IndexSpec("ix_activity_likes_film", "activity_likes", ["film_id", "created_at"]),
+        IndexSpec("ix_activity_comments_film_created", "activity_comments", ["film_id", "created_at"]),
+    ])
+
+
+# ==================== RUNNER ====================
+
+def _applied_versions(engine: Engine) -> set:
+    with engine.begin() as connection:
+        _migration_metadata.create_all(bind=connection)
+        return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _record(engine: Engine, item: Migration):
+    with engine.begin() as connection:
+        connection.execute(schema_migrations.insert().values(
+            version=item.version,
+            description=item.description,
+            applied_at=datetime.utcnow()
+        ))
+
+
+def _apply_pending(engine: Engine) -> List[str]:
+    applied = _applied_versions(engine)
+    newly_applied = []
+    for item in MIGRATIONS:
+        if item.version in applied:
+            continue
+        try:
+            item.upgrade(engine)
+        except SQLAlchemyError as e:
+            if not item.optional:
+                raise
+            print(f"⚠️ Migration {item.version} uygulanamadı, sonraki başlangıçta tekrar denenecek: {e}")
+            continue
+        _record(engine, item)
+        newly_applied.append(item.version)
+        print(f"✅ Migration {item.version}: {item.description}")
+    return newly_applied
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Uygulanmamış migration'ları sırayla çalıştırır; uygulanan sürümleri döndürür"""
+    if engine.dialect.name != "postgresql":
+        return _apply_pending(engine)
+
+    # Birden fazla worker aynı anda başlarsa migration'lar tek süreçte çalışır
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_connection:
+        lock_connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            return _apply_pending(engine)
+        finally:
+            lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
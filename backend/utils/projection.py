@@ -0,0 +1,86 @@
+"""
+Harici API detay yanıtları (TVMaze, Jikan) için sunucu tarafı projeksiyon.
+
+Önbellekte yalnızca ham upstream gövdesi tutulur; projeksiyon isteyen her istekte gövde
+parse edilir ve yalnızca istenen parçalardan yeni sözlükler kurulur. Böylece tek bir önbellek
+kaydı farklı projeksiyonlarla istenen birçok küçük yanıta hizmet eder.
+- fields: virgülle ayrılmış alan yolları, iç içe alanlar noktayla (id,name,rating.average,_embedded.cast)
+- episodes (TVMaze): season:N -> yalnızca N. sezon, latest:K -> yayınlanmış son K bölüm
+"""
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+EPISODE_SELECTION_MODES = ("season", "latest")
+
+
+class EpisodeSelection(NamedTuple):
+    mode: str  # season, latest
+    value: int
+
+
+def parse_field_paths(fields: Optional[str]) -> Optional[List[List[str]]]:
+    """Alan yollarını ayrıştırır; boşsa None (tam yanıt). Geçersiz yolda ValueError fırlatır."""
+    if not fields:
+        return None
+
+    paths = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    invalid = [path for path in paths if not all(path.split("."))]
+    if invalid:
+        raise ValueError(f"Invalid field path(s): {', '.join(invalid)}")
+    return [path.split(".") for path in paths] or None
+
+
+def parse_episode_selection(episodes: Optional[str]) -> Optional[EpisodeSelection]:
+    """'season:N' veya 'latest:K' ifadesini ayrıştırır. Geçersizse ValueError fırlatır."""
+    if not episodes:
+        return None
+
+    mode, _, value = episodes.strip().partition(":")
+    if mode not in EPISODE_SELECTION_MODES or not value.isdigit() or (mode == "latest" and int(value) < 1):
+        raise ValueError("episodes must be 'season:N' or 'latest:K' (K >= 1)")
+    return EpisodeSelection(mode, int(value))
+
+
+def select_episodes(show: dict, selection: Optional[EpisodeSelection]) -> dict:
+    """Gömülü bölüm listesini daraltır; diğer alanlar aynı nesneleri paylaşır (sığ kopya)"""
+    embedded = show.get("_embedded")
+    if selection is None or not isinstance(embedded, dict) or "episodes" not in embedded:
+        return show
+
+    episodes = embedded.get("episodes") or []
+    if selection.mode == "season":
+        chosen = [episode for episode in episodes if episode.get("season") == selection.value]
+    else:
+        # TVMaze bölümleri yayın sırasıyla döner; tarihi olmayan/gelecekteki bölümler sayılmaz
+        today = date.today().isoformat()
+        aired = [episode for episode in episodes if episode.get("airdate") and episode["airdate"] <= today]
+        chosen = aired[-selection.value:]
+
+    return {**show, "_embedded": {**embedded, "episodes": chosen}}
+
+
+def project_fields(data: dict, paths: Optional[List[List[str]]]) -> dict:
+    """
+    Yalnızca istenen alan yollarını içeren yeni bir sözlük döndürür.
+    Olmayan alanlar atlanır; üst alan tamamen seçildiyse alt yolları ayrıca eklenmez.
+    """
+    if paths is None:
+        return data
+
+    result: dict = {}
+    for path in paths:
+        source, target = data, result
+        for depth, key in enumerate(path):
+            if not isinstance(source, dict) or key not in source:
+                break
+            value = source[key]
+            if depth == len(path) - 1:
+                target[key] = value
+                break
+            existing = target.get(key)
+            if existing is value or not isinstance(value, dict):
+                break
+            if not isinstance(existing, dict):
+                existing = target[key] = {}
+            source, target = value, existing
+    return result
@@ -0,0 +1,138 @@
+"""
+İstek başına SQL ölçümleri.
+
+database.py'deki engine event'leri her sorgunun süresini, o anki isteğin
+RequestQueryStats nesnesine (contextvar) yazar. Middleware:
+- Yanıt başlarken Server-Timing header'ını ekler (sorgu sayısı, toplam DB süresi, en yavaş sorgu)
+- Yanıt gövdesi bitince route şablonu bazında toplamları günceller (/metrics bunları okur);
+  sonrasında çalışan BackgroundTasks sorguları isteğe yazılmaz
+Eşik süreyi aşan sorgular route ve maskelenmiş SQL ile loglanır (parametreler loglanmaz).
+"""
+import re
+import time
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Optional
+
+from config import get_settings
+
+settings = get_settings()
+
+# Loglanan SQL'in en fazla uzunluğu
+MAX_LOGGED_STATEMENT_LENGTH = 500
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestQueryStats:
+    """Tek bir isteğin SQL sayacı"""
+
+    __slots__ = ("scope", "count", "total", "slowest", "slowest_statement", "closed")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.closed = False
+
+    def record(self, elapsed: float, statement: str):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+
+request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def route_template(scope: Optional[dict]) -> str:
+    """Eşleşen route şablonu (/api/users/{user_id}); yüksek kardinaliteli ham path kullanılmaz"""
+    if not scope:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def redact_statement(statement: str) -> str:
+    """SQL'deki sabit değerleri (string/sayı) maskeler, boşlukları sadeleştirir"""
+    statement = _STRING_LITERAL.sub("'?'", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    if len(statement) > MAX_LOGGED_STATEMENT_LENGTH:
+        statement = statement[:MAX_LOGGED_STATEMENT_LENGTH] + "…"
+    return statement
+
+
+def record_query(elapsed: float, statement: str):
+    """Engine event'inden çağrılır: sorguyu isteğe yazar, eşiği aşarsa loglar"""
+    stats = request_query_stats.get()
+    if stats is not None and stats.closed:
+        # Yanıt gönderildikten sonra (BackgroundTasks, kopyalanan context): arka plan işi
+        stats = None
+    if stats is not None:
+        stats.record(elapsed, statement)
+
+    threshold_ms = settings.slow_query_threshold_ms
+    if threshold_ms and elapsed * 1000 >= threshold_ms:
+        scope = stats.scope if stats is not None else None
+        method = scope.get("method", "") if scope else ""
+        print(f"🐢 Yavaş sorgu ({elapsed * 1000:.1f} ms) {method} {route_template(scope)}: {redact_statement(statement)}")
+
+
+def server_timing_header(stats: RequestQueryStats, total_seconds: float) -> str:
+    parts = [f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries"']
+    if stats.count:
+        parts.append(f"db-slowest;dur={stats.slowest * 1000:.2f}")
+    parts.append(f"total;dur={total_seconds * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class RouteQueryMetrics:
+    """Route şablonu bazında istek, sorgu ve DB süresi toplamları"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._routes: Dict[tuple, list] = {}
+
+    def record(self, method: str, route: str, stats: RequestQueryStats):
+        key = (method, route)
+        with self._lock:
+            totals = self._routes.get(key)
+            if totals is None:
+                totals = self._routes[key] = [0, 0, 0.0, 0.0]
+            totals[0] += 1
+            totals[1] += stats.count
+            totals[2] += stats.total
+            totals[3] = max(totals[3], stats.slowest)
+
+    def snapshot(self) -> Dict[tuple, dict]:
+        with self._lock:
+            return {
+                key: {"requests": requests, "queries": queries, "db_seconds": db_seconds, "slowest_seconds": slowest}
+                for key, (requests, queries, db_seconds, slowest) in self._routes.items()
+            }
+
+
+route_query_metrics = RouteQueryMetrics()
+
+
+def begin_request(scope: dict):
+    """İstek için sayaç başlatır; (stats, token, başlangıç zamanı) döndürür"""
+    stats = RequestQueryStats(scope)
+    return stats, request_query_stats.set(stats), time.perf_counter()
+
+
+def finish_request(scope: dict, stats: RequestQueryStats):
+    """Sayacı kapatır ve route toplamlarını günceller (yanıt gövdesi bittiğinde)"""
+    stats.closed = True
+    route_query_metrics.record(scope.get("method", ""), route_template(scope), stats)
+
+
+def reset_request(token):
+    """İsteğin contextvar değerini geri alır (uygulama çağrısı döndüğünde)"""
+    request_query_stats.reset(token)
@@ -0,0 +1,294 @@
+"""
+Kullanıcı aktivite özetleri (rollup).
+
+İzlenen filmler kullanıcı, dönem (gün/ay) ve tür bazında activity_rollups tablosunda
+önceden toplanır. Film yazma işlemleri yalnızca etkilenen ayın özetlerini yeniden
+hesaplar (artımlı bakım); rebuild_rollups tüm tabloyu batch olarak yeniden kurar.
+Zaman çizelgesi endpoint'i film sayısından bağımsız olarak O(dönem) satır okur.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import ActivityRollup, Film, TitleGenre, User
+from utils.upsert import dialect_insert
+
+DAY = "day"
+MONTH = "month"
+YEAR = "year"
+ALL_GENRES = ""
+
+# Aktivite özetlerini etkileyen film alanları
+ROLLUP_FIELDS = {"izlendi", "kisisel_puan"}
+
+INSERT_CHUNK_SIZE = 5000
+
+BucketKey = Tuple[int, str, str, str]  # (user_id, granularity, period, genre)
+
+
+def _month_bounds(moment: datetime) -> Tuple[datetime, datetime]:
+    start = datetime(moment.year, moment.month, 1)
+    if moment.month == 12:
+        return start, datetime(moment.year + 1, 1, 1)
+    return start, datetime(moment.year, moment.month + 1, 1)
+
+
+def _rollup_rows_query(db: Session):
+    """İzlenen filmler ve (biliniyorsa) türleri; çok türlü filmler birden fazla satır döner"""
+    return db.query(
+        Film.user_id,
+        Film.id,
+        Film.izlenme_tarihi,
+        Film.kisisel_puan,
+        TitleGenre.genre
+    ).outerjoin(
+        TitleGenre,
+        and_(TitleGenre.source == "tmdb", TitleGenre.external_id == Film.tmdb_id)
+    ).filter(
+        Film.izlendi == True,
+        Film.izlenme_tarihi.isnot(None)
+    )
+
+
+def _aggregate(rows) -> Dict[BucketKey, List[float]]:
+    """Satırları [watch_count, rating_sum, rating_count] toplamlarına indirger"""
+    buckets: Dict[BucketKey, List[float]] = defaultdict(lambda: [0, 0.0, 0])
+    counted = set()
+
+    for user_id, film_id, watched_at, rating, genre in rows:
+        periods = (
+            (DAY, watched_at.strftime("%Y-%m-%d")),
+            (MONTH, watched_at.strftime("%Y-%m")),
+        )
+        genres = [genre] if genre else []
+        # Tüm türler satırında her film bir kez sayılır
+        if film_id not in counted:
+            counted.add(film_id)
+            genres.append(ALL_GENRES)
+
+        for granularity, period in periods:
+            for bucket_genre in genres:
+                bucket = buckets[(user_id, granularity, period, bucket_genre)]
+                bucket[0] += 1
+                if rating is not None:
+                    bucket[1] += rating
+                    bucket[2] += 1
+
+    return buckets
+
+
+def _insert_buckets(db: Session, buckets: Dict[BucketKey, List[float]]):
+    values = [
+        {
+            "user_id": user_id,
+            "granularity": granularity,
+            "period": period,
+            "genre": genre,
+            "watch_count": int(watch_count),
+            "rating_sum": float(rating_sum),
+            "rating_count": int(rating_count)
+        }
+        for (user_id, granularity, period, genre), (watch_count, rating_sum, rating_count) in buckets.items()
+    ]
+    for start in range(0, len(values), INSERT_CHUNK_SIZE):
+        db.execute(insert(ActivityRollup), values[start:start + INSERT_CHUNK_SIZE])
+
+
+def _lock_user(db: Session, user_id: int):
+    """
+    Aynı kullanıcının özetlerini tazeleyen transaction'ları sıraya sokar (kullanıcı satırında
+    FOR UPDATE). İkinci transaction kilidi birincinin commit'inden sonra alır ve yeniden
+    hesaplama sorgusu onun filmini de görür (READ COMMITTED). SQLite'ta FOR UPDATE üretilmez;
+    orada yazmalar zaten veritabanı kilidiyle sıralanır.
+    """
+    db.execute(select(User.id).where(User.id == user_id).with_for_update())
+
+
+def _upsert_buckets(db: Session, buckets: Dict[BucketKey, List[float]]):
+    """Özet satırlarını (user_id, granularity, genre, period) üzerinden ekler veya günceller"""
+    values = [
+        {
+            "user_id": user_id,
+            "granularity": granularity,
+            "period": period,
+            "genre": genre,
+            "watch_count": int(watch_count),
+            "rating_sum": float(rating_sum),
+            "rating_count": int(rating_count)
+        }
+        for (user_id, granularity, period, genre), (watch_count, rating_sum, rating_count) in buckets.items()
+    ]
+    if not values:
+        return
+    statement = dialect_insert(db, ActivityRollup)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "granularity", "genre", "period"],
+        set_={
+            "watch_count": statement.excluded.watch_count,
+            "rating_sum": statement.excluded.rating_sum,
+            "rating_count": statement.excluded.rating_count,
+        }
+    ), values)
+
+
+def refresh_rollup_buckets(db: Session, user_id: int, dates: Iterable[Optional[datetime]]):
+    """
+    Verilen tarihlerin ayına ait özetleri (aylık satır ve o ayın günlük satırları)
+    filmlerden yeniden hesaplar. Çağıran transaction içinde çalışır, commit etmez.
+    Satırlar upsert edilir (eşzamanlı yazmalar unique kısıtına takılmaz), artık karşılığı
+    olmayan kovalar silinir.
+    """
+    user_id = int(user_id)
+    months = {_month_bounds(moment) for moment in dates if moment is not None}
+    if not months:
+        return
+
+    _lock_user(db, user_id)
+    for month_start, month_end in sorted(months):
+        rows = _rollup_rows_query(db).filter(
+            Film.user_id == user_id,
+            Film.izlenme_tarihi >= month_start,
+            Film.izlenme_tarihi < month_end
+        ).all()
+        buckets = _aggregate(rows)
+
+        month_key = month_start.strftime("%Y-%m")
+        existing = db.query(
+            ActivityRollup.id, ActivityRollup.granularity, ActivityRollup.period, ActivityRollup.genre
+        ).filter(
+            ActivityRollup.user_id == user_id,
+            or_(
+                and_(ActivityRollup.granularity == MONTH, ActivityRollup.period == month_key),
+                and_(
+                    ActivityRollup.granularity == DAY,
+                    ActivityRollup.period >= f"{month_key}-01",
+                    ActivityRollup.period <= f"{month_key}-31"
+                )
+            )
+        ).all()
+        emptied = [
+            row.id for row in existing
+            if (user_id, row.granularity, row.period, row.genre) not in buckets
+        ]
+        if emptied:
+            db.execute(delete(ActivityRollup).where(ActivityRollup.id.in_(emptied)))
+        _upsert_buckets(db, buckets)
+
+
+def refresh_rollups_for_titles(db: Session, tmdb_ids: List[int]):
+    """Türleri yeni öğrenilen filmleri izlemiş kullanıcıların ilgili aylarını tazeler"""
+    rows = db.query(Film.user_id, Film.izlenme_tarihi).filter(
+        Film.tmdb_id.in_(tmdb_ids),
+        Film.izlendi == True
+    ).all()
+
+    dates_by_user = defaultdict(list)
+    for user_id, watched_at in rows:
+        dates_by_user[user_id].append(watched_at)
+
+    # Kullanıcı kilitleri hep aynı sırada alınır (deadlock olmaz)
+    for user_id in sorted(dates_by_user):
+        refresh_rollup_buckets(db, user_id, dates_by_user[user_id])
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None):
+    """
+    Özetleri filmlerden sıfırdan kurar (tüm kullanıcılar veya tek kullanıcı).
+    Filmler kullanıcı sırasıyla akıtılır, bellek kullanıcı başına sınırlı kalır.
+    Tek kullanıcıda artımlı tazelemelerle aynı kullanıcı kilidi alınır.
+    """
+    statement = delete(ActivityRollup)
+    query = _rollup_rows_query(db)
+    if user_id is not None:
+        _lock_user(db, user_id)
+        statement = statement.where(ActivityRollup.user_id == user_id)
+        query = query.filter(Film.user_id == user_id)
+    db.execute(statement)
+
+    current_user = None
+    user_rows = []
+    for row in query.order_by(Film.user_id, Film.id).yield_per(5000):
+        if row[0] != current_user and user_rows:
+            _insert_buckets(db, _aggregate(user_rows))
+            user_rows = []
+        current_user = row[0]
+        user_rows.append(tuple(row))
+
+    if user_rows:
+        _insert_buckets(db, _aggregate(user_rows))
+
+    db.commit()
+
+
+def ensure_rollups():
+    """Özet tablosu boşsa (ilk kurulum) mevcut filmlerden bir kez kurar"""
+    db = SessionLocal()
+    try:
+        has_rollups = db.query(ActivityRollup.id).first() is not None
+        has_watched = db.query(Film.id).filter(Film.izlendi == True).first() is not None
+        if has_watched and not has_rollups:
+            rebuild_rollups(db)
+    finally:
+        db.close()
+
+
+def get_timeline(
+    db: Session,
+    user_id: int,
+    granularity: str = MONTH,
+    genre: str = ALL_GENRES,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> List[dict]:
+    """
+    Kullanıcının dönem bazlı izleme/puan zaman çizelgesini döndürür.
+    Yıllık görünüm aylık özetlerden türetilir.
+    """
+    stored_granularity = MONTH if granularity == YEAR else granularity
+    query = db.query(
+        ActivityRollup.period,
+        ActivityRollup.watch_count,
+        ActivityRollup.rating_sum,
+        ActivityRollup.rating_count
+    ).filter(
+        ActivityRollup.user_id == user_id,
+        ActivityRollup.granularity == stored_granularity,
+        ActivityRollup.genre == genre
+    )
+    if start:
+        query = query.filter(ActivityRollup.period >= start)
+    if end:
+        # "2025" veya "2025-03" gibi önekler o dönemin tamamını kapsasın
+        query = query.filter(func.substr(ActivityRollup.period, 1, len(end)) <= end)
+
+    totals: Dict[str, List[float]] = {}
+    for period, watch_count, rating_sum, rating_count in query.order_by(ActivityRollup.period).all():
+        key = period[:4] if granularity == YEAR else period
+        bucket = totals.setdefault(key, [0, 0.0, 0])
+        bucket[0] += watch_count
+        bucket[1] += rating_sum
+        bucket[2] += rating_count
+
+    return [
+        {
+            "period": period,
+            "watch_count": int(watch_count),
+            "rating_count": int(rating_count),
+            "average_rating": round(rating_sum / rating_count, 2) if rating_count else None
+        }
+        for period, (watch_count, rating_sum, rating_count) in totals.items()
+    ]
+
+
+if __name__ == "__main__":
+    # Manuel batch: python -m utils.rollups
+    session = SessionLocal()
+    try:
+        rebuild_rollups(session)
+        print("✅ Aktivite özetleri yeniden oluşturuldu")
+    finally:
+        session.close()
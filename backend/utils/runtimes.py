@@ -0,0 +1,211 @@
+"""
+Yapım süresi (runtime) ve tür önbelleği.
+
+Film süreleri TMDB'den yapım başına bir kez çekilir ve title_runtimes tablosunda saklanır.
+Aynı yanıttaki türler title_genres tablosuna yazılır. Çekme işlemi arka planda, küçük
+partiler halinde yapılır; istatistik isteği sırasında asla harici API çağrılmaz,
+istatistikler saf SQL aggregate olarak kalır. Yeni süreler saklanınca ilgili kullanıcıların
+istatistik önbelleği temizlenir (varsayılan süreyle hesaplanmış değer kalmaz).
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal
+from models import Film, TitleGenre, TitleRuntime
+from utils.rollups import refresh_rollups_for_titles
+from utils.stats import invalidate_user_stats
+from utils.upstream import upstream_client
+
+settings = get_settings()
+
+RUNTIME_BATCH_SIZE = 50
+RUNTIME_CONCURRENCY = 4
+
+RuntimeKey = Tuple[str, int]
+TitleInfo = Tuple[Optional[int], List[str]]  # (toplam süre, türler)
+
+# Yazma işlemlerinden gelen, henüz çekilmemiş yapımlar
+_pending: set = set()
+_wakeup: Optional[asyncio.Event] = None
+
+
+def enqueue_runtime(source: str, external_id: int):
+    """Yapımı arka planda süre çekimi için kuyruğa ekler (istek yolunu bekletmez)"""
+    _pending.add((source, int(external_id)))
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def _json_or_none(response: httpx.Response):
+    """404 ise None döndürür; geçici hatalarda (429/5xx) tekrar denenmek üzere hata fırlatır"""
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+async def _fetch_tmdb_runtime(client: httpx.AsyncClient, tmdb_id: int) -> TitleInfo:
+    data = _json_or_none(await client.get(
+        f"{settings.tmdb_base_url}/movie/{tmdb_id}",
+        params={"api_key": settings.tmdb_api_key, "language": "tr-TR"}
+    )) or {}
+    genres = [genre.get("name") for genre in data.get("genres", []) if genre.get("name")]
+    return data.get("runtime") or None, genres
+
+
+_FETCHERS = {
+    "tmdb": _fetch_tmdb_runtime,
+}
+
+
+async def fetch_runtimes(keys: Iterable[RuntimeKey]) -> Dict[RuntimeKey, TitleInfo]:
+    """Süre ve türleri sınırlı eşzamanlılıkla çeker; hata alınan yapımlar sonuçta yer almaz"""
+    semaphore = asyncio.Semaphore(RUNTIME_CONCURRENCY)
+    results: Dict[RuntimeKey, TitleInfo] = {}
+
+    async with upstream_client(timeout=15.0) as client:
+        async def fetch(key: RuntimeKey):
+            source, external_id = key
+            fetcher = _FETCHERS.get(source)
+            if fetcher is None:
+                return
+            async with semaphore:
+                try:
+                    results[key] = await fetcher(client, external_id)
+                except httpx.HTTPError as e:
+                    print(f"⚠️ Süre alınamadı ({source}:{external_id}): {e}")
+
+        await asyncio.gather(*(fetch(key) for key in keys))
+
+    return results
+
+
+def _missing_keys(db: Session, keys: List[RuntimeKey], limit: int) -> List[RuntimeKey]:
+    """
+    Kuyruktaki yapımlardan henüz önbellekte olmayanları ve kütüphanelerde olup
+    süresi bilinmeyen filmleri döndürür.
+    """
+    missing: List[RuntimeKey] = []
+    if keys:
+        cached = set(db.query(TitleRuntime.source, TitleRuntime.external_id).filter(
+            tuple_(TitleRuntime.source, TitleRuntime.external_id).in_(keys)
+        ).all())
+        missing = [key for key in keys if key not in cached]
+
+    if len(missing) < limit:
+        rows = db.query(Film.tmdb_id).outerjoin(
+            TitleRuntime,
+            and_(TitleRuntime.source == "tmdb", TitleRuntime.external_id == Film.tmdb_id)
+        ).filter(
+            TitleRuntime.id.is_(None)
+        ).distinct().limit(limit).all()
+        seen = set(missing)
+        for (tmdb_id,) in rows:
+            if len(missing) >= limit:
+                break
+            if ("tmdb", tmdb_id) not in seen:
+                missing.append(("tmdb", tmdb_id))
+
+    return missing[:limit]
+
+
+def _store_runtimes(results: Dict[RuntimeKey, TitleInfo]):
+    db = SessionLocal()
+    try:
+        existing = set(db.query(TitleRuntime.source, TitleRuntime.external_id).filter(
+            tuple_(TitleRuntime.source, TitleRuntime.external_id).in_(list(results))
+        ).all())
+        new_results = {key: info for key, info in results.items() if key not in existing}
+        if not new_results:
+            return
+
+        fetched_at = datetime.utcnow()
+        db.add_all([
+            TitleRuntime(
+                source=source,
+                external_id=external_id,
+                runtime_minutes=runtime,
+                fetched_at=fetched_at
+            )
+            for (source, external_id), (runtime, _) in new_results.items()
+        ])
+        db.add_all([
+            TitleGenre(source=source, external_id=external_id, genre=genre)
+            for (source, external_id), (_, genres) in new_results.items()
+            for genre in dict.fromkeys(genres)
+        ])
+
+        # Türleri yeni öğrenilen filmler için tür bazlı aktivite özetlerini tazele
+        tmdb_ids = [
+            external_id for (source, external_id), (_, genres) in new_results.items()
+            if source == "tmdb" and genres
+        ]
+        if tmdb_ids:
+            db.flush()
+            refresh_rollups_for_titles(db, tmdb_ids)
+
+        db.commit()
+
+        # Bu filmler için varsayılan süreyle önbelleğe alınmış istatistikler
+        stored_tmdb_ids = [external_id for source, external_id in new_results if source == "tmdb"]
+        if stored_tmdb_ids:
+            owners = db.execute(
+                select(Film.user_id).where(Film.tmdb_id.in_(stored_tmdb_ids)).distinct()
+            ).scalars().all()
+            invalidate_user_stats(*owners)
+    finally:
+        db.close()
+
+
+def _next_batch(queued: List[RuntimeKey]) -> List[RuntimeKey]:
+    db = SessionLocal()
+    try:
+        return _missing_keys(db, queued, RUNTIME_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+async def refresh_runtimes() -> int:
+    """Bir parti eksik süreyi çeker ve saklar. Returns: saklanan yapım sayısı"""
+    queued = list(_pending)[:RUNTIME_BATCH_SIZE]
+    _pending.difference_update(queued)
+
+    batch = await asyncio.to_thread(_next_batch, queued)
+    if not batch:
+        return 0
+    if not settings.tmdb_api_key:
+        batch = [key for key in batch if key[0] != "tmdb"]
+
+    results = await fetch_runtimes(batch)
+    if results:
+        await asyncio.to_thread(_store_runtimes, results)
+    return len(results)
+
+
+async def runtime_backfill_loop():
+    """Eksik süreleri periyodik olarak (veya kuyruğa yeni yapım eklenince) arka planda çeker"""
+    global _wakeup
+    _wakeup = asyncio.Event()
+
+    while True:
+        try:
+            stored = await refresh_runtimes()
+        except Exception as e:
+            stored = 0
+            print(f"⚠️ Süre önbelleği güncellenemedi: {e}")
+
+        # Parti doluysa veya kuyrukta iş varsa hemen devam et,
+        # değilse yeni iş veya bir sonraki periyodu bekle
+        if stored >= RUNTIME_BATCH_SIZE or _pending:
+            continue
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.runtime_backfill_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
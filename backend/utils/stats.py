@@ -0,0 +1,138 @@
+"""
+Kullanıcı istatistikleri servisi.
+
+Tüm sayılar tek bir aggregate SQL sorgusu ile (koşullu SUM(CASE ...) ve AVG) hesaplanır.
+İzleme süresi title_runtimes önbelleğindeki gerçek sürelerden toplanır.
+Sonuç kullanıcı başına önbelleğe alınır; film ve arkadaşlık yazma işlemleri
+invalidate_user_stats ile ilgili kullanıcıların snapshot'ını geçersiz kılar.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import User, Film, Friendship, TitleRuntime
+from utils.cache import TTLCache
+
+settings = get_settings()
+
+stats_cache = TTLCache(maxsize=10000, ttl=settings.stats_cache_ttl_seconds, name="user_stats")
+
+# Süresi henüz önbellekte olmayan filmler için tahmini süre (dakika)
+AVERAGE_MOVIE_MINUTES = 120
+
+
+def _badges(total_movies: int, total_reviews: int, average_rating: float) -> list:
+    """Rozetler (basit rozet sistemi)"""
+    badges = []
+    if total_movies >= 100:
+        badges.append({"name": "🎬 Sinema Gurmesi", "rarity": "legendary"})
+    elif total_movies >= 50:
+        badges.append({"name": "🎬 Film Tutkunları", "rarity": "rare"})
+    elif total_movies >= 10:
+        badges.append({"name": "🎬 İlk Adım", "rarity": "common"})
+
+    if total_reviews >= 50:
+        badges.append({"name": "✍️ Eleştirmen", "rarity": "legendary"})
+    elif total_reviews >= 20:
+        badges.append({"name": "✍️ Yorum Yazarı", "rarity": "rare"})
+
+    if average_rating and average_rating >= 8.5:
+        badges.append({"name": "⭐ İyi Gözlü", "rarity": "rare"})
+
+    return badges
+
+
+def compute_user_stats(db: Session, user_id: int) -> Optional[dict]:
+    """
+    Kullanıcının istatistiklerini tek sorguda hesaplar.
+    Kullanıcı yoksa None döndürür.
+    """
+    now = datetime.utcnow()
+    start_of_month = datetime(now.year, now.month, 1)
+    start_of_year = datetime(now.year, 1, 1)
+
+    watched = Film.izlendi == True
+    has_review = and_(Film.kisisel_yorum.isnot(None), Film.kisisel_yorum != "")
+
+    # Arkadaş sayıları (Instagram mantığı)
+    # Takipçiler: Bu kullanıcıya arkadaşlık isteği gönderenler ve kabul ettikleri
+    followers = db.query(func.count(Friendship.id)).filter(
+        Friendship.friend_id == user_id,
+        Friendship.status == "accepted"
+    ).scalar_subquery()
+    # Takip edilenler: Bu kullanıcının arkadaşlık isteği gönderdiği ve kabul edilenler
+    following = db.query(func.count(Friendship.id)).filter(
+        Friendship.user_id == user_id,
+        Friendship.status == "accepted"
+    ).scalar_subquery()
+
+    row = db.query(
+        User.id,
+        func.coalesce(func.sum(case((watched, 1), else_=0)), 0).label("total_movies"),
+        func.avg(Film.kisisel_puan).label("average_rating"),  # AVG NULL puanları atlar
+        func.coalesce(func.sum(case(
+            (watched, func.coalesce(TitleRuntime.runtime_minutes, AVERAGE_MOVIE_MINUTES)), else_=0
+        )), 0).label("total_watch_time"),
+        func.coalesce(func.sum(case((has_review, 1), else_=0)), 0).label("total_reviews"),
+        func.coalesce(func.sum(case(
+            (and_(watched, Film.izlenme_tarihi >= start_of_month), 1), else_=0
+        )), 0).label("movies_this_month"),
+        func.coalesce(func.sum(case(
+            (and_(watched, Film.izlenme_tarihi >= start_of_year), 1), else_=0
+        )), 0).label("movies_this_year"),
+        followers.label("total_followers"),
+        following.label("total_following")
+    ).outerjoin(
+        Film, Film.user_id == User.id
+    ).outerjoin(
+        # Süre önbelleği (source, external_id) benzersiz olduğu için satır çoğalmaz
+        TitleRuntime,
+        and_(TitleRuntime.source == "tmdb", TitleRuntime.external_id == Film.tmdb_id)
+    ).filter(
+        User.id == user_id
+    ).group_by(User.id).first()
+
+    if row is None:
+        return None
+
+    total_movies = int(row.total_movies)
+    total_reviews = int(row.total_reviews)
+    average_rating = round(float(row.average_rating), 2) if row.average_rating is not None else 0.0
+
+    total_watch_time = int(row.total_watch_time)  # Dakika
+    total_watch_hours = total_watch_time // 60  # Saat
+
+    return {
+        "total_movies": total_movies,
+        "total_series": 0,  # Şimdilik sadece filmler var
+        "average_rating": average_rating,
+        "total_watch_time": total_watch_time,
+        "total_reviews": total_reviews,
+        "total_followers": int(row.total_followers),
+        "total_following": int(row.total_following),
+        "movies_this_month": int(row.movies_this_month),
+        "movies_this_year": int(row.movies_this_year),
+        "series_watching": 0,  # Şimdilik sadece filmler var
+        "series_completed": 0,  # Şimdilik sadece filmler var
+        "total_watch_hours": total_watch_hours,
+        "badges": _badges(total_movies, total_reviews, average_rating)
+    }
+
+
+def get_user_stats(db: Session, user_id: int) -> Optional[dict]:
+    """Önbellekteki snapshot'ı döndürür, yoksa hesaplayıp önbelleğe alır"""
+    user_id = int(user_id)
+    stats = stats_cache.get(user_id)
+    if stats is None:
+        stats = compute_user_stats(db, user_id)
+        if stats is not None:
+            stats_cache.set(user_id, stats)
+    return stats
+
+
+def invalidate_user_stats(*user_ids: int):
+    """Film veya arkadaşlık değişikliğinden sonra snapshot'ları geçersiz kılar"""
+    stats_cache.delete(*(int(user_id) for user_id in user_ids))
@@ -0,0 +1,97 @@
+"""
+Önbellekli ve hız sınırlı TMDB istemcisi.
+
+Aynı istek (yol + parametreler) TTL süresince tekrar TMDB'ye gitmez. İstekler süreç
+genelinde saniyede en fazla tmdb_rate_limit_per_second olacak şekilde aralıklandırılır;
+toplu içe aktarma gibi binlerce arama yapan işler TMDB limitine takılmaz.
+"""
+import asyncio
+import time
+from typing import Optional
+
+import httpx
+
+from config import get_settings
+from utils.cache import TTLCache
+from utils.upstream import upstream_client, upstream_json
+
+settings = get_settings()
+
+tmdb_cache = TTLCache(maxsize=20000, ttl=settings.tmdb_cache_ttl_seconds, name="tmdb")
+
+# Bulunamayan (404) kayıtlar daha kısa süre önbellekte tutulur
+NOT_FOUND_TTL_SECONDS = 600
+
+_MISSING = object()
+
+
+class AsyncRateLimiter:
+    """İstekleri eşit aralıklarla sıraya koyan basit hız sınırlayıcı"""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second
+        self._next_slot = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+                now = time.monotonic()
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+
+tmdb_rate_limiter = AsyncRateLimiter(settings.tmdb_rate_limit_per_second)
+
+
+async def tmdb_get(path: str, params: Optional[dict] = None, client: Optional[httpx.AsyncClient] = None) -> Optional[dict]:
+    """
+    TMDB'den JSON çeker. 404'te None döndürür, diğer hatalarda httpx hatası fırlatır.
+    """
+    params = {"language": "tr-TR", **(params or {})}
+    key = (path, tuple(sorted(params.items())))
+
+    cached = tmdb_cache.get(key, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
+    await tmdb_rate_limiter.acquire()
+    request_params = {"api_key": settings.tmdb_api_key, **params}
+    if client is None:
+        async with upstream_client(timeout=10.0) as own_client:
+            response = await own_client.get(f"{settings.tmdb_base_url}{path}", params=request_params)
+    else:
+        response = await client.get(f"{settings.tmdb_base_url}{path}", params=request_params)
+
+    if response.status_code == 404:
+        tmdb_cache.set(key, None, ttl=NOT_FOUND_TTL_SECONDS)
+        return None
+    response.raise_for_status()
+
+    data = upstream_json(response)
+    tmdb_cache.set(key, data)
+    return data
+
+
+async def search_movie(title: str, year: Optional[int] = None, client: Optional[httpx.AsyncClient] = None) -> Optional[dict]:
+    """Başlık (ve varsa yıl) ile en iyi eşleşen filmi döndürür"""
+    if year:
+        data = await tmdb_get("/search/movie", {"query": title, "primary_release_year": year}, client)
+        if data and data.get("results"):
+            return data["results"][0]
+
+    data = await tmdb_get("/search/movie", {"query": title}, client)
+    if data and data.get("results"):
+        return data["results"][0]
+    return None
+
+
+async def find_by_imdb_id(imdb_id: str, client: Optional[httpx.AsyncClient] = None) -> Optional[dict]:
+    """IMDb ID'sine (tt...) karşılık gelen TMDB filmini döndürür"""
+    data = await tmdb_get(f"/find/{imdb_id}", {"external_source": "imdb_id"}, client)
+    if data and data.get("movie_results"):
+        return data["movie_results"][0]
+    return None
@@ -0,0 +1,19 @@
+"""
+Veritabanına özgü INSERT ... ON CONFLICT yardımcıları.
+PostgreSQL ve SQLite aynı on_conflict_do_update API'sini destekler.
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: Session, table):
+    """Session'ın bağlı olduğu veritabanına uygun, upsert destekli INSERT ifadesi"""
+    dialect = db.get_bind().dialect.name
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"Upsert desteklenmeyen veritabanı: {dialect}")
+    return _INSERTS[dialect](table)
@@ -0,0 +1,64 @@
+"""
+Harici API (TMDB, TVMaze, Jikan) çağrılarının ölçümü.
+
+upstream_client() normal bir httpx.AsyncClient döndürür; tek farkı transport katmanında
+her isteğin servis bazında sayılması ve süresinin ölçülmesidir (/metrics).
+Çağıran kodun hata işleme davranışı değişmez.
+
+Yanıt yardımcıları: dönüştürülmeyen upstream gövdeleri raw_json_response ile ham bayt olarak
+iletilir (parse + yeniden serileştirme yok); dönüştürülecek gövdeler orjson ile parse edilir.
+"""
+import time
+
+import httpx
+import orjson
+from fastapi import Response
+
+from utils.metrics import upstream_errors_total, upstream_request_duration, upstream_requests_total
+
+# Host -> metrik etiketi
+UPSTREAM_SERVICES = {
+    "api.themoviedb.org": "tmdb",
+    "api.tvmaze.com": "tvmaze",
+    "api.jikan.moe": "jikan",
+}
+
+
+def service_name(host: str) -> str:
+    return UPSTREAM_SERVICES.get(host, "other")
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """İstek sayısı, süre ve hata oranını kaydeden transport"""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        service = service_name(request.url.host)
+        started = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except httpx.TransportError as e:
+            upstream_request_duration.observe(time.perf_counter() - started, service)
+            upstream_requests_total.inc(service, type(e).__name__)
+            upstream_errors_total.inc(service)
+            raise
+
+        upstream_request_duration.observe(time.perf_counter() - started, service)
+        upstream_requests_total.inc(service, str(response.status_code))
+        if response.status_code >= 500 or response.status_code == 429:
+            upstream_errors_total.inc(service)
+        return response
+
+
+def upstream_client(**kwargs) -> httpx.AsyncClient:
+    """httpx.AsyncClient yerine kullanılır; parametreler aynen iletilir"""
+    return httpx.AsyncClient(transport=InstrumentedTransport(), **kwargs)
+
+
+def upstream_json(response: httpx.Response):
+    """Upstream gövdesini orjson ile parse eder (response.json()'dan hızlı)"""
+    return orjson.loads(response.content)
+
+
+def raw_json_response(content: bytes) -> Response:
+    """Upstream JSON gövdesini değiştirmeden, ham bayt olarak döndürür"""
+    return Response(content=content, media_type="application/json")
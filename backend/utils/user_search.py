@@ -0,0 +1,280 @@
+"""
+Kullanıcı adı arama ve otomatik tamamlama.
+
+Baştaki joker karakterli ILIKE ('%x%') username index'ini kullanamaz. Bunun yerine:
+- PostgreSQL: pg_trgm GIN index'i (alt dizi araması) ve text_pattern_ops index'i (önek araması)
+- SQLite: trigram tokenizer'lı FTS5 sanal tablosu (users tablosuyla trigger'larla senkron)
+  ve önek aramaları için username index'i üzerinde aralık taraması kullanılır.
+Bu index'ler/tablolar utils/migrations.py'deki migration ile oluşturulur.
+Sonuçlarda önek eşleşmeleri önce, kısa kullanıcı adları üstte sıralanır.
+
+Otomatik tamamlama için bellekte bir önek ağacı (trie) tutulur; her düğüm o önekle
+başlayan en kısa kullanıcı adlarını saklar, böylece her tuş vuruşu veritabanına gitmez.
+Ağaç istek yolunda değil, arka plan döngüsünde (thread'de) kurulur; yeniden kurulurken eski
+ağaç hizmet vermeye devam eder. Ağaç hazır değilse veya kullanıcı sayısı sınırı aşıyorsa
+index'li önek sorgusu kullanılır.
+"""
+import asyncio
+import time
+from bisect import insort
+from threading import RLock
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, and_, case, column, func, inspect, text
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal
+from models import User
+
+settings = get_settings()
+
+# Trigram araması için en kısa terim; daha kısa terimlerde sadece önek araması yapılır
+MIN_SUBSTRING_LENGTH = 3
+# Trie düğümü başına saklanan öneri sayısı (autocomplete limitinin üst sınırı)
+AUTOCOMPLETE_PER_NODE = 10
+# Arka plan döngüsünün ağacın eskiyip eskimediğini kontrol etme aralığı (saniye)
+TRIE_POLL_SECONDS = 15
+
+SQLITE_FTS_TABLE = "users_fts"
+
+# Oluşturma utils/migrations.py içindeki migration ile yapılır
+SQLITE_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5(
+        username, content='users', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, username) VALUES (new.id, new.username);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, username) VALUES ('delete', old.id, old.username);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF username ON users BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, username) VALUES ('delete', old.id, old.username);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, username) VALUES (new.id, new.username);
+    END""",
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+# SQLite FTS5 tablosu kullanılabilir mi (ilk aramada belirlenir)
+_sqlite_fts_ready: Optional[bool] = None
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _next_prefix(term: str) -> str:
+    """Önekle başlayan tüm değerlerden büyük en küçük string (aralık taraması üst sınırı)"""
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def _prefix_match(dialect: str, term: str):
+    if dialect == "sqlite":
+        # SQLite LIKE büyük/küçük harf duyarsız olduğu için index kullanmaz; aralık kullanır
+        return and_(User.username >= term, User.username < _next_prefix(term))
+    return User.username.like(f"{_escape_like(term)}%", escape="\\")
+
+
+def _substring_match(db: Session, dialect: str, term: str):
+    global _sqlite_fts_ready
+    if dialect == "postgresql":
+        return User.username.ilike(f"%{_escape_like(term)}%", escape="\\")
+
+    if dialect == "sqlite":
+        if _sqlite_fts_ready is None:
+            _sqlite_fts_ready = SQLITE_FTS_TABLE in inspect(db.get_bind()).get_table_names()
+        if _sqlite_fts_ready:
+            phrase = '"' + term.replace('"', '""') + '"'
+            return User.id.in_(
+                text(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :phrase")
+                .bindparams(phrase=phrase)
+                .columns(column("rowid", Integer))
+            )
+
+    return User.username.ilike(f"%{_escape_like(term)}%", escape="\\")
+
+
+def search_users(db: Session, term: str, limit: int = 20) -> List[User]:
+    """
+    Kullanıcı adında terimi içeren kullanıcıları döndürür.
+    Önek eşleşmeleri önce, ardından kısa kullanıcı adları gelir.
+    """
+    term = term.lower().strip()
+    if not term:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    prefix = _prefix_match(dialect, term)
+    match = _substring_match(db, dialect, term) if len(term) >= MIN_SUBSTRING_LENGTH else prefix
+
+    return db.query(User).filter(match).order_by(
+        case((prefix, 0), else_=1),
+        func.length(User.username),
+        User.username
+    ).limit(limit).all()
+
+
+def prefix_suggestions(db: Session, prefix: str, limit: int = 8) -> List[dict]:
+    """
+    Önekle başlayan kullanıcı adları (ağaç kullanılamadığında).
+    username index'i üzerinde aralık taraması; sıralama index sırası (alfabetik) olduğu
+    için LIMIT'e ulaşınca durur.
+    """
+    prefix = prefix.lower().strip()
+    if not prefix:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    rows = db.query(User.id, User.username, User.picture).filter(
+        _prefix_match(dialect, prefix)
+    ).order_by(User.username).limit(limit).all()
+    return [{"id": user_id, "username": username, "picture": picture} for user_id, username, picture in rows]
+
+
+Suggestion = Tuple[int, str, int, Optional[str]]  # (uzunluk, kullanıcı adı, id, resim)
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.top: List[Suggestion] = []
+
+
+class UsernameTrie:
+    """
+    Kullanıcı adı önek ağacı. Her düğüm o önekle başlayan en kısa
+    AUTOCOMPLETE_PER_NODE kullanıcı adını tutar; sorgu O(önek uzunluğu)'dur.
+    build() arka planda çalışır ve yeni ağacı hazır olunca eskisinin yerine koyar;
+    kurulum sırasında eklenen kullanıcılar yeni ağaca da aktarılır. Kullanıcı sayısı
+    max_users'ı aşarsa ağaç tutulmaz (bellek sınırı) ve complete() None döndürür.
+    """
+
+    def __init__(self, per_node: int = AUTOCOMPLETE_PER_NODE, max_age: float = 600, max_users: int = 50000):
+        self.per_node = per_node
+        self.max_age = max_age
+        self.max_users = max_users
+        self._root: Optional[_TrieNode] = None
+        self._size = 0
+        self._built_at: Optional[float] = None
+        self._stale = False
+        self._pending: Optional[List[Suggestion]] = None  # kurulum sürerken eklenenler
+        self._lock = RLock()
+
+    def _insert(self, root: _TrieNode, entry: Suggestion):
+        node = root
+        self._push(node, entry)
+        for char in entry[1]:
+            node = node.children.setdefault(char, _TrieNode())
+            self._push(node, entry)
+
+    def _push(self, node: _TrieNode, entry: Suggestion):
+        if entry in node.top:
+            return
+        if len(node.top) < self.per_node or entry < node.top[-1]:
+            insort(node.top, entry)
+            del node.top[self.per_node:]
+
+    def needs_rebuild(self) -> bool:
+        with self._lock:
+            return self._stale or self._built_at is None or time.monotonic() - self._built_at > self.max_age
+
+    def build(self) -> Optional[int]:
+        """
+        Ağacı veritabanındaki tüm kullanıcılardan yeniden kurar (arka plan thread'inde).
+        Kullanıcı sayısını, sınır aşıldıysa None döndürür.
+        """
+        with self._lock:
+            self._stale = False
+            self._pending = []
+
+        root, size = _TrieNode(), 0
+        db = SessionLocal()
+        try:
+            if db.query(func.count(User.id)).scalar() > self.max_users:
+                root = None
+            else:
+                rows = db.query(User.id, User.username, User.picture).yield_per(10000)
+                for user_id, username, picture in rows:
+                    size += 1
+                    if size > self.max_users:
+                        root = None
+                        break
+                    self._insert(root, (len(username), username, user_id, picture))
+        except Exception:
+            # Eski ağaç hizmete devam eder; bir sonraki turda yeniden denenir
+            with self._lock:
+                self._pending = None
+                self._stale = True
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            if root is not None:
+                for entry in self._pending:
+                    self._insert(root, entry)
+                size += len(self._pending)
+            self._root = root
+            self._size = size if root is not None else 0
+            self._pending = None
+            self._built_at = time.monotonic()
+        return self._size if root is not None else None
+
+    def add(self, user_id: int, username: str, picture: Optional[str] = None):
+        """Yeni kullanıcıyı mevcut ağaca (ve sürmekte olan kurulumun ağacına) ekler"""
+        entry = (len(username), username, user_id, picture)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(entry)
+            if self._root is None:
+                return
+            if self._size >= self.max_users:
+                # Sınır aşıldı: ağaç bırakılır, bir sonraki kurulum durumu yeniden değerlendirir
+                self._root, self._size, self._stale = None, 0, True
+                return
+            self._insert(self._root, entry)
+            self._size += 1
+
+    def invalidate(self):
+        """Yeniden adlandırma/silme sonrası arka plan döngüsüne ağacı yeniden kurdurur"""
+        with self._lock:
+            self._stale = True
+
+    def complete(self, prefix: str, limit: int = 8) -> Optional[List[dict]]:
+        """Önekle başlayan en kısa kullanıcı adları; ağaç kullanılamıyorsa None"""
+        with self._lock:
+            node = self._root
+        if node is None:
+            return None
+
+        for char in prefix.lower().strip():
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        return [
+            {"id": user_id, "username": username, "picture": picture}
+            for _, username, user_id, picture in node.top[:limit]
+        ]
+
+
+username_trie = UsernameTrie(
+    max_age=settings.user_autocomplete_refresh_seconds,
+    max_users=settings.user_autocomplete_max_users
+)
+
+
+async def username_trie_loop():
+    """Önek ağacını arka planda (thread'de) kurar; eskidiğinde veya geçersiz kılındığında yeniler"""
+    while True:
+        if username_trie.needs_rebuild():
+            try:
+                size = await asyncio.to_thread(username_trie.build)
+                if size is None:
+                    print(f"⚠️ Kullanıcı sayısı {username_trie.max_users} sınırının üstünde, otomatik tamamlama veritabanından yapılacak")
+            except Exception as e:
+                print(f"⚠️ Kullanıcı adı ağacı kurulamadı: {e}")
+        await asyncio.sleep(TRIE_POLL_SECONDS)
@@ -0,0 +1,146 @@
+"""
+SQLite tek yazar kuyruğu.
+
+SQLite aynı anda tek yazara izin verir. Her istek kendi bağlantısından yazmaya çalışınca
+(özellikle okuma ile başlayıp yazmaya yükselen transaction'larda) "database is locked"
+hataları alınır. Küçük yazma işleri (beğeni, yorum) bunun yerine tek bir yazar thread'ine
+kuyruklanır:
+- Yazar tek bağlantı kullanır ve transaction'ı BEGIN IMMEDIATE ile açar (kilit baştan alınır)
+- Kuyrukta bekleyen işler tek transaction'da birleştirilir (grup commit, tek fsync)
+- Her iş kendi SAVEPOINT'inde çalışır; hata veren iş diğerlerini geri almaz
+
+PostgreSQL'de kuyruk kullanılmaz; iş isteğin kendi session'ında çalışıp commit edilir.
+"""
+import asyncio
+import queue
+import threading
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import apply_sqlite_pragmas, database_url, is_file_sqlite
+
+settings = get_settings()
+
+_STOP = object()
+
+
+class _WriteJob(NamedTuple):
+    fn: Callable
+    args: Tuple
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+
+
+def _resolve(future: asyncio.Future, ok: bool, value: Any):
+    if future.cancelled():
+        return
+    if ok:
+        future.set_result(value)
+    else:
+        future.set_exception(value)
+
+
+class SQLiteWriteQueue:
+    """Yazma işlerini tek thread'de, partiler halinde çalıştıran kuyruk"""
+
+    def __init__(self, url: str, batch_size: int = 64):
+        self.batch_size = batch_size
+        # isolation_level=None: sürücünün örtük BEGIN'i kapatılır, BEGIN IMMEDIATE aşağıda verilir
+        self.engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "isolation_level": None},
+            pool_size=1,
+            max_overflow=0,
+        )
+        event.listen(self.engine, "connect", apply_sqlite_pragmas)
+        event.listen(self.engine, "begin", lambda connection: connection.exec_driver_sql("BEGIN IMMEDIATE"))
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.jobs = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                    self._thread.start()
+
+    async def submit(self, fn: Callable, *args) -> Any:
+        """
+        fn(session, *args) yazar thread'inde çalışır; commit edildikten sonra dönüş değeri döner.
+        fn'in fırlattığı hata (ör. HTTPException) aynen çağırana iletilir.
+        """
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_WriteJob(fn, args, loop, future))
+        return await future
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            batch = [job]
+            while len(batch) < self.batch_size:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    self._execute(batch)
+                    return
+                batch.append(job)
+            self._execute(batch)
+
+    def _execute(self, batch: List[_WriteJob]):
+        outcomes = []
+        try:
+            with Session(self.engine, expire_on_commit=False) as session:
+                with session.begin():
+                    for job in batch:
+                        try:
+                            with session.begin_nested():
+                                outcomes.append((job, True, job.fn(session, *job.args)))
+                        except Exception as e:
+                            outcomes.append((job, False, e))
+        except Exception as e:
+            # Commit başarısız: partideki hiçbir iş kalıcı olmadı
+            outcomes = [(job, False, e) for job in batch]
+
+        self.batches += 1
+        self.jobs += len(batch)
+        for job, ok, value in outcomes:
+            job.loop.call_soon_threadsafe(_resolve, job.future, ok, value)
+
+    def close(self):
+        """Kuyruktaki işler bitince yazar thread'ini durdurur"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        self.engine.dispose()
+
+
+write_queue: Optional[SQLiteWriteQueue] = (
+    SQLiteWriteQueue(database_url, settings.sqlite_write_batch_size) if is_file_sqlite(database_url) else None
+)
+
+
+async def run_write(db: AsyncSession, fn: Callable, *args) -> Any:
+    """
+    Küçük bir yazma işini çalıştırır ve commit eder: fn(sync_session, *args).
+    SQLite'ta tek yazar kuyruğuna gider, diğer veritabanlarında isteğin session'ında çalışır.
+    """
+    if write_queue is None:
+        result = await db.run_sync(fn, *args)
+        await db.commit()
+        return result
+    return await write_queue.submit(fn, *args)
@@ -34,6 +34,7 @@ interface UserStats {
 }
 
 interface Compatibility {
+  user2_id?: number;
   compatibility_percentage: number;
   common_films: number;
 }
@@ -84,24 +85,25 @@ export function Friends() {
 
         // Arkadaşların uyumluluk skorlarını ve istatistiklerini getir
         if (friendsResponse.length > 0) {
-          const timestamp = Date.now(); // Cache bypass
-          const compatibilityPromises = friendsResponse.map((friend: User) =>
-            socialService.getCompatibility(friend.id).catch(() => ({ compatibility_percentage: 0, common_films: 0 }))
-          );
           const statsPromises = friendsResponse.map((friend: User) =>
             userService.getUserStats(friend.id.toString()).catch(() => null)
           );
 
           const [compatibilities, stats] = await Promise.all([
-            Promise.all(compatibilityPromises),
+            socialService.getAllCompatibility().catch(() => []),
             Promise.all(statsPromises),
           ]);
 
           const compatibilityMap: Record<number, Compatibility> = {};
           const statsMap: Record<number, UserStats> = {};
 
+          compatibilities.forEach((compatibility: Compatibility) => {
+            if (compatibility.user2_id !== undefined) {
+              compatibilityMap[compatibility.user2_id] = compatibility;
+            }
+          });
+
           friendsResponse.forEach((friend: User, index: number) => {
-            compatibilityMap[friend.id] = compatibilities[index];
             if (stats[index]) {
               statsMap[friend.id] = stats[index];
             }
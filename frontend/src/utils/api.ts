@@ -81,6 +81,12 @@ export const userService = {
     return response.data;
   },
 
+  // Kütüphaneyi dosya olarak indir (csv, ndjson veya json)
+  exportLibrary: async (format: "csv" | "ndjson" | "json" = "csv") => {
+    const response = await api.get("/users/me/export", { params: { format }, responseType: "blob" });
+    return response.data as Blob;
+  },
+
   // Kullanıcının incelemeli filmlerini getir
   getUserReviews: async (userId: string) => {
     const response = await api.get(`/users/${userId}/reviews`);
@@ -137,12 +143,41 @@ export const movieService = {
     return response.data;
   },
 
+  // Çoklu seçim: birden fazla filmi tek istekte güncelle/sil
+  batchUpdateMovies: async (
+    updates: Array<{ film_id: number; [key: string]: any }>,
+    deletes: number[] = []
+  ) => {
+    const response = await api.post("/movies/batch", { updates, deletes });
+    return response.data;
+  },
+
   // Film incelemelerini getir (belirli bir TMDB ID için tüm kullanıcıların incelemeleri)
   getMovieReviews: async (tmdbId: number) => {
     const response = await api.get(`/movies/tmdb/${tmdbId}/reviews`);
     return response.data;
   },
 
+  // Bu filmi izleyen arkadaşlar ve ortalama arkadaş puanı
+  getFriendsWhoWatched: async (tmdbId: number) => {
+    const response = await api.get(`/movies/tmdb/${tmdbId}/friends`);
+    return response.data;
+  },
+
+  // Letterboxd/IMDb CSV dışa aktarımını içe aktar (arka plan işi başlatır)
+  importLibrary: async (file: File, watchlist: boolean = false) => {
+    const formData = new FormData();
+    formData.append("file", file);
+    const response = await api.post("/movies/import", formData, { params: { watchlist } });
+    return response.data;
+  },
+
+  // İçe aktarma işinin ilerlemesini getir
+  getImportStatus: async (jobId: string) => {
+    const response = await api.get(`/movies/import/${jobId}`);
+    return response.data;
+  },
+
   // Kullanıcının tür istatistikleri
   getGenreStats: async () => {
     const response = await api.get("/movies/my-genres");
@@ -169,12 +204,24 @@ export const socialService = {
     return response.data;
   },
 
+  // Kullanıcı adı otomatik tamamlama (yazarken öneriler)
+  autocompleteUsers: async (q: string, limit: number = 8) => {
+    const response = await api.get("/users/autocomplete", { params: { q, limit } });
+    return response.data;
+  },
+
   // Arkadaşlık isteği gönder
   sendFriendRequest: async (friendId: number) => {
     const response = await api.post("/social/friends/request", { friend_id: friendId });
     return response.data;
   },
 
+  // Arkadaş önerilerini getir (arkadaşların arkadaşları)
+  getFriendSuggestions: async (limit: number = 10) => {
+    const response = await api.get("/social/friends/suggestions", { params: { limit } });
+    return response.data;
+  },
+
   // Arkadaşlık isteklerini getir
   getFriendRequests: async () => {
     const response = await api.get("/social/friends/requests");
@@ -199,9 +246,18 @@ export const socialService = {
     return response.data;
   },
 
+  // Tüm arkadaşlarla uyumluluk skorlarını tek istekte getir
+  getAllCompatibility: async (includeCorrelation: boolean = false) => {
+    const response = await api.get("/social/compatibility", {
+      params: { include_correlation: includeCorrelation },
+    });
+    return response.data;
+  },
+
   // Bu haftaki film sayısını hesapla
   getWeeklyMovieCount: async () => {
-    const response = await api.get("/movies/my-list");
+    // Sadece tarih alanı yeterli; overview gibi uzun alanlar indirilmez
+    const response = await api.get("/movies/my-list", { params: { fields: "izlenme_tarihi" } });
     const movies = response.data;
     
     // Son 7 gün içinde izlenen filmler